@@ -42,6 +42,8 @@ def create_app():
     from routes.alert_routes import alert_bp
     from routes.employee_routes import employee_bp
     from routes.report_routes import report_bp
+    from routes.health_routes import health_bp
+    from routes.pipeline_routes import pipeline_bp
 
     app.register_blueprint(auth_bp,     url_prefix='/api/auth')
     app.register_blueprint(project_bp,  url_prefix='/api/projects')
@@ -51,15 +53,50 @@ def create_app():
     app.register_blueprint(alert_bp,    url_prefix='/api/alerts')
     app.register_blueprint(employee_bp, url_prefix='/api/employees')
     app.register_blueprint(report_bp,   url_prefix='/api/reports')
+    app.register_blueprint(health_bp,   url_prefix='/api/health')
+    app.register_blueprint(pipeline_bp, url_prefix='/api/pipeline')
 
-    # ── Scheduler ─────────────────────────────────────────────────────────────
-    from scheduler.daily_jobs import start_scheduler
-    start_scheduler(app)
+    # ── Model hot reload ──────────────────────────────────────────────────────
+    from ml.model_registry import registry
+    registry.start_watcher(app.config['MODEL_WATCH_INTERVAL_SECONDS'])
+
+    # ── Model pre-warm (readiness waits for it) ───────────────────────────────
+    if app.config['MODEL_PREWARM']:
+        from ml.warmup import start_prewarm
+        start_prewarm()
+
+    # ── Async anomaly scoring (drained at exit) ───────────────────────────────
+    app.anomaly_pool = None
+    if app.config['ASYNC_ANOMALY_SCORING']:
+        import atexit
+        from ml.anomaly_queue import AnomalyScoringPool
+        app.anomaly_pool = AnomalyScoringPool(db, workers=app.config['ANOMALY_WORKERS'],
+                                              max_queue=app.config['ANOMALY_QUEUE_SIZE'])
+        atexit.register(app.anomaly_pool.shutdown, app.config['ANOMALY_DRAIN_TIMEOUT_SECONDS'])
+
+    # ── Scheduler (jobs run only in the leader process) ───────────────────────
+    app.leader_lock = None
+    if app.config['SCHEDULER_LEADER_LOCK']:
+        import atexit
+        from scheduler.leader_lock import LeaderLock
+        app.leader_lock = LeaderLock(db, ttl_seconds=app.config['SCHEDULER_LOCK_TTL_SECONDS'])
+        atexit.register(app.leader_lock.stop)
 
-    # ── Health check ──────────────────────────────────────────────────────────
-    @app.route('/api/health')
-    def health():
-        return {'status': 'ok', 'message': 'AI Risk Prediction API is running'}, 200
+    # Re-queue reports left anomaly_pending by a crash: one process does it,
+    # the leader when it takes the lease (or this one, without a lease)
+    if app.anomaly_pool is not None:
+        def recover():
+            app.anomaly_pool.recover_pending(limit=app.config['ANOMALY_QUEUE_SIZE'])
+
+        if app.leader_lock is not None:
+            app.leader_lock.on_acquire(recover)
+        else:
+            recover()
+    if app.leader_lock is not None:
+        app.leader_lock.start()
+
+    from scheduler.daily_jobs import start_scheduler
+    app.scheduler = start_scheduler(app)
 
     return app
 
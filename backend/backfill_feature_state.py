@@ -0,0 +1,67 @@
+"""
+Build the task_feature_state collection from existing daily_progress history.
+
+Streams every report in (task_id, date) order, folds each task's reports
+into its running-aggregate doc and writes them in batches. Tasks that
+already have a state are left alone (progress submits keep those current)
+unless --rebuild is given.
+
+Run once after deploying the feature store:
+    python backfill_feature_state.py
+    python backfill_feature_state.py --rebuild --batch-size 5000
+"""
+import os
+import time
+import argparse
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from models.task_feature_state_model import TaskFeatureStateModel
+
+load_dotenv()
+
+
+def backfill(db, batch_size=1000, rebuild=False, log=print):
+    fsm    = TaskFeatureStateModel(db)
+    cursor = db['daily_progress'].find(
+        {}, {'task_id': 1, 'date': 1, 'completion_percent': 1, 'hours_worked': 1, '_id': 0}
+    ).sort([('task_id', 1), ('date', 1)])
+
+    t0 = time.perf_counter()
+    pending, written, tasks, reports = [], 0, 0, 0
+    current_id, current_docs = None, []
+
+    def flush():
+        nonlocal pending, written
+        written += fsm.bulk_insert_missing(pending, overwrite=rebuild)
+        pending = []
+
+    for doc in cursor:
+        reports += 1
+        if doc['task_id'] != current_id:
+            if current_docs:
+                pending.append(TaskFeatureStateModel.from_history(current_id, current_docs))
+                tasks += 1
+            current_id, current_docs = doc['task_id'], []
+            if len(pending) >= batch_size:
+                flush()
+                log(f"  {tasks} tasks / {reports} reports …")
+        current_docs.append(doc)
+    if current_docs:
+        pending.append(TaskFeatureStateModel.from_history(current_id, current_docs))
+        tasks += 1
+    flush()
+
+    elapsed = time.perf_counter() - t0
+    log(f"✅ {tasks} tasks from {reports} reports; {written} states written in {elapsed:.1f}s")
+    return tasks, written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfill per-task feature state from daily_progress.')
+    parser.add_argument('--batch-size', type=int, default=1000, help='states per bulk write')
+    parser.add_argument('--rebuild', action='store_true', help='overwrite states that already exist')
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/risk_predictions'))
+    backfill(client.get_default_database(), batch_size=args.batch_size, rebuild=args.rebuild)
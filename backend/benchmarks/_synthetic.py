@@ -0,0 +1,103 @@
+"""
+Synthetic MongoDB-shaped documents shared by the benchmark scripts.
+The make_* helpers only build plain dicts; seed_portfolio() inserts a
+whole portfolio built from them into a (usually mongomock) database.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+from bson import ObjectId
+
+PRIORITIES = ['low', 'medium', 'high', 'critical']
+
+
+def make_users(n=20, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            '_id': ObjectId(),
+            'name': f'Employee {i}',
+            'email': f'employee{i}@example.com',
+            'role': 'employee',
+            'trust_score': float(rng.uniform(30, 100)),
+        }
+        for i in range(n)
+    ]
+
+
+def make_project(name='Benchmark Project'):
+    return {
+        '_id': ObjectId(),
+        'name': name,
+        'status': 'in_progress',
+        'deadline': (date.today() + timedelta(days=60)).isoformat(),
+        'team_members': [],
+        'risk_score': 0,
+    }
+
+
+def make_tasks(project, users, n, seed=0):
+    rng = np.random.default_rng(seed)
+    today = date.today()
+    tasks = []
+    for i in range(n):
+        user = users[int(rng.integers(len(users)))]
+        tasks.append({
+            '_id': ObjectId(),
+            'title': f'Task {i}',
+            'project_id': str(project['_id']),
+            'assignee_id': str(user['_id']),
+            'status': 'in_progress',
+            'priority': PRIORITIES[int(rng.integers(len(PRIORITIES)))],
+            'progress': int(rng.integers(0, 100)),
+            'deadline': (today + timedelta(days=int(rng.integers(-10, 60)))).isoformat(),
+        })
+    return tasks
+
+
+def make_progress(tasks, reports_per_task=10, seed=0):
+    """Return {task_id: [progress_doc, ...]} ordered by date (oldest first)."""
+    rng = np.random.default_rng(seed)
+    today = date.today()
+    progress_map = {}
+    for task in tasks:
+        tid = str(task['_id'])
+        n = int(rng.integers(0, reports_per_task * 2 + 1))
+        pct = np.minimum(np.cumsum(rng.uniform(0, 8, n)), 100)
+        docs = []
+        for j in range(n):
+            docs.append({
+                '_id': ObjectId(),
+                'task_id': tid,
+                'employee_id': task['assignee_id'],
+                'project_id': task['project_id'],
+                'date': (today - timedelta(days=n - j)).isoformat(),
+                'hours_worked': float(rng.uniform(1, 9)),
+                'completion_percent': float(round(pct[j], 1)),
+            })
+        progress_map[tid] = docs
+    return progress_map
+
+
+def seed_portfolio(db, n_projects, tasks_per_project, reports_per_task=5, bad_projects=0):
+    """
+    Insert make_users() and n_projects in-progress projects, each with its
+    tasks and their progress history. The first bad_projects get a task
+    whose progress is not a number, so scoring them fails.
+    Returns {project_id: [task, ...]} in insertion order.
+    """
+    users = make_users()
+    db.users.insert_many(users)
+    seeded = {}
+    for i in range(n_projects):
+        project = make_project(f'Project {i}')
+        tasks   = make_tasks(project, users, tasks_per_project, seed=i)
+        if i < bad_projects:
+            tasks[0]['progress'] = 'n/a'
+        db.projects.insert_one(project)
+        db.tasks.insert_many(tasks)
+        docs = [d for h in make_progress(tasks, reports_per_task, seed=i).values() for d in h]
+        if docs:
+            db.daily_progress.insert_many(docs)
+        seeded[str(project['_id'])] = tasks
+    return seeded
@@ -0,0 +1,81 @@
+"""
+Benchmark: CompiledForest vs RandomForestClassifier.predict_proba.
+
+First checks that the compiled evaluator returns bit-identical
+probabilities to sklearn (random rows, training-like rows and rows sitting
+exactly on split thresholds), then reports p50/p99 latency per call.
+
+Run from the backend/ directory (needs ml/saved_models/risk_model.pkl):
+    python benchmarks/bench_compiled_forest.py
+    python benchmarks/bench_compiled_forest.py --rows 1 10 100 10000 --repeat 50
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.compiled_forest import CompiledForest
+from ml.predict import _load_model
+from ml.train_model import _generate_risk_training_data
+
+
+def check_equivalence(clf, compiled, n=5000):
+    rng = np.random.default_rng(0)
+    X_train, _ = _generate_risk_training_data(n=n, seed=7)
+    X_noise = X_train + rng.normal(0, 5, X_train.shape)
+
+    # Rows whose values land exactly on split thresholds exercise the <= branch
+    X_edge = X_train[:n // 5].copy()
+    split_nodes = np.flatnonzero(~compiled.is_leaf)
+    picks = rng.choice(split_nodes, size=len(X_edge))
+    X_edge[np.arange(len(X_edge)), compiled.feature[picks]] = compiled.threshold[picks]
+
+    for name, X in (('train-like', X_train), ('noisy', X_noise), ('on-threshold', X_edge)):
+        expected = clf.predict_proba(X)
+        got = compiled.predict_proba(X)
+        if not np.array_equal(expected, got):
+            raise AssertionError(f"{name}: max abs diff {np.abs(expected - got).max():.3e}")
+        assert np.array_equal(clf.predict(X), compiled.predict(X)), f"{name}: labels differ"
+        print(f"  ✓ {name:<13} {len(X):>6} rows bit-identical")
+
+
+def _latency(fn, X, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - t0)
+    return np.percentile(times, 50) * 1e3, np.percentile(times, 99) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1, 10, 100, 10_000])
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    clf = _load_model()['model']
+    t0 = time.perf_counter()
+    compiled = CompiledForest.from_sklearn(clf)
+    print(f"Compiled {compiled.n_trees} trees / {len(compiled.feature)} nodes "
+          f"in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    print("Equivalence:")
+    check_equivalence(clf, compiled)
+
+    X_all, _ = _generate_risk_training_data(n=max(args.rows), seed=11)
+    print(f"\n{'rows':>6}  {'sklearn p50/p99 (ms)':>22}  {'compiled p50/p99 (ms)':>22}  {'p50 speedup':>11}")
+    for n in args.rows:
+        X = X_all[:n]
+        repeat = args.repeat if n <= 1000 else max(args.repeat // 10, 3)
+        sk50, sk99 = _latency(clf.predict_proba, X, repeat)
+        cf50, cf99 = _latency(compiled.predict_proba, X, repeat)
+        print(f"{n:>6}  {sk50:>10.3f} / {sk99:<9.3f}  {cf50:>10.3f} / {cf99:<9.3f}  {sk50 / cf50:>10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
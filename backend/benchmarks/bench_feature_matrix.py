@@ -0,0 +1,79 @@
+"""
+Benchmark: build_feature_matrix vs build_task_features + build_feature_vector per task.
+
+Checks that both paths give bit-identical matrices (including unparsable
+and datetime deadlines), then times them at each progress-row count.
+
+Run from the backend/ directory (no model or database needed):
+    python benchmarks/bench_feature_matrix.py
+    python benchmarks/bench_feature_matrix.py --rows 10000 1000000 --reports-per-task 10
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import date, datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks._synthetic import make_users, make_project, make_tasks, make_progress
+from ml.preprocess import build_task_features, build_feature_vector, build_feature_matrix
+
+
+def scalar_matrix(tasks, progress_by_task, trust_by_assignee, as_of):
+    return np.vstack([
+        build_feature_vector(build_task_features(
+            task, progress_by_task.get(str(task['_id']), []),
+            float(trust_by_assignee.get(str(task.get('assignee_id', '')), 80.0)), as_of,
+        ))
+        for task in tasks
+    ])
+
+
+def _dataset(n_rows, reports_per_task, seed):
+    """Tasks plus progress totalling roughly n_rows reports."""
+    users = make_users()
+    project = make_project()
+    tasks = make_tasks(project, users, max(n_rows // reports_per_task, 1), seed=seed)
+    # A few deadline shapes the scalar parser treats specially
+    tasks[0]['deadline'] = 'not a date'
+    if len(tasks) > 3:
+        tasks[1]['deadline'] = datetime(2026, 12, 1, 17, 30)
+        tasks[2].pop('deadline')
+        tasks[3]['deadline'] = '2026-11-05T10:00:00Z'
+    progress = make_progress(tasks, reports_per_task=reports_per_task, seed=seed)
+    trust = {str(u['_id']): u['trust_score'] for u in users}
+    return tasks, progress, trust
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--reports-per-task', type=int, default=10, help='mean reports per task')
+    args = parser.parse_args()
+
+    as_of = date.today()
+    print(f"{'progress rows':>13} {'tasks':>8}  {'scalar (s)':>10}  {'matrix (s)':>10}  {'speedup':>7}")
+    for i, n_rows in enumerate(args.rows):
+        tasks, progress, trust = _dataset(n_rows, args.reports_per_task, seed=i)
+        actual_rows = sum(len(docs) for docs in progress.values())
+
+        t0 = time.perf_counter()
+        expected = scalar_matrix(tasks, progress, trust, as_of)
+        t_scalar = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        got = build_feature_matrix(tasks, progress, trust, as_of)
+        t_matrix = time.perf_counter() - t0
+
+        if not np.array_equal(expected, got):
+            bad = np.argwhere(expected != got)
+            raise AssertionError(f"{len(bad)} cells differ, first at row/col {bad[0].tolist()}")
+        print(f"{actual_rows:>13,} {len(tasks):>8,}  {t_scalar:>10.3f}  {t_matrix:>10.3f}  "
+              f"{t_scalar / t_matrix:>6.1f}x  ✓ bit-identical")
+
+
+if __name__ == '__main__':
+    main()
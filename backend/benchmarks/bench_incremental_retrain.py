@@ -0,0 +1,159 @@
+"""
+Benchmark: daily warm-start retraining (ml/incremental_training.py) vs
+refitting the forest from scratch on the whole history.
+
+Simulates a portfolio in mongomock: every day new tasks start with a
+deadline and a hidden velocity, every open task files one report, and
+tasks finish (or slip) accordingly. After --warmup days a base forest is
+fitted on everything resolved so far; then, for each following day, the
+day's reports are inserted and both an incremental round and a full refit
+are timed, reading the rows and fitting separately. The incremental fit
+tracks one day's new outcomes, the full refit's the whole history.
+mongomock has no indexes, so its reads scan the whole collection either
+way; against MongoDB the incremental read is index lookups for the tasks
+active since the cutoff.
+
+Models are published to a temporary registry, never to ml/saved_models.
+
+Run from the backend/ directory (no model or database needed):
+    python benchmarks/bench_incremental_retrain.py
+    python benchmarks/bench_incremental_retrain.py --days 20 --tasks-per-day 60
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mongomock
+from bson import ObjectId
+from sklearn.ensemble import RandomForestClassifier
+
+import ml.incremental_training as incremental_training
+import ml.train_model as train_model
+from benchmarks._synthetic import make_users, PRIORITIES
+from ml.model_registry import ModelRegistry
+from ml.preprocess import FEATURE_COLUMNS
+from ml.training_data import collect_rows
+
+
+class Portfolio:
+    """Tasks with a hidden daily velocity; step() files one day of reports."""
+
+    def __init__(self, db, users, tasks_per_day, seed=0):
+        self.db, self.users, self.tasks_per_day = db, users, tasks_per_day
+        self.rng  = np.random.default_rng(seed)
+        self.open = {}                     # task_id -> [completion %, velocity, deadline]
+
+    def step(self, day):
+        tasks = []
+        for _ in range(self.tasks_per_day):
+            deadline = day + timedelta(days=int(self.rng.integers(7, 30)))
+            task = {
+                '_id': ObjectId(),
+                'title': 'Simulated task',
+                'project_id': 'sim',
+                'assignee_id': str(self.users[int(self.rng.integers(len(self.users)))]['_id']),
+                'status': 'in_progress',
+                'priority': PRIORITIES[int(self.rng.integers(len(PRIORITIES)))],
+                'progress': 0,
+                'deadline': deadline.isoformat(),
+            }
+            tasks.append(task)
+            self.open[str(task['_id'])] = [0.0, float(self.rng.uniform(1.5, 9)), deadline]
+        if tasks:
+            self.db.tasks.insert_many(tasks)
+
+        reports = []
+        for tid, state in list(self.open.items()):
+            state[0] = min(state[0] + state[1] * float(self.rng.uniform(0.3, 1.7)), 100.0)
+            reports.append({
+                'task_id': tid, 'employee_id': '', 'project_id': 'sim', 'date': day.isoformat(),
+                'hours_worked': float(self.rng.uniform(1, 9)), 'completion_percent': round(state[0], 1),
+            })
+            if state[0] >= 100 or (day - state[2]).days > 30:
+                del self.open[tid]
+        if reports:
+            self.db.daily_progress.insert_many(reports)
+        return len(reports)
+
+
+def _forest(n_estimators):
+    return RandomForestClassifier(n_estimators=n_estimators, max_depth=12, min_samples_split=5,
+                                  class_weight='balanced', random_state=42, n_jobs=-1)
+
+
+def _all_rows(db, as_of):
+    rows = collect_rows(db, since=None, as_of=as_of)
+    return np.column_stack([rows[c] for c in FEATURE_COLUMNS]), rows['label'].astype(int)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--warmup', type=int, default=40, help='days simulated before the base model')
+    parser.add_argument('--days', type=int, default=10, help='days of incremental retraining')
+    parser.add_argument('--tasks-per-day', type=int, default=40)
+    parser.add_argument('--max-trees', type=int, default=100)
+    parser.add_argument('--cohort-trees', type=int, default=10)
+    args = parser.parse_args()
+
+    models_dir = tempfile.mkdtemp(prefix='risk-registry-')
+    registry = ModelRegistry(models_dir)
+    incremental_training.registry = train_model.registry = registry
+    incremental_training.MAX_TREES    = args.max_trees
+    incremental_training.COHORT_TREES = args.cohort_trees
+    incremental_training.MIN_COHORT_ROWS = 50
+
+    try:
+        db = mongomock.MongoClient().risksense
+        users = make_users()
+        db.users.insert_many(users)
+        portfolio = Portfolio(db, users, args.tasks_per_day)
+
+        day = date.today() - timedelta(days=args.warmup + args.days)
+        n_reports = 0
+        for _ in range(args.warmup):
+            n_reports += portfolio.step(day)
+            day += timedelta(days=1)
+
+        X, y = _all_rows(db, day)
+        base = _forest(args.max_trees).fit(X, y)
+        train_model._publish_risk_model(base, 'base', True, metadata={
+            'training_cutoff': day.isoformat(), 'train_rows': len(y)})
+        print(f"base: {len(y):,} rows from {n_reports:,} reports, {args.max_trees} trees\n")
+
+        print(f"{'day':>3} {'reports':>8}  {'new rows':>8}  {'read/fit (s)':>12}  {'full rows':>9}  "
+              f"{'read/fit (s)':>12}  {'trees':>5}  {'holdout F1 base→new':>19}  status")
+        for i in range(1, args.days + 1):
+            day += timedelta(days=1)
+            n_reports += portfolio.step(day)
+
+            result = incremental_training.retrain_incremental(db, as_of=day, log=lambda *a: None)
+
+            t0 = time.perf_counter()
+            X, y = _all_rows(db, day)
+            t_read = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            _forest(args.max_trees).fit(X, y)
+            full = f"{t_read:.2f} / {time.perf_counter() - t0:.2f}"
+
+            if result['status'] == 'skipped':
+                print(f"{i:>3} {n_reports:>8,}  {'':>8}  {'':>12}  {len(y):>9,}  {full:>12}  "
+                      f"{'':>5}  {'':>19}  skipped: {result['reason']}")
+                continue
+            incr = f"{result['read_seconds']:.2f} / {result['fit_seconds']:.2f}"
+            f1 = f"{result['base_holdout_f1']:.3f} → {result['holdout_f1']:.3f}"
+            print(f"{i:>3} {n_reports:>8,}  {result['train_rows']:>8,}  {incr:>12}  {len(y):>9,}  "
+                  f"{full:>12}  {result['trees']:>5}  {f1:>19}  {result['status']}")
+    finally:
+        shutil.rmtree(models_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: intraday change-driven rescoring (scheduler/intraday_jobs.py)
+vs re-running the whole daily pipeline.
+
+Seeds mongomock with --projects portfolios and runs the daily pipeline
+once. Then, for --rounds intervals, --submits progress reports land on
+random tasks the way ProgressController.submit writes them (report,
+feature state, task progress, task_risk dirty flag), and rescore_changed
+runs with the watermarks (mongomock has no change streams). The rounds
+are seconds apart rather than minutes, so the watermark look-back is
+turned off; with it, each round would also re-score the previous one's
+projects.
+
+Each round checks that exactly the touched projects were re-scored and
+that their stored risk_score equals a fresh full scoring of the same
+data (daily_jobs.read_and_score), i.e. what the next 09:00 run would
+store.
+
+Run from the backend/ directory (needs ml/saved_models/risk_model.pkl):
+    python benchmarks/bench_intraday_rescore.py
+    python benchmarks/bench_intraday_rescore.py --projects 1000 --submits 50
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mongomock
+from flask import Flask
+
+from benchmarks._synthetic import seed_portfolio
+from models.progress_model import ProgressModel
+from models.task_model import TaskModel
+from models.task_risk_model import TaskRiskModel
+from models.task_feature_state_model import TaskFeatureStateModel
+from scheduler.daily_jobs import run_daily_risk_pipeline, read_and_score
+from scheduler.intraday_jobs import rescore_changed
+
+
+def _submit(db, task, rng):
+    """The writes ProgressController.submit makes for one report."""
+    progress_model, task_model = ProgressModel(db), TaskModel(db)
+    feature_state = TaskFeatureStateModel(db)
+    feature_state.get_or_rebuild([str(task['_id'])], progress_model)
+    pct = float(min(task.get('progress', 0) + rng.uniform(1, 15), 99))
+    progress_model.submit({'task_id': str(task['_id']), 'hours_worked': float(rng.uniform(1, 9)),
+                           'completion_percent': pct},
+                          task['assignee_id'], feature_state=feature_state)
+    task_model.update(str(task['_id']), {'progress': pct, 'status': 'in_progress'})
+    TaskRiskModel(db).mark_dirty([str(task['_id'])])
+    task['progress'] = pct
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--projects', type=int, default=300)
+    parser.add_argument('--tasks', type=int, default=8, help='tasks per project')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--submits', type=int, default=20, help='progress reports per interval')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    db  = app.db = mongomock.MongoClient().risksense
+    tasks = [t for ts in seed_portfolio(db, args.projects, args.tasks).values() for t in ts]
+    rng   = np.random.default_rng(0)
+
+    t0 = time.perf_counter()
+    run_daily_risk_pipeline(app)
+    t_full = time.perf_counter() - t0
+    rescore_changed(db, use_change_stream=False, overlap=timedelta(0))   # first run: sets the watermarks
+    print(f"{args.projects:,} projects × {args.tasks} tasks; full pipeline {t_full:.2f}s\n")
+
+    print(f"{'round':>5}  {'submits':>7}  {'changed':>7}  {'rescored':>8}  {'seconds':>7}  {'vs full':>7}")
+    for r in range(1, args.rounds + 1):
+        touched = [tasks[i] for i in rng.choice(len(tasks), args.submits, replace=False)]
+        for task in touched:
+            _submit(db, task, rng)
+        touched_projects = {t['project_id'] for t in touched}
+
+        t0 = time.perf_counter()
+        summary = rescore_changed(db, use_change_stream=False, overlap=timedelta(0))
+        elapsed = time.perf_counter() - t0
+        print(f"{r:>5}  {args.submits:>7}  {summary['projects']:>7}  {summary['rescored']:>8}  "
+              f"{elapsed:>7.2f}  {t_full / elapsed:>6.1f}x")
+
+        assert summary['rescored'] == len(touched_projects), summary
+        projects = [p for p in db.projects.find() if str(p['_id']) in touched_projects]
+        user_map = {str(u['_id']): u for u in db.users.find()}
+        _, _, fresh = read_and_score(db, projects, user_map)
+        for p in projects:
+            assert abs(p['risk_score'] - fresh[str(p['_id'])]['riskPercent']) < 1e-9, p['_id']
+    print("\n✓ only touched projects were re-scored; stored scores match a full scoring")
+
+
+if __name__ == '__main__':
+    main()
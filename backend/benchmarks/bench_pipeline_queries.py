@@ -0,0 +1,144 @@
+"""
+Benchmark: database round trips of the daily risk pipeline, batched
+(scheduler/daily_jobs.run_daily_risk_pipeline) vs the previous per-project
+loop (one task query, one risk_score update, one task_risk write and one
+insert per alert for every project).
+
+Seeds mongomock with --projects portfolios, wraps the database in a proxy
+that counts collection operations (index creation excluded) and runs both
+pipelines. The batched operation count must not depend on the number of
+projects; the script asserts it. mongomock round trips are free, so the
+modelled column adds --rtt-ms per operation to the measured time. mongomock
+also has no indexes and applies every upsert by scanning the collection,
+so its seconds grow quadratically with task_risk either way; the operation
+count is the figure that carries over to MongoDB.
+
+Run from the backend/ directory (needs ml/saved_models/risk_model.pkl):
+    python benchmarks/bench_pipeline_queries.py
+    python benchmarks/bench_pipeline_queries.py --projects 200 1000 --tasks 4 --rtt-ms 2
+"""
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mongomock
+from flask import Flask
+
+from benchmarks._synthetic import seed_portfolio
+from scheduler import daily_jobs
+
+_COUNTED = {
+    'find', 'find_one', 'aggregate', 'count_documents', 'distinct',
+    'insert_one', 'insert_many', 'update_one', 'update_many', 'replace_one',
+    'delete_one', 'delete_many', 'bulk_write', 'find_one_and_update',
+}
+
+
+class _CountingCollection:
+    def __init__(self, collection, counter):
+        self._collection, self._counter = collection, counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name in _COUNTED:
+            def counted(*args, **kwargs):
+                self._counter[f'{self._collection.name}.{name}'] += 1
+                return attr(*args, **kwargs)
+            return counted
+        return attr
+
+
+class CountingDatabase:
+    """db proxy counting one operation per collection call (a find counts once)."""
+
+    def __init__(self, db):
+        self._db     = db
+        self.counter = Counter()
+
+    def __getitem__(self, name):
+        return _CountingCollection(self._db[name], self.counter)
+
+    __getattr__ = __getitem__
+
+
+def _legacy_pipeline(app):
+    """The per-project write loop this replaced (reads as before, N+1 writes)."""
+    from models.project_model import ProjectModel
+    from models.task_model import TaskModel
+    from models.progress_model import ProgressModel
+    from models.user_model import UserModel
+    from models.alert_model import AlertModel
+    from models.task_risk_model import TaskRiskModel
+
+    db = app.db
+    project_model, task_model  = ProjectModel(db), TaskModel(db)
+    progress_model, user_model = ProgressModel(db), UserModel(db)
+    alert_model, task_risk_model = AlertModel(db), TaskRiskModel(db)
+
+    projects = project_model.get_in_progress()
+    user_map = {str(u['_id']): u for u in user_model.get_all()}
+    tasks_by_project = {str(p['_id']): task_model.get_by_project(str(p['_id'])) for p in projects}
+    all_tasks = [t for tasks in tasks_by_project.values() for t in tasks]
+    seen_seqs = daily_jobs._dirty_seqs(task_risk_model, all_tasks)
+    progress_map = progress_model.aggregate_task_stats([str(t['_id']) for t in all_tasks])
+    risk_results = daily_jobs._score_portfolio(projects, tasks_by_project, progress_map, user_map)
+
+    for project in projects:
+        pid = str(project['_id'])
+        risk_result = risk_results.get(pid)
+        if risk_result is None:
+            continue
+        risk_score = risk_result['riskPercent']
+        project_model.update_risk_score(pid, risk_score, 'at_risk' if risk_score >= 60 else 'in_progress')
+        daily_jobs._store_task_results(task_risk_model, [(tasks_by_project[pid], risk_result)],
+                                       user_map, seen_seqs)
+        for alert in daily_jobs._project_alerts(project, risk_result):
+            alert_model.create(**alert)
+
+
+def _run(pipeline, n_projects, tasks_per_project):
+    app = Flask(__name__)
+    raw = mongomock.MongoClient().risksense
+    seed_portfolio(raw, n_projects, tasks_per_project)
+    app.db = CountingDatabase(raw)
+    t0 = time.perf_counter()
+    with app.app_context():
+        pipeline(app)
+    elapsed = time.perf_counter() - t0
+    # Every project scored, every alert written
+    assert raw.projects.count_documents({'updated_at': {'$exists': True}}) == n_projects
+    return app.db.counter, elapsed, raw.alerts.count_documents({})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--projects', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--tasks', type=int, default=2, help='tasks per project')
+    parser.add_argument('--rtt-ms', type=float, default=1.0, help='modelled round-trip time per operation')
+    args = parser.parse_args()
+
+    pipelines = [('per-project', _legacy_pipeline), ('batched', daily_jobs.run_daily_risk_pipeline)]
+    print(f"{'projects':>8}  {'pipeline':<11}  {'ops':>6}  {'alerts':>6}  {'seconds':>7}  "
+          f"{'modelled s':>10}")
+    batched_ops = {}
+    for n in args.projects:
+        for name, pipeline in pipelines:
+            counter, elapsed, n_alerts = _run(pipeline, n, args.tasks)
+            ops = sum(counter.values())
+            modelled = elapsed + ops * args.rtt_ms / 1e3
+            print(f"{n:>8,}  {name:<11}  {ops:>6,}  {n_alerts:>6,}  {elapsed:>7.2f}  {modelled:>10.2f}")
+            if name == 'batched':
+                batched_ops[n] = counter
+
+    print("\nbatched operations:", dict(sorted(batched_ops[args.projects[-1]].items())))
+    counts = {n: sum(c.values()) for n, c in batched_ops.items()}
+    assert len(set(counts.values())) == 1, f"batched pipeline ops grow with projects: {counts}"
+    print(f"✓ batched pipeline issues {counts[args.projects[-1]]} operations regardless of portfolio size")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: daily pipeline runtime against portfolio size, as recorded in
+pipeline_runs (scheduler/pipeline_telemetry.py) and served by
+GET /api/pipeline/runs.
+
+For each --projects size a fresh mongomock database is seeded and the
+pipeline run once; the table is read back from the recorded run documents
+(the fields the endpoint returns): stage timings, throughput, peak memory.
+The last line fits runtime ~ projects^k on a log-log scale — k near 1 is
+linear growth. mongomock applies upserts by scanning, so write_back grows
+faster here than it does on MongoDB.
+
+Run from the backend/ directory (needs ml/saved_models/risk_model.pkl):
+    python benchmarks/bench_pipeline_telemetry.py
+    python benchmarks/bench_pipeline_telemetry.py --projects 100 400 1600 --tasks 4
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mongomock
+from flask import Flask
+
+from benchmarks._synthetic import seed_portfolio
+from models.pipeline_run_model import PipelineRunModel
+from scheduler.daily_jobs import run_daily_risk_pipeline
+from scheduler.pipeline_telemetry import STAGES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--projects', type=int, nargs='+', default=[50, 100, 200, 400])
+    parser.add_argument('--tasks', type=int, default=4, help='tasks per project')
+    args = parser.parse_args()
+
+    # Load the model once so the first size does not carry it
+    warm = Flask(__name__)
+    warm.db = mongomock.MongoClient().risksense
+    seed_portfolio(warm.db, 1, args.tasks)
+    run_daily_risk_pipeline(warm)
+
+    runs = []
+    for n in args.projects:
+        app = Flask(__name__)
+        db  = app.db = mongomock.MongoClient().risksense
+        seed_portfolio(db, n, args.tasks)
+        run_daily_risk_pipeline(app)
+        run = PipelineRunModel.serialize(PipelineRunModel(db).get_recent(limit=1)[0])
+        assert run['status'] == 'success' and run['projects'] == n, run
+        runs.append(run)
+
+    print(f"{'projects':>8}  {'tasks':>6}  {'seconds':>7}  "
+          + '  '.join(f'{s:>10}' for s in STAGES) + f"  {'proj/s':>7}  {'peak MB':>7}")
+    for run in runs:
+        print(f"{run['projects']:>8,}  {run['tasks']:>6,}  {run['duration_seconds']:>7.2f}  "
+              + '  '.join(f"{run['stages'][s]:>10.3f}" for s in STAGES)
+              + f"  {run['throughput']['projects_per_second']:>7.1f}  {run['peak_rss_mb'] or 0:>7.1f}")
+
+    if len(runs) > 1:
+        k = np.polyfit(np.log([r['projects'] for r in runs]), np.log([r['duration_seconds'] for r in runs]), 1)[0]
+        print(f"\nruntime ~ projects^{k:.2f}")
+
+
+if __name__ == '__main__':
+    main()
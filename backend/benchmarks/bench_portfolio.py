@@ -0,0 +1,60 @@
+"""
+Benchmark: predict_portfolio_risk vs one predict_project_risk call per project.
+
+Run from the backend/ directory (needs ml/saved_models/risk_model.pkl):
+    python benchmarks/bench_portfolio.py
+    python benchmarks/bench_portfolio.py --projects 500 --tasks 12
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks._synthetic import make_users, make_project, make_tasks, make_progress
+from ml.predict import predict_project_risk, predict_portfolio_risk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--projects', type=int, default=300)
+    parser.add_argument('--tasks', type=int, default=8, help='tasks per project')
+    args = parser.parse_args()
+
+    users = make_users()
+    user_map = {str(u['_id']): u for u in users}
+    projects = [make_project(f'Project {i}') for i in range(args.projects)]
+    tasks_by_project = {}
+    progress_map = {}
+    for i, project in enumerate(projects):
+        tasks = make_tasks(project, users, args.tasks, seed=i)
+        tasks_by_project[str(project['_id'])] = tasks
+        progress_map.update(make_progress(tasks, seed=i))
+
+    # Warm the model cache so neither side pays the unpickle
+    predict_project_risk(projects[0], tasks_by_project[str(projects[0]['_id'])], progress_map, user_map,
+                         use_cache=False)
+
+    t0 = time.perf_counter()
+    per_project = {
+        str(p['_id']): predict_project_risk(p, tasks_by_project[str(p['_id'])], progress_map, user_map,
+                                            use_cache=False)
+        for p in projects
+    }
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batched = predict_portfolio_risk(projects, tasks_by_project, progress_map, user_map)
+    t_batch = time.perf_counter() - t0
+
+    assert batched == per_project, "portfolio results differ from per-project results"
+
+    n_tasks = args.projects * args.tasks
+    print(f"projects={args.projects} tasks={n_tasks}")
+    print(f"  per-project loop : {t_loop:8.3f}s")
+    print(f"  portfolio batch  : {t_batch:8.3f}s  ({t_loop / t_batch:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
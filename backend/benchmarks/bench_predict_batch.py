@@ -0,0 +1,75 @@
+"""
+Benchmark: batched predict_project_risk vs the old per-task predict loop.
+
+The old path called clf.predict and clf.predict_proba on a 1x9 array for
+every task; the batched path stacks the project into one matrix and calls
+predict_proba once.
+
+Run from the backend/ directory (needs ml/saved_models/risk_model.pkl):
+    python benchmarks/bench_predict_batch.py
+    python benchmarks/bench_predict_batch.py --sizes 10 50 300 --repeat 3
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks._synthetic import make_users, make_project, make_tasks, make_progress
+from ml.predict import _load_model, _task_features, predict_project_risk
+from ml.preprocess import build_feature_vector
+
+
+def per_row_labels(clf, tasks, progress_map, user_map):
+    """The pre-batching inference loop: two forest traversals per task."""
+    labels = {}
+    for task in tasks:
+        _, feats, _ = _task_features(task, progress_map, user_map)
+        vector = build_feature_vector(feats).reshape(1, -1)
+        labels[str(task['_id'])] = clf.predict(vector)[0]
+        clf.predict_proba(vector)
+    return labels
+
+
+def _best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 50, 100, 300])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    bundle = _load_model()
+    clf, label_map = bundle['model'], bundle['label_map']
+    users = make_users()
+    user_map = {str(u['_id']): u for u in users}
+    project = make_project()
+
+    print(f"{'tasks':>6}  {'per-row (s)':>12}  {'batched (s)':>12}  {'speedup':>8}")
+    for n in args.sizes:
+        tasks = make_tasks(project, users, n, seed=n)
+        progress_map = make_progress(tasks, seed=n)
+
+        batched = predict_project_risk(project, tasks, progress_map, user_map, use_cache=False)
+        expected = {tid: label_map[label] for tid, label in
+                    per_row_labels(clf, tasks, progress_map, user_map).items()}
+        got = {t['_id']: t['riskLevel'] for t in batched['tasks']}
+        assert got == expected, "batched labels differ from per-row labels"
+
+        t_row = _best_of(lambda: per_row_labels(clf, tasks, progress_map, user_map), args.repeat)
+        t_batch = _best_of(
+            lambda: predict_project_risk(project, tasks, progress_map, user_map, use_cache=False), args.repeat
+        )
+        print(f"{n:>6}  {t_row:>12.4f}  {t_batch:>12.4f}  {t_row / t_batch:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
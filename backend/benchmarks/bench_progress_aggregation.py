@@ -0,0 +1,96 @@
+"""
+Benchmark: ProgressModel.aggregate_task_stats vs one get_history_by_task per task.
+
+Loads synthetic daily_progress into a database, then for each task count
+compares the per-task find loop (reduced in Python, as the callers used to)
+with the single $match/$sort/$group aggregation, checking both give the
+same count, first/last completion_percent and mean hours for every task.
+
+Uses mongomock by default; pass --mongo-uri to run against a real mongod
+(a throwaway database named in the URI is dropped before and after).
+
+Run from the backend/ directory:
+    python benchmarks/bench_progress_aggregation.py
+    python benchmarks/bench_progress_aggregation.py --tasks 100 1000 \\
+        --mongo-uri mongodb://localhost:27017/risksense_bench
+"""
+import os
+import sys
+import math
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks._synthetic import make_users, make_project, make_tasks, make_progress
+from models.progress_model import ProgressModel
+from models.task_feature_state_model import TaskFeatureStateModel
+
+
+def _database(uri):
+    if uri:
+        from pymongo import MongoClient
+        client = MongoClient(uri)
+        db = client.get_default_database()
+        client.drop_database(db.name)
+        return db, lambda: client.drop_database(db.name)
+    import mongomock
+    return mongomock.MongoClient().db, lambda: None
+
+
+def per_task_loop(prm, task_ids):
+    stats = {}
+    for tid in task_ids:
+        state = TaskFeatureStateModel.from_history(tid, prm.get_history_by_task(tid))
+        if state is not None:
+            stats[tid] = state
+    return stats
+
+
+def check_same(loop, aggregated):
+    assert loop.keys() == aggregated.keys(), "different task sets"
+    for tid, ref in loop.items():
+        got = aggregated[tid]
+        for key in ('count', 'first_completion_percent', 'last_completion_percent',
+                    'first_report_date', 'last_report_date'):
+            assert ref[key] == got[key], f"{tid}.{key}: {ref[key]!r} != {got[key]!r}"
+        assert math.isclose(ref['sum_hours'] / ref['count'], got['avg_hours'], rel_tol=1e-12), tid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tasks', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--reports-per-task', type=int, default=10, help='mean reports per task')
+    parser.add_argument('--mongo-uri', help='real MongoDB to use instead of mongomock')
+    args = parser.parse_args()
+
+    print(f"backend: {'mongod' if args.mongo_uri else 'mongomock'}")
+    print(f"{'tasks':>7} {'reports':>8}  {'per-task loop (s)':>17}  {'aggregation (s)':>15}  {'speedup':>7}")
+    for n_tasks in args.tasks:
+        db, cleanup = _database(args.mongo_uri)
+        try:
+            prm = ProgressModel(db)
+            tasks = make_tasks(make_project(), make_users(), n_tasks, seed=n_tasks)
+            docs = [d for history in make_progress(tasks, args.reports_per_task, seed=n_tasks).values()
+                    for d in history]
+            if docs:
+                db['daily_progress'].insert_many(docs)
+            task_ids = [str(t['_id']) for t in tasks]
+
+            t0 = time.perf_counter()
+            loop = per_task_loop(prm, task_ids)
+            t_loop = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            aggregated = prm.aggregate_task_stats(task_ids)
+            t_agg = time.perf_counter() - t0
+
+            check_same(loop, aggregated)
+            print(f"{n_tasks:>7,} {len(docs):>8,}  {t_loop:>17.3f}  {t_agg:>15.3f}  "
+                  f"{t_loop / t_agg:>6.1f}x  ✓ same stats")
+        finally:
+            cleanup()
+
+
+if __name__ == '__main__':
+    main()
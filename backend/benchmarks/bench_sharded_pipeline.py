@@ -0,0 +1,121 @@
+"""
+Benchmark: serial vs sharded (scheduler/sharded_pipeline.py) read-and-score
+stage of the daily risk pipeline, by worker count.
+
+Seeds mongomock with --projects portfolios and snapshots it to a temp file;
+each worker process loads the snapshot into its own mongomock client (the
+stand-in for its own MongoDB connection). The risk model is republished to
+a temp registry with its arrays artifact, so workers memory-map it.
+--bad-projects projects get a task whose progress is not a number; they
+must be the only ones left unscored, and every other project must get the
+serial path's score.
+
+Wall time includes starting the pool (spawn), which is paid once per run.
+Speedup is bounded by the cores available; the header prints how many.
+
+Run from the backend/ directory (needs ml/saved_models/risk_model.pkl):
+    python benchmarks/bench_sharded_pipeline.py
+    python benchmarks/bench_sharded_pipeline.py --projects 2000 --workers 1 2 4 8
+"""
+import os
+import sys
+import time
+import pickle
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks._synthetic import seed_portfolio
+
+COLLECTIONS = ('users', 'projects', 'tasks', 'daily_progress')
+
+
+class SnapshotDatabase:
+    """Picklable db_factory: a mongomock database loaded from a snapshot file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self):
+        import mongomock
+        db = mongomock.MongoClient().risksense
+        with open(self.path, 'rb') as fh:
+            for name, docs in pickle.load(fh).items():
+                if docs:
+                    db[name].insert_many(docs)
+        return db
+
+
+def _point_registry(models_dir):
+    from ml.model_registry import registry
+    registry.models_dir    = models_dir
+    registry.manifest_path = os.path.join(models_dir, 'manifest.json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--projects', type=int, default=400)
+    parser.add_argument('--tasks', type=int, default=8, help='tasks per project')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--shards-per-worker', type=int, default=4)
+    parser.add_argument('--bad-projects', type=int, default=3)
+    args = parser.parse_args()
+
+    import joblib
+    import logging
+    import mongomock
+    from ml.compiled_forest import CompiledForest
+    from ml.model_registry import ModelRegistry, LEGACY_PATHS
+    from ml.predict import set_inference_engine
+    from scheduler.daily_jobs import read_and_score
+    from scheduler.sharded_pipeline import score_sharded
+
+    logging.basicConfig(level=logging.WARNING)
+    tmp = tempfile.mkdtemp(prefix='risk-shards-')
+    try:
+        models_dir = os.path.join(tmp, 'models')
+        bundle = joblib.load(LEGACY_PATHS['risk'])
+        ModelRegistry(models_dir).publish('risk', bundle, version='bench', arrays={
+            'arrays': CompiledForest.from_sklearn(bundle['model']).to_arrays(),
+            'label_map': bundle['label_map']})
+        _point_registry(models_dir)
+        set_inference_engine('compiled')
+
+        db     = mongomock.MongoClient().risksense
+        seeded = seed_portfolio(db, args.projects, args.tasks, bad_projects=args.bad_projects)
+        bad    = set(list(seeded)[:args.bad_projects])
+        snapshot = os.path.join(tmp, 'snapshot.pkl')
+        with open(snapshot, 'wb') as fh:
+            pickle.dump({name: list(db[name].find()) for name in COLLECTIONS}, fh)
+
+        projects = list(db.projects.find())
+        user_map = {str(u['_id']): u for u in db.users.find()}
+        t0 = time.perf_counter()
+        _, _, serial = read_and_score(db, projects, user_map)
+        t_serial = time.perf_counter() - t0
+        assert set(serial) == {str(p['_id']) for p in projects} - bad, "serial path scored a bad project"
+
+        print(f"{args.projects:,} projects × {args.tasks} tasks, {len(bad)} bad; "
+              f"{os.cpu_count()} CPUs available\n")
+        print(f"{'workers':>7}  {'shards':>6}  {'wall s':>6}  {'in shards s':>11}  {'speedup':>7}  {'unscored':>8}")
+        print(f"{'serial':>7}  {'':>6}  {t_serial:>6.2f}  {t_serial:>11.2f}  {1:>6.2f}x  {len(bad):>8}")
+        for workers in args.workers:
+            stats = {}
+            _, _, sharded = score_sharded(projects, workers, SnapshotDatabase(snapshot),
+                                          shards_per_worker=args.shards_per_worker,
+                                          models_dir=models_dir, stats=stats)
+            assert set(stats['unscored']) == bad and not stats['failed_shards'], stats
+            assert {pid: r['riskPercent'] for pid, r in sharded.items()} == \
+                   {pid: r['riskPercent'] for pid, r in serial.items()}, "sharded scores differ"
+            print(f"{workers:>7}  {stats['shards']:>6}  {stats['wall_seconds']:>6.2f}  "
+                  f"{stats['shard_seconds']:>11.2f}  {t_serial / stats['wall_seconds']:>6.2f}x  "
+                  f"{len(stats['unscored']):>8}")
+        print("\n✓ sharded scores match the serial path; only the bad projects were skipped")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
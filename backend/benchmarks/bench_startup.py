@@ -0,0 +1,176 @@
+"""
+Benchmark: backend startup time, and a guard against slow-startup regressions.
+
+Starts the app in fresh interpreters and reports:
+  - import time per module of `import app` + create_app() (python -X importtime),
+    sorted by cumulative time
+  - time from process spawn to the first 200 from GET /api/health over HTTP
+
+Fails (exit 1) when
+  - any module in HEAVY_MODULES is imported during startup — NumPy, sklearn,
+    joblib, pandas and ReportLab must load on first use, not at boot
+  - --max-health-ms is set and the median time to first health response exceeds it
+  - --baseline FILE is given and the median is more than --tolerance slower
+
+Run from the backend/ directory (no MongoDB needed; the client connects lazily):
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 5 --save-baseline startup.json
+    python benchmarks/bench_startup.py --baseline startup.json --tolerance 0.25
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('numpy', 'pandas', 'scipy', 'sklearn', 'joblib', 'reportlab')
+
+_IMPORT_PROBE = """
+import sys
+import app
+app.create_app()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print('HEAVY=' + ','.join(heavy))
+"""
+
+_SERVE = """
+import app
+from werkzeug.serving import make_server
+make_server('127.0.0.1', {port}, app.create_app()).serve_forever()
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    # A bogus URI is fine: pymongo connects in the background on first use
+    env.setdefault('MONGO_URI', 'mongodb://127.0.0.1:27017/risksense_startup_bench')
+    env['MODEL_WATCH_INTERVAL_SECONDS'] = '0'
+    env['MODEL_PREWARM'] = '0'
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def parse_importtime(stderr):
+    """
+    ({module: (self_us, cumulative_us)}, total_us) from python -X importtime
+    output; total_us sums the top-level (unindented) imports.
+    """
+    times = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):
+            total += int(cumulative_us)
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times, total
+
+
+def measure_imports():
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _IMPORT_PROBE.format(heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True,
+    )
+    heavy_line = next(l for l in proc.stdout.splitlines() if l.startswith('HEAVY='))
+    heavy = [m for m in heavy_line[len('HEAVY='):].split(',') if m]
+    times, total = parse_importtime(proc.stderr)
+    return times, total, heavy
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def measure_first_health(timeout=60.0):
+    """Seconds from spawning the server process to its first 200 on /api/health."""
+    port = _free_port()
+    url  = f'http://127.0.0.1:{port}/api/health'
+    t0   = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-c', _SERVE.format(port=port)], cwd=BACKEND_DIR, env=_env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - t0 < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - t0
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError(f"no response from {url} within {timeout}s")
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def _median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=20, help='modules to list by cumulative import time')
+    parser.add_argument('--max-health-ms', type=float, help='fail if median time to first health exceeds this')
+    parser.add_argument('--baseline', help='JSON written by --save-baseline to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown vs baseline (fraction)')
+    parser.add_argument('--save-baseline', help='write this run\'s medians to a JSON file')
+    args = parser.parse_args()
+
+    failures = []
+
+    runs = [measure_imports() for _ in range(args.repeat)]
+    heavy = sorted({m for _, _, h in runs for m in h})
+    cumulative = {name: _median([t[name][1] for t, _, _ in runs if name in t]) for name in runs[0][0]}
+    total_import_ms = _median([total for _, total, _ in runs]) / 1e3
+
+    print(f"Import time of `app` + create_app() (median of {args.repeat}): {total_import_ms:.1f} ms")
+    print(f"  {'cumulative (ms)':>15}  module")
+    for name, us in sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {us / 1e3:>15.1f}  {name}")
+
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    else:
+        print(f"  ✓ none of {', '.join(HEAVY_MODULES)} imported at startup")
+
+    health_ms = _median([measure_first_health() for _ in range(args.repeat)]) * 1e3
+    print(f"\nTime to first /api/health 200 (median of {args.repeat}): {health_ms:.1f} ms")
+
+    if args.max_health_ms is not None and health_ms > args.max_health_ms:
+        failures.append(f"first health response took {health_ms:.1f} ms > {args.max_health_ms} ms")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            base = json.load(fh)
+        for key, value in (('import_ms', total_import_ms), ('health_ms', health_ms)):
+            limit = base[key] * (1 + args.tolerance)
+            status = 'ok' if value <= limit else 'REGRESSION'
+            print(f"  {key:<10} {value:8.1f} ms vs baseline {base[key]:8.1f} ms (limit {limit:.1f})  {status}")
+            if value > limit:
+                failures.append(f"{key} regressed: {value:.1f} ms > {limit:.1f} ms")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as fh:
+            json.dump({'import_ms': total_import_ms, 'health_ms': health_ms}, fh, indent=2)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if failures:
+        for f in failures:
+            print(f"✗ {f}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
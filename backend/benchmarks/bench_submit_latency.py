@@ -0,0 +1,140 @@
+"""
+Benchmark: POST /api/progress/submit latency with two-pass vs single-pass
+anomaly scoring.
+
+  two-pass      the previous check_progress_report: iso.predict(X) followed
+                by iso.score_samples(X), i.e. every tree traversed twice
+  single-pass   score_samples once, label from offset_ (sklearn model)
+  compiled      single pass through CompiledIsolationForest
+  async         ASYNC_ANOMALY_SCORING: the request stores the report and
+                queues it; scoring runs on the AnomalyScoringPool
+
+The app runs against mongomock, so the numbers are the request's CPU cost
+without network round trips to MongoDB. Also reports the scoring call on
+its own, which is what differs between the variants.
+
+Run from the backend/ directory (needs a trained anomaly model):
+    python benchmarks/bench_submit_latency.py
+    python benchmarks/bench_submit_latency.py --requests 500
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['MODEL_WATCH_INTERVAL_SECONDS'] = '0'
+os.environ.setdefault('MONGO_URI', 'mongodb://127.0.0.1:27017/risksense_submit_bench')
+
+import mongomock
+from flask_jwt_extended import create_access_token
+
+import ml.anomaly_detection as anomaly_detection
+from app import create_app
+from ml.anomaly_queue import AnomalyScoringPool
+from benchmarks._synthetic import make_users, make_project, make_tasks, make_progress
+from ml.preprocess import build_anomaly_features
+
+_single_pass = anomaly_detection.check_progress_report
+
+
+def two_pass_check(report, prev_completion_percent=0.0):
+    """check_progress_report as it was: predict, then score_samples."""
+    iso = anomaly_detection._load_anomaly_model()
+    features = build_anomaly_features({**report, 'prev_completion_percent': prev_completion_percent})
+    prediction = iso.predict(features)[0]
+    score      = float(iso.score_samples(features)[0])
+    is_anomaly = bool(prediction == -1)   # the original returned np.bool_, which pymongo rejects
+    reason = anomaly_detection._anomaly_reason(report, prev_completion_percent) if is_anomaly else None
+    return {'is_anomaly': is_anomaly, 'anomaly_score': round(score, 4), 'reason': reason}
+
+
+VARIANTS = {
+    'two-pass':    ('sklearn', two_pass_check, False),
+    'single-pass': ('sklearn', _single_pass, False),
+    'compiled':    ('compiled', _single_pass, False),
+    'async':       ('sklearn', _single_pass, True),
+}
+
+
+def _setup():
+    app = create_app()
+    app.scheduler.shutdown(wait=False)
+    app.db = mongomock.MongoClient().risksense
+    users = make_users()
+    app.db.users.insert_many(users)
+    project = make_project()
+    app.db.projects.insert_one(project)
+    tasks = make_tasks(project, users, 50)
+    app.db.tasks.insert_many(tasks)
+    docs = [d for history in make_progress(tasks).values() for d in history]
+    app.db.daily_progress.insert_many(docs)
+    with app.app_context():
+        token = create_access_token(identity=json.dumps({'id': str(users[0]['_id']), 'role': 'employee'}))
+    return app, tasks, {'Authorization': f'Bearer {token}'}
+
+
+def _percentiles(times):
+    return np.percentile(times, 50) * 1e3, np.percentile(times, 99) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    app, tasks, headers = _setup()
+    client = app.test_client()
+    rng = np.random.default_rng(0)
+    payloads = [
+        {'task_id': str(tasks[i % len(tasks)]['_id']), 'project_id': tasks[0]['project_id'],
+         'hours_worked': float(rng.uniform(0.5, 14)), 'completion_percent': float(rng.uniform(0, 100))}
+        for i in range(args.requests)
+    ]
+
+    print(f"{'variant':<12} {'submit p50/p99 (ms)':>21}  {'scoring p50/p99 (ms)':>22}")
+    for name, (engine, check, use_pool) in VARIANTS.items():
+        anomaly_detection.ANOMALY_INFERENCE_ENGINE = engine
+        anomaly_detection.check_progress_report = check
+        app.anomaly_pool = AnomalyScoringPool(app.db, max_queue=len(payloads) + 1) if use_pool else None
+
+        client.post('/api/progress/submit', json=payloads[0], headers=headers)   # load + warm
+        submit_times = []
+        for payload in payloads:
+            t0 = time.perf_counter()
+            resp = client.post('/api/progress/submit', json=payload, headers=headers)
+            submit_times.append(time.perf_counter() - t0)
+            assert resp.status_code == 201, resp.get_json()
+        if app.anomaly_pool is not None:
+            t0 = time.perf_counter()
+            app.anomaly_pool.shutdown()
+            drain = time.perf_counter() - t0
+            assert app.db.daily_progress.count_documents({'anomaly_pending': True}) == 0
+
+        score_times = []
+        for payload in payloads:
+            t0 = time.perf_counter()
+            check(payload, 20.0)
+            score_times.append(time.perf_counter() - t0)
+
+        s50, s99 = _percentiles(submit_times)
+        c50, c99 = _percentiles(score_times)
+        print(f"{name:<12} {s50:>9.2f} / {s99:<9.2f}  {c50:>10.3f} / {c99:<9.3f}")
+    print(f"(async: queue drained {drain:.2f}s after the last request)")
+
+    # Same labels and scores from every variant
+    anomaly_detection.ANOMALY_INFERENCE_ENGINE = 'sklearn'
+    reference = [two_pass_check(p, 20.0) for p in payloads]
+    for engine in ('sklearn', 'compiled'):
+        anomaly_detection.ANOMALY_INFERENCE_ENGINE = engine
+        assert [_single_pass(p, 20.0) for p in payloads] == reference, f"{engine} results differ"
+    print(f"\n✓ identical is_anomaly/score/reason for all {len(payloads)} reports "
+          f"({sum(r['is_anomaly'] for r in reference)} flagged)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Benchmark: training-data export (ml/training_data.py) and bounded-memory
+training on a memory-mapped dataset.
+
+export  Seeds mongomock with synthetic history, exports it, and checks every
+        row against the scalar path: build_task_features on the task as of
+        the report date with the feature state of the reports up to it.
+        Reports export throughput and peak traced memory per chunk size,
+        next to the peak of merely iterating the same sorted cursor:
+        mongomock sorts in memory (a server streams from the index), so
+        the export's own share is the difference, and it tracks the chunk,
+        not the collection.
+
+train   Writes a --rows-row dataset in the export layout (synthetic rows,
+        written chunk by chunk) and trains on it in a subprocess with
+        --max-rows, reporting the subprocess's peak RSS and its anonymous
+        (heap) RSS after fitting. Peak RSS also counts the mapped column
+        pages the sample touched, which are clean page cache the kernel
+        can drop; the heap is what grows with --max-rows.
+
+Run from the backend/ directory:
+    python benchmarks/bench_training_data.py export
+    python benchmarks/bench_training_data.py train --rows 10000000 --max-rows 1000000
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks._synthetic import make_users, make_project, make_tasks, make_progress
+from ml.preprocess import FEATURE_COLUMNS, build_task_features, build_feature_vector
+from ml.training_data import export_dataset, load_dataset, _COLUMNS, _REPORT_PROJECTION, LABEL_MAP
+from models.task_feature_state_model import TaskFeatureStateModel
+
+
+def _seed(db, n_tasks, reports_per_task, seed=0):
+    users   = make_users(seed=seed)
+    project = make_project()
+    tasks   = make_tasks(project, users, n_tasks, seed=seed)
+    history = make_progress(tasks, reports_per_task=reports_per_task, seed=seed)
+    db.users.insert_many(users)
+    db.tasks.insert_many(tasks)
+    docs = [d for h in history.values() for d in h]
+    for i in range(0, len(docs), 50_000):
+        db.daily_progress.insert_many(docs[i:i + 50_000])
+    return users, tasks, history, len(docs)
+
+
+def _check_rows(path, users, tasks, history, as_of):
+    """Recompute every exported row with the scalar feature path."""
+    _, columns = load_dataset(path)
+    trust = {str(u['_id']): u['trust_score'] for u in users}
+    by_id = {str(t['_id']): t for t in tasks}
+
+    # Exported rows are keyed by (task sequence number, report date)
+    expected = {}
+    task_ids = sorted(tid for tid, docs in history.items() if docs)
+    for group, tid in enumerate(task_ids):
+        docs, task = history[tid], by_id[tid]
+        for j, doc in enumerate(docs):
+            as_of_report = date.fromisoformat(doc['date'])
+            state = TaskFeatureStateModel.from_history(tid, docs[:j + 1])
+            feats = build_task_features({**task, 'progress': doc['completion_percent']}, state,
+                                        trust[task['assignee_id']], as_of_report)
+            expected[(group, as_of_report.toordinal())] = build_feature_vector(feats)
+
+    got  = np.column_stack([columns[c] for c in FEATURE_COLUMNS])
+    want = np.vstack([expected[(int(g), int(d))] for g, d in zip(columns['group'], columns['date'])])
+    np.testing.assert_allclose(got, want.astype(np.float32), rtol=1e-6, atol=1e-6)
+    return len(got)
+
+
+def bench_export(args):
+    import mongomock
+
+    as_of = date.today()
+    print(f"{'reports':>9} {'chunk':>7}  {'rows':>8}  {'seconds':>7}  {'reports/s':>9}  "
+          f"{'peak MB':>7}  {'cursor MB':>9}")
+    for n_tasks in args.tasks:
+        db = mongomock.MongoClient().risksense
+        users, tasks, history, n_reports = _seed(db, n_tasks, args.reports_per_task)
+
+        tracemalloc.start()
+        for _ in db.daily_progress.find({}, _REPORT_PROJECTION).sort([('task_id', 1), ('date', 1), ('_id', 1)]):
+            pass
+        cursor_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        for chunk_rows in args.chunk_rows:
+            out = tempfile.mkdtemp(prefix='risk-dataset-')
+            try:
+                tracemalloc.start()
+                t0 = time.perf_counter()
+                meta = export_dataset(db, out, chunk_rows=chunk_rows, as_of=as_of, log=lambda *a: None)
+                elapsed = time.perf_counter() - t0
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                if args.check:
+                    _check_rows(out, users, tasks, history, as_of)
+            finally:
+                shutil.rmtree(out)
+            print(f"{n_reports:>9,} {chunk_rows:>7,}  {meta['rows']:>8,}  {elapsed:>7.2f}  "
+                  f"{n_reports / elapsed:>9,.0f}  {peak / 2**20:>7.1f}  {cursor_peak / 2**20:>9.1f}")
+    if args.check:
+        print("\n✓ exported rows match build_task_features at each report date")
+
+
+def _write_synthetic_dataset(path, n_rows, chunk=1_000_000):
+    """A dataset in export_dataset's layout, filled with synthetic labelled rows."""
+    from ml.train_model import _generate_risk_training_data
+
+    os.makedirs(path, exist_ok=True)
+    files = {name: open(os.path.join(path, f'{name}.{ext}'), 'wb') for name, _, ext in _COLUMNS}
+    counts = np.zeros(len(LABEL_MAP), dtype=np.int64)
+    written = 0
+    while written < n_rows:
+        n = min(chunk, n_rows - written)
+        X, y = _generate_risk_training_data(n=n, seed=written)
+        for j, name in enumerate(FEATURE_COLUMNS):
+            X[:, j].astype(np.float32).tofile(files[name])
+        y.astype(np.int8).tofile(files['label'])
+        (np.arange(written, written + n) // 10).astype(np.int32).tofile(files['group'])
+        np.zeros(n, dtype=np.int32).tofile(files['date'])
+        counts += np.bincount(y, minlength=len(LABEL_MAP))
+        written += n
+    for fh in files.values():
+        fh.close()
+    meta = {
+        'rows': n_rows,
+        'feature_columns': FEATURE_COLUMNS,
+        'columns': {name: {'dtype': dtype, 'file': f'{name}.{ext}'} for name, dtype, ext in _COLUMNS},
+        'label_map': {str(k): v for k, v in LABEL_MAP.items()},
+        'class_counts': {LABEL_MAP[i]: int(c) for i, c in enumerate(counts)},
+    }
+    with open(os.path.join(path, 'dataset.json'), 'w') as fh:
+        json.dump(meta, fh)
+
+
+_TRAIN_CHILD = """
+import resource, sys, time
+sys.path.insert(0, {backend!r})
+from ml.train_model import _load_risk_dataset, _group_split
+from sklearn.ensemble import RandomForestClassifier
+t0 = time.perf_counter()
+X, y, groups = _load_risk_dataset({path!r}, {max_rows})
+X_train, X_test, y_train, y_test, _, _ = _group_split(X, y, groups, test_size=0.2)
+clf = RandomForestClassifier(n_estimators={trees}, max_depth=12, min_samples_split=5,
+                             class_weight='balanced', random_state=42, n_jobs=-1).fit(X_train, y_train)
+anon = next(int(l.split()[1]) for l in open('/proc/self/status') if l.startswith('RssAnon'))
+print(f"RESULT {{time.perf_counter() - t0:.1f}} {{clf.score(X_test, y_test):.4f}} "
+      f"{{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}} {{anon / 1024:.0f}}")
+"""
+
+
+def bench_train(args):
+    path = tempfile.mkdtemp(prefix='risk-dataset-')
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        t0 = time.perf_counter()
+        _write_synthetic_dataset(path, args.rows)
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        print(f"dataset: {args.rows:,} rows, {size / 2**20:,.0f} MB on disk, written in "
+              f"{time.perf_counter() - t0:.1f}s")
+        print(f"{'max rows':>10}  {'seconds':>7}  {'accuracy':>8}  {'peak RSS MB':>11}  {'heap MB':>7}")
+        for max_rows in args.max_rows:
+            code = _TRAIN_CHILD.format(backend=backend, path=path, max_rows=max_rows, trees=args.trees)
+            out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+            result = next(l for l in out.stdout.splitlines() if l.startswith('RESULT')).split()[1:]
+            seconds, accuracy, rss, heap = map(float, result)
+            print(f"{max_rows:>10,}  {seconds:>7.1f}  {accuracy:>8.4f}  {rss:>11,.0f}  {heap:>7,.0f}")
+    finally:
+        shutil.rmtree(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    export = sub.add_parser('export')
+    export.add_argument('--tasks', type=int, nargs='+', default=[1000, 4000])
+    export.add_argument('--reports-per-task', type=int, default=15, help='mean reports per task')
+    export.add_argument('--chunk-rows', type=int, nargs='+', default=[2000, 20000])
+    export.add_argument('--no-check', dest='check', action='store_false')
+
+    train = sub.add_parser('train')
+    train.add_argument('--rows', type=int, default=10_000_000)
+    train.add_argument('--max-rows', type=int, nargs='+', default=[250_000, 1_000_000])
+    train.add_argument('--trees', type=int, default=50)
+
+    args = parser.parse_args()
+    bench_export(args) if args.mode == 'export' else bench_train(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Measure per-process memory and load time of the pickled models vs the
+memory-mapped compiled arrays.
+
+Publishes the active risk and anomaly models in both formats to a temp
+directory, then starts N worker processes per format. Each worker loads both
+models, runs one inference and waits until all workers are up before
+reading its memory counters:
+  RSS — resident pages, shared ones counted in every process
+  PSS — proportional set size; shared pages are split between the processes
+        mapping them, so the sum of PSS is the real footprint (Linux only)
+Pickle load time includes importing scikit-learn, which unpickling needs;
+the mmap path only imports NumPy and joblib.
+
+Run from the backend/ directory (needs trained models):
+    python benchmarks/measure_model_memory.py
+    python benchmarks/measure_model_memory.py --workers 4
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _memory_kb():
+    """Return (rss_kb, pss_kb) of this process; pss is None off Linux."""
+    rss = pss = None
+    try:
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith('VmRSS:'):
+                    rss = int(line.split()[1])
+        with open('/proc/self/smaps_rollup') as fh:
+            for line in fh:
+                if line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss, pss
+
+
+def worker(fmt, models_dir):
+    """Entry point of one measured process."""
+    import numpy as np
+    import joblib
+
+    base_rss, base_pss = _memory_kb()
+    t0 = time.perf_counter()
+    if fmt == 'pickle':
+        risk    = joblib.load(os.path.join(models_dir, 'risk', 'm', 'model.joblib'))['model']
+        anomaly = joblib.load(os.path.join(models_dir, 'anomaly', 'm', 'model.joblib'))
+    else:
+        from ml.compiled_forest import CompiledForest, CompiledIsolationForest
+        risk = CompiledForest.from_arrays(
+            joblib.load(os.path.join(models_dir, 'risk', 'm', 'arrays.joblib'), mmap_mode='r')['arrays'])
+        anomaly = CompiledIsolationForest.from_arrays(
+            joblib.load(os.path.join(models_dir, 'anomaly', 'm', 'arrays.joblib'), mmap_mode='r')['arrays'])
+    load_s = time.perf_counter() - t0
+
+    # Touch every node once so all model pages are resident
+    risk.predict_proba(np.zeros((64, 9)))
+    anomaly.score_samples(np.zeros((64, 4)))
+    if fmt == 'mmap':
+        for arr in (risk.feature, risk.threshold, risk.children, risk.value,
+                    anomaly.feature, anomaly.threshold, anomaly.children, anomaly.value):
+            np.asarray(arr).sum()
+
+    print('ready', flush=True)
+    sys.stdin.readline()              # wait until every worker is resident
+    rss, pss = _memory_kb()
+    print(json.dumps({
+        'load_s': load_s,
+        'rss_kb': rss, 'pss_kb': pss,
+        'model_rss_kb': rss - base_rss,
+        'model_pss_kb': (pss - base_pss) if pss is not None else None,
+    }), flush=True)
+
+
+def _publish(models_dir):
+    from ml.model_registry import ModelRegistry, registry
+    from ml.compiled_forest import CompiledForest, CompiledIsolationForest
+
+    risk = registry.get('risk').model
+    iso  = registry.get('anomaly').model
+    tmp  = ModelRegistry(models_dir)
+    tmp.publish('risk', risk, version='m', arrays={
+        'arrays': CompiledForest.from_sklearn(risk['model']).to_arrays(), 'label_map': risk['label_map']})
+    tmp.publish('anomaly', iso, version='m', arrays={
+        'arrays': CompiledIsolationForest.from_sklearn(iso).to_arrays()})
+
+
+def _run(fmt, models_dir, n_workers):
+    procs = [
+        subprocess.Popen(
+            [sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--worker', fmt, models_dir],
+            cwd=BACKEND_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        for _ in range(n_workers)
+    ]
+    for p in procs:
+        assert p.stdout.readline().strip() == 'ready'
+    results = []
+    for p in procs:
+        p.stdin.write('go\n')
+        p.stdin.flush()
+    for p in procs:
+        results.append(json.loads(p.stdout.readline()))
+        p.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--worker', nargs=2, metavar=('FORMAT', 'DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    models_dir = tempfile.mkdtemp(prefix='model-memory-')
+    try:
+        _publish(models_dir)
+        for kind in ('risk', 'anomaly'):
+            for fname in ('model.joblib', 'arrays.joblib'):
+                size = os.path.getsize(os.path.join(models_dir, kind, 'm', fname))
+                print(f"  {kind + '/' + fname:<22} {size / 1e6:7.2f} MB on disk")
+
+        print(f"\n{'format':<8} {'load (ms)':>10} {'model RSS/proc (MB)':>20} "
+              f"{'model PSS/proc (MB)':>20} {'total PSS (MB)':>15}")
+        for fmt in ('pickle', 'mmap'):
+            res = _run(fmt, models_dir, args.workers)
+            load_ms = sum(r['load_s'] for r in res) / len(res) * 1e3
+            rss = sum(r['model_rss_kb'] for r in res) / len(res) / 1024
+            if all(r['model_pss_kb'] is not None for r in res):
+                pss = sum(r['model_pss_kb'] for r in res) / len(res) / 1024
+                total = sum(r['pss_kb'] for r in res) / 1024
+                print(f"{fmt:<8} {load_ms:>10.1f} {rss:>20.2f} {pss:>20.2f} {total:>15.1f}")
+            else:
+                print(f"{fmt:<8} {load_ms:>10.1f} {rss:>20.2f} {'n/a':>20} {'n/a':>15}")
+        print(f"\n({args.workers} concurrent processes per format)")
+    finally:
+        shutil.rmtree(models_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
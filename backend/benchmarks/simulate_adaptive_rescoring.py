@@ -0,0 +1,194 @@
+"""
+Simulation: inference work vs score freshness of the daily 09:00 sweep and
+adaptive rescoring (scheduler/adaptive_rescoring.py) at several CPU budgets.
+
+--projects projects have deadlines spread over the next --horizon days and
+a risk score that drifts hour to hour. Progress reports arrive at random,
+more often for projects near their deadline; each one updates a task's
+updated_at in mongomock, which is what AdaptiveRescorer.sync reads as
+activity. Adaptive runs the real AdaptiveRescorer — queue, intervals,
+budget, rescore_schedule — ticking every --tick-seconds of simulated time;
+only the scoring itself is modelled: it costs --ms-per-task CPU
+milliseconds per task plus --ms-per-project, and the daily sweep pays the
+same.
+
+Reports per mode:
+  scorings/day       projects scored per day (inference work)
+  CPU s/day          modelled scoring CPU per day
+  near p50 / p95 h   hours from a progress report on a project due within
+                     7 days to the next score of that project
+  far p50 / p95 h    the same for projects due in more than 30 days
+  max backlog        most projects due at once (adaptive) or scored at
+                     once (daily)
+
+A report not scored by the end of the run counts with the time to the end,
+a lower bound; run for a few more days than the longest interval (72 h)
+for the far figures to settle.
+
+Run from the backend/ directory:
+    python benchmarks/simulate_adaptive_rescoring.py
+    python benchmarks/simulate_adaptive_rescoring.py --projects 1000 --days 7 --budgets 0.001 0.01
+"""
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bson
+import mongomock
+
+from models.project_model import ProjectModel
+from scheduler.adaptive_rescoring import AdaptiveRescorer
+
+START = datetime(2026, 1, 5, 9, tzinfo=timezone.utc)
+NEAR_DAYS, FAR_DAYS = 7, 30
+
+
+class Portfolio:
+    def __init__(self, n_projects, horizon, days, seed=0):
+        rng = np.random.default_rng(seed)
+        self.ids       = [str(bson.ObjectId()) for _ in range(n_projects)]
+        self.deadlines = [START + timedelta(days=float(d)) for d in rng.uniform(1, horizon, n_projects)]
+        hours = days * 24 + 1
+        drift = rng.normal(0, 1.5, (n_projects, hours)).cumsum(axis=1)
+        self.risk = np.clip(rng.uniform(10, 90, (n_projects, 1)) + drift, 0, 100)
+
+        # Progress reports: a few a week far out, several a day in the last two weeks
+        self.events = []
+        for i, deadline in enumerate(self.deadlines):
+            t = START
+            while True:
+                near = (deadline - t).days <= 14
+                t += timedelta(hours=float(rng.exponential(6 if near else 60)))
+                if t >= START + timedelta(days=days):
+                    break
+                self.events.append((t, self.ids[i]))
+        self.events.sort()
+
+    def risk_at(self, i, now):
+        return float(self.risk[i, int((now - START).total_seconds() // 3600)])
+
+    def days_left(self, i, now):
+        return (self.deadlines[i] - now).total_seconds() / 86400
+
+
+class SimRescorer(AdaptiveRescorer):
+    """AdaptiveRescorer whose scoring is modelled: new risk from the portfolio, CPU from task count."""
+
+    def __init__(self, db, portfolio, cost, **kwargs):
+        super().__init__(db, **kwargs)
+        self.portfolio = portfolio
+        self.index     = {pid: i for i, pid in enumerate(portfolio.ids)}
+        self.cost      = cost
+        self.cpu_used  = 0.0
+        self.cpu_clock = lambda: self.cpu_used
+        self.now       = START
+        self.scored    = []          # (time, project_id)
+
+    def tick(self, now=None, app=None, fencing_token=None):
+        self.now = now
+        return super().tick(now, app, fencing_token)
+
+    def _score(self, project_ids, app=None, fencing_token=None, alert_projects=None):
+        projects = ProjectModel(self.db).get_in_progress(project_ids)
+        results, updates = {}, []
+        for project in projects:
+            pid  = str(project['_id'])
+            risk = self.portfolio.risk_at(self.index[pid], self.now)
+            results[pid] = {**project, 'risk_score': risk}
+            updates.append((pid, risk, None))
+            self.scored.append((self.now, pid))
+            self.cpu_used += self.cost
+        ProjectModel(self.db).bulk_update_risk_scores(updates)
+        return results
+
+
+def _seed(db, portfolio):
+    db.projects.insert_many([{'_id': bson.ObjectId(pid), 'name': f'Project {i}', 'status': 'in_progress',
+                              'deadline': portfolio.deadlines[i].date().isoformat(), 'risk_score': 0}
+                             for i, pid in enumerate(portfolio.ids)])
+    db.tasks.insert_many([{'project_id': pid, 'updated_at': START - timedelta(days=30)} for pid in portfolio.ids])
+
+
+def _freshness(portfolio, scored, end):
+    """(near latencies h, far latencies h) from the scoring times."""
+    times = {}
+    for t, pid in scored:
+        times.setdefault(pid, []).append(t)
+    index = {pid: i for i, pid in enumerate(portfolio.ids)}
+
+    near, far = [], []
+    for t, pid in portfolio.events:
+        nxt = next((s for s in times.get(pid, []) if s >= t), end)
+        days = portfolio.days_left(index[pid], t)
+        if days <= NEAR_DAYS:
+            near.append((nxt - t).total_seconds() / 3600)
+        elif days > FAR_DAYS:
+            far.append((nxt - t).total_seconds() / 3600)
+    return near, far
+
+
+def simulate_daily(portfolio, days):
+    return [(START + timedelta(days=d), pid) for d in range(days) for pid in portfolio.ids]
+
+
+def simulate_adaptive(portfolio, args, budget, cost):
+    db = mongomock.MongoClient().risksense
+    _seed(db, portfolio)
+    rescorer = SimRescorer(db, portfolio, cost, cpu_budget=budget, tick_seconds=args.tick_seconds,
+                           batch_size=args.batch_size)
+    end, now, e = START + timedelta(days=args.days), START, 0
+    max_backlog = 0
+    while now < end:
+        while e < len(portfolio.events) and portfolio.events[e][0] <= now:
+            _, pid = portfolio.events[e]
+            db.tasks.update_one({'project_id': pid}, {'$set': {'updated_at': portfolio.events[e][0]}})
+            e += 1
+        summary = rescorer.tick(now)
+        max_backlog = max(max_backlog, summary['backlog'])
+        now += timedelta(seconds=args.tick_seconds)
+    return rescorer.scored, max_backlog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--projects', type=int, default=500)
+    parser.add_argument('--tasks', type=int, default=8, help='tasks per project')
+    parser.add_argument('--horizon', type=int, default=180, help='deadlines spread over this many days')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--budgets', type=float, nargs='+', default=[0.00002, 0.0001, 0.001],
+                        help='adaptive CPU budgets, as a share of one core')
+    parser.add_argument('--tick-seconds', type=int, default=60)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--ms-per-task', type=float, default=2.0)
+    parser.add_argument('--ms-per-project', type=float, default=10.0)
+    args = parser.parse_args()
+
+    portfolio = Portfolio(args.projects, args.horizon, args.days)
+    cost = (args.tasks * args.ms_per_task + args.ms_per_project) / 1000
+    end  = START + timedelta(days=args.days)
+    n_near = sum(1 for i in range(args.projects) if portfolio.days_left(i, START) <= NEAR_DAYS)
+    print(f"{args.projects} projects ({n_near} due within {NEAR_DAYS} days) × {args.tasks} tasks, "
+          f"{args.days} days, {len(portfolio.events):,} progress reports, {cost * 1000:.0f} ms per scoring\n")
+
+    print(f"{'mode':<16} {'scorings/day':>12}  {'CPU s/day':>9}  {'near p50 h':>10}  {'near p95 h':>10}  "
+          f"{'far p50 h':>9}  {'far p95 h':>9}  {'max backlog':>11}")
+    modes = [('daily 09:00', None)] + [(f'adaptive {b:g}', b) for b in args.budgets]
+    for name, budget in modes:
+        if budget is None:
+            scored, backlog = simulate_daily(portfolio, args.days), args.projects
+        else:
+            scored, backlog = simulate_adaptive(portfolio, args, budget, cost)
+        near, far = _freshness(portfolio, scored, end)
+        per_day = len(scored) / args.days
+        print(f"{name:<16} {per_day:>12,.0f}  {per_day * cost:>9.1f}  {np.median(near):>10.2f}  "
+              f"{np.percentile(near, 95):>10.2f}  {np.median(far):>9.2f}  {np.percentile(far, 95):>9.2f}  "
+              f"{backlog:>11,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Simulation: growth of the alerts collection over --days daily pipeline
+runs, inserting every alert (before) vs coalescing unread duplicates and
+archiving read alerts (AlertModel.raise_many / archive_read).
+
+--projects projects carry a risk score that drifts day to day (so some stay
+risky for weeks) and tasks that turn Critical near their deadline; each
+day the pipeline's alert rules (daily_jobs._project_alerts) raise alerts
+for them. The manager reads a --read-rate share of the unread alerts every
+day and marks all read every Monday. The archival job runs daily with
+--retention-days.
+
+Reports, at checkpoints, the live collection size (documents and BSON
+bytes) and the median latency of AlertController.get_alerts, all and
+unread-only. mongomock scans rather than using indexes, so latency tracks
+collection size (and the default run takes several minutes).
+
+Run from the backend/ directory:
+    python benchmarks/simulate_alert_growth.py
+    python benchmarks/simulate_alert_growth.py --projects 500 --days 90 --retention-days 14
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bson
+import mongomock
+from flask import Flask
+
+import models.alert_model as alert_module
+from controllers.alert_controller import AlertController
+from models.alert_model import AlertModel
+from scheduler.daily_jobs import _project_alerts
+
+
+class SimClock(datetime):
+    """datetime whose now() is the simulated day (patched into models.alert_model)."""
+    current = datetime(2026, 1, 1, 9, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+class Portfolio:
+    def __init__(self, n_projects, tasks_per_project, seed=0):
+        self.rng   = np.random.default_rng(seed)
+        self.ids   = [str(bson.ObjectId()) for _ in range(n_projects)]
+        self.risk  = self.rng.uniform(10, 90, n_projects)
+        self.tasks = [[(str(bson.ObjectId()), int(self.rng.integers(3, 60)))
+                       for _ in range(tasks_per_project)] for _ in range(n_projects)]
+
+    def step(self):
+        """Advance one day; return (project, risk_result) pairs like the pipeline's."""
+        self.risk = np.clip(self.risk + self.rng.normal(0, 4, len(self.risk)), 0, 100)
+        results = []
+        for i, pid in enumerate(self.ids):
+            task_results = []
+            for j, (tid, days) in enumerate(self.tasks[i]):
+                days -= 1
+                if days < -5:              # done; a new task takes its place
+                    tid, days = str(bson.ObjectId()), int(self.rng.integers(10, 60))
+                self.tasks[i][j] = (tid, days)
+                critical = days <= 5 and self.rng.random() < self.risk[i] / 100
+                task_results.append({'_id': tid, 'name': f'Task {j}', 'daysRemaining': days,
+                                     'riskLevel': 'Critical' if critical else 'Medium',
+                                     'reason': f'{days} days left'})
+            results.append(({'_id': pid, 'name': f'Project {i}'},
+                            {'riskPercent': float(self.risk[i]), 'tasks': task_results}))
+        return results
+
+
+def _manager_reads(db, rng, read_rate, monday):
+    if monday:
+        AlertModel(db).mark_all_as_read()
+        return
+    # What mark_as_read does per alert, in one update (mongomock scans per call)
+    unread = [a['_id'] for a in db.alerts.find({'read': False}, {'_id': 1})]
+    picked = [unread[i] for i in rng.choice(len(unread), int(len(unread) * read_rate), replace=False)]
+    if picked:
+        db.alerts.update_many({'_id': {'$in': picked}},
+                              {'$set': {'read': True, 'read_at': SimClock.now(timezone.utc)}})
+
+
+def _latency_ms(app, unread_only, repeats=5):
+    times = []
+    with app.app_context():
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            AlertController.get_alerts(unread_only=unread_only)
+            times.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(times)
+
+
+def simulate(mode, args):
+    app = Flask(__name__)
+    db  = app.db = mongomock.MongoClient().risksense
+    model     = AlertModel(db)
+    portfolio = Portfolio(args.projects, args.tasks)
+    rng       = np.random.default_rng(1)
+    SimClock.current = datetime(2026, 1, 1, 9, tzinfo=timezone.utc)
+
+    rows = []
+    for day in range(1, args.days + 1):
+        alerts = [a for project, result in portfolio.step() for a in _project_alerts(project, result)]
+        if mode == 'insert':
+            for a in alerts:
+                model.create(**a)
+        else:
+            model.raise_many(alerts)
+            model.archive_read(SimClock.current - timedelta(days=args.retention_days))
+
+        SimClock.current += timedelta(hours=4)
+        _manager_reads(db, rng, args.read_rate, SimClock.current.weekday() == 0)
+        SimClock.current += timedelta(hours=20)
+
+        if day in args.checkpoints or day == args.days:
+            docs = list(db.alerts.find())
+            rows.append((day, len(docs), sum(len(bson.encode(d)) for d in docs),
+                         db.alerts.count_documents({'read': False}),
+                         db.alerts_archive.count_documents({}),
+                         _latency_ms(app, False), _latency_ms(app, True)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--projects', type=int, default=300)
+    parser.add_argument('--tasks', type=int, default=4, help='tasks per project')
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--read-rate', type=float, default=0.4, help='share of unread alerts read per day')
+    parser.add_argument('--retention-days', type=int, default=30)
+    parser.add_argument('--checkpoints', type=int, nargs='+', default=[1, 10, 30, 60])
+    args = parser.parse_args()
+
+    alert_module.datetime = SimClock
+    print(f"{args.projects} projects × {args.tasks} tasks, {args.days} days, read rate {args.read_rate}, "
+          f"archive after {args.retention_days} days\n")
+    print(f"{'mode':<8} {'day':>4}  {'alerts':>7}  {'KB':>7}  {'unread':>6}  {'archived':>8}  "
+          f"{'get ms':>7}  {'unread ms':>9}")
+    for mode in ('insert', 'dedup'):
+        for day, n, size, unread, archived, all_ms, unread_ms in simulate(mode, args):
+            print(f"{mode:<8} {day:>4}  {n:>7,}  {size / 1024:>7,.0f}  {unread:>6,}  {archived:>8,}  "
+                  f"{all_ms:>7.1f}  {unread_ms:>9.1f}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Simulation: several app processes sharing one scheduler lease
+(scheduler/leader_lock.py).
+
+Each simulated process has its own LeaderLock (own owner id and heartbeat
+thread) and its own "cron" firing the same job every --tick seconds
+through run_leader_job. The job writes one row per firing, fenced with
+still_holds(). Along the way:
+
+  * the leader crashes (heartbeat stops, lease not released) — another
+    process must take over within TTL plus one heartbeat;
+  * the next leader stalls mid-job for 2×TTL with its heartbeat stopped (a
+    GC pause or a frozen VM) — its fenced write must be refused, and it
+    must find the lease lost when it comes back;
+  * one process exits cleanly (releases the lease) — failover is immediate.
+
+It then checks that no firing ran in two processes, that fencing tokens
+never go down, and reports failover times and firings nobody ran (those
+falling inside a failover window).
+
+Processes are threads over a shared mongomock client by default; pass
+--mongo-uri to give each its own client on a real mongod.
+
+Run from the backend/ directory:
+    python benchmarks/simulate_leader_lock.py
+    python benchmarks/simulate_leader_lock.py --processes 8 --ttl 1.0 --mongo-uri mongodb://localhost:27017/lock_sim
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler.leader_lock import LeaderLock, run_leader_job
+
+
+class SimProcess:
+    """One app process: a lease heartbeat plus a cron firing the job."""
+
+    def __init__(self, name, db, ttl, tick, start_at, journal):
+        self.name, self.db, self.tick, self.start_at = name, db, tick, start_at
+        self.lock    = LeaderLock(db, name='sim', ttl_seconds=ttl, owner=name)
+        self.app     = SimpleNamespace(leader_lock=self.lock)
+        self.journal = journal
+        self.alive   = True
+        self.stall   = None                # seconds to stall inside the next job run
+        self.thread  = threading.Thread(target=self._cron, name=name, daemon=True)
+
+    def start(self):
+        self.lock.start()
+        self.thread.start()
+
+    def _cron(self):
+        n = 0
+        while self.alive:
+            n += 1
+            wake = self.start_at + n * self.tick
+            time.sleep(max(wake - time.monotonic(), 0))
+            if self.alive:
+                run_leader_job(self.app, self._job, 'sim')
+
+    def _job(self, app, fencing_token):
+        firing = round((time.monotonic() - self.start_at) / self.tick)
+        if self.stall:
+            stall, self.stall = self.stall, None
+            self._pause_heartbeat()
+            time.sleep(stall)
+            self.lock._stop.clear()
+            self.lock._thread = None
+            self.lock.start()
+        if app.leader_lock.still_holds(fencing_token):
+            self.db.sim_runs.insert_one({'firing': firing, 'owner': self.name, 'token': fencing_token,
+                                         'at': time.monotonic() - self.start_at})
+            self.journal.append(('ran', firing, self.name, fencing_token))
+        else:
+            self.journal.append(('fenced', firing, self.name, fencing_token))
+
+    def _pause_heartbeat(self):
+        self.lock._stop.set()
+        self.lock._thread.join()
+
+    def crash(self):
+        """Die without releasing: the lease has to expire."""
+        self.alive = False
+        self._pause_heartbeat()
+
+    def exit(self):
+        """Clean shutdown: release the lease (atexit in app.py)."""
+        self.alive = False
+        self.lock.stop()
+
+
+def _leader(processes):
+    leaders = [p for p in processes if p.alive and p.lock.is_leader()]
+    return leaders[0] if leaders else None
+
+
+def _wait_for_new_leader(processes, old, since, timeout):
+    while time.monotonic() - since < timeout:
+        leader = _leader(processes)
+        if leader is not None and leader is not old:
+            return leader, time.monotonic() - since
+        time.sleep(0.005)
+    raise AssertionError(f"no failover within {timeout:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--processes', type=int, default=5)
+    parser.add_argument('--ttl', type=float, default=0.6, help='lease TTL in seconds')
+    parser.add_argument('--tick', type=float, default=0.05, help='seconds between job firings')
+    parser.add_argument('--mongo-uri', help='run against a real mongod instead of mongomock')
+    args = parser.parse_args()
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        MongoClient(args.mongo_uri).get_default_database().drop_collection('scheduler_locks')
+        MongoClient(args.mongo_uri).get_default_database().drop_collection('sim_runs')
+        make_db = lambda: MongoClient(args.mongo_uri).get_default_database()
+    else:
+        import mongomock
+        shared = mongomock.MongoClient().risksense
+        make_db = lambda: shared
+
+    journal  = []
+    start_at = time.monotonic()
+    processes = [SimProcess(f'proc-{i}', make_db(), args.ttl, args.tick, start_at, journal)
+                 for i in range(args.processes)]
+    for p in processes:
+        p.start()
+    bound = args.ttl + args.ttl / 3 + 0.1
+
+    time.sleep(3 * args.ttl)
+    first = _leader(processes)
+    print(f"leader: {first.name} (token {first.lock.token})")
+
+    crashed_at = time.monotonic()
+    first.crash()
+    second, t_crash = _wait_for_new_leader(processes, first, crashed_at, 2 * bound)
+    print(f"{first.name} crashed → {second.name} leads after {t_crash:.2f}s (bound {bound:.2f}s)")
+
+    time.sleep(2 * args.ttl)
+    second.stall = 2 * args.ttl
+    stalled_at = time.monotonic()
+    third, t_stall = _wait_for_new_leader(processes, second, stalled_at, 4 * bound)
+    print(f"{second.name} stalled mid-job → {third.name} leads after {t_stall:.2f}s")
+    time.sleep(2 * args.ttl)
+
+    exited_at = time.monotonic()
+    third.exit()
+    fourth, t_exit = _wait_for_new_leader(processes, third, exited_at, 2 * bound)
+    print(f"{third.name} exited cleanly → {fourth.name} leads after {t_exit:.2f}s")
+    time.sleep(2 * args.ttl)
+
+    for p in processes:
+        if p.alive:
+            p.exit()
+
+    db = make_db()
+    runs = list(db.sim_runs.find().sort('at', 1))
+    firings = [r['firing'] for r in runs]
+    tokens  = [r['token'] for r in runs]
+    fenced  = [e for e in journal if e[0] == 'fenced']
+    last    = max(firings)
+
+    assert len(firings) == len(set(firings)), "a firing ran in two processes"
+    assert tokens == sorted(tokens), "fencing tokens went down"
+    assert any(e[2] == second.name for e in fenced), "stalled leader's write was not fenced"
+    assert t_crash <= bound, f"failover took {t_crash:.2f}s"
+    missed = last - len(set(firings))
+    print(f"\n{len(runs)} runs over {last} firings by {len({r['owner'] for r in runs})} leaders, "
+          f"tokens {tokens[0]}→{tokens[-1]}; {missed} firings fell in failover windows; "
+          f"{len(fenced)} stale write(s) fenced")
+    print("✓ one process per firing, monotonic fencing tokens, stalled leader fenced")
+
+
+if __name__ == '__main__':
+    main()
@@ -24,3 +24,57 @@ class Config:
 
     # Allowed file extensions for proof uploads
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx', 'zip'}
+
+    # ML model registry — how often to poll ml/saved_models/manifest.json (0 disables)
+    MODEL_WATCH_INTERVAL_SECONDS = int(os.getenv('MODEL_WATCH_INTERVAL_SECONDS', 30))
+
+    # Load and exercise both models on a background thread at startup;
+    # /api/health/ready reports not-ready until they are warm
+    MODEL_PREWARM = os.getenv('MODEL_PREWARM', '0') == '1'
+
+    # Upper bound on the Mongo ping done by /api/health/ready
+    READINESS_MONGO_TIMEOUT_MS = int(os.getenv('READINESS_MONGO_TIMEOUT_MS', 500))
+
+    # Score progress reports for anomalies on a background worker pool instead
+    # of inside the submit request (ml/anomaly_queue.py)
+    ASYNC_ANOMALY_SCORING = os.getenv('ASYNC_ANOMALY_SCORING', '0') == '1'
+    ANOMALY_WORKERS = int(os.getenv('ANOMALY_WORKERS', 2))
+    ANOMALY_QUEUE_SIZE = int(os.getenv('ANOMALY_QUEUE_SIZE', 1000))
+    ANOMALY_DRAIN_TIMEOUT_SECONDS = float(os.getenv('ANOMALY_DRAIN_TIMEOUT_SECONDS', 30))
+
+    # Nightly warm-start retraining of the risk forest (ml/incremental_training.py)
+    RISK_INCREMENTAL_RETRAIN = os.getenv('RISK_INCREMENTAL_RETRAIN', '0') == '1'
+
+    # Score the daily pipeline's projects on this many worker processes
+    # (scheduler/sharded_pipeline.py); 0 or 1 keeps it on the scheduler thread
+    RISK_PIPELINE_WORKERS = int(os.getenv('RISK_PIPELINE_WORKERS', 0))
+    RISK_PIPELINE_SHARDS_PER_WORKER = int(os.getenv('RISK_PIPELINE_SHARDS_PER_WORKER', 4))
+
+    # Run scheduled jobs only in the process holding a Mongo lease, renewed
+    # every TTL/3 seconds and taken over by another process once it expires
+    SCHEDULER_LEADER_LOCK = os.getenv('SCHEDULER_LEADER_LOCK', '1') == '1'
+    SCHEDULER_LOCK_TTL_SECONDS = int(os.getenv('SCHEDULER_LOCK_TTL_SECONDS', 60))
+
+    # Read alerts move to alerts_archive this many days after being read
+    # (03:00 job; 0 keeps them), where a TTL index drops them after
+    # ALERT_ARCHIVE_TTL_DAYS (0 keeps the archive forever)
+    ALERT_READ_RETENTION_DAYS = int(os.getenv('ALERT_READ_RETENTION_DAYS', 30))
+    ALERT_ARCHIVE_TTL_DAYS = int(os.getenv('ALERT_ARCHIVE_TTL_DAYS', 365))
+
+    # Re-score projects whose tasks or progress changed every N minutes
+    # (scheduler/intraday_jobs.py; 0, the default, disables — e.g. 10 to
+    # enable). Change streams are used when the server supports them,
+    # updated_at/submitted_at watermarks otherwise
+    RISK_INTRADAY_INTERVAL_MINUTES = int(os.getenv('RISK_INTRADAY_INTERVAL_MINUTES', 0))
+    RISK_INTRADAY_CHANGE_STREAM = os.getenv('RISK_INTRADAY_CHANGE_STREAM', '1') == '1'
+
+    # Replace the 09:00 sweep with per-project rescoring intervals set by
+    # deadline, last risk and activity (scheduler/adaptive_rescoring.py),
+    # processed every TICK seconds within CPU_BUDGET of one core; the
+    # intraday job above is not scheduled while it is on
+    RISK_ADAPTIVE_RESCORING = os.getenv('RISK_ADAPTIVE_RESCORING', '0') == '1'
+    RISK_ADAPTIVE_TICK_SECONDS = int(os.getenv('RISK_ADAPTIVE_TICK_SECONDS', 60))
+    RISK_ADAPTIVE_CPU_BUDGET = float(os.getenv('RISK_ADAPTIVE_CPU_BUDGET', 0.25))
+    RISK_ADAPTIVE_BATCH_SIZE = int(os.getenv('RISK_ADAPTIVE_BATCH_SIZE', 50))
+    RISK_ADAPTIVE_MIN_INTERVAL_MINUTES = int(os.getenv('RISK_ADAPTIVE_MIN_INTERVAL_MINUTES', 15))
+    RISK_ADAPTIVE_MAX_INTERVAL_HOURS = int(os.getenv('RISK_ADAPTIVE_MAX_INTERVAL_HOURS', 72))
@@ -0,0 +1,73 @@
+import time
+from datetime import datetime, timezone
+from flask import current_app
+
+
+class HealthController:
+
+    @staticmethod
+    def liveness():
+        """The process is up and serving requests; checks nothing else."""
+        return {'status': 'ok', 'message': 'AI Risk Prediction API is running'}, 200
+
+    @staticmethod
+    def readiness():
+        """
+        Ready when Mongo answers a ping and, if MODEL_PREWARM is on, both
+        models are warm. Scheduler and anomaly-queue state are reported but
+        not required.
+        """
+        mongo     = HealthController._mongo_check()
+        models    = HealthController._model_check()
+        scheduler = HealthController._scheduler_check(mongo['ok'])
+        pool      = getattr(current_app, 'anomaly_pool', None)
+        anomaly_queue = pool.metrics() if pool is not None else {'enabled': False}
+
+        ready = mongo['ok'] and models['ok']
+        return {
+            'status': 'ready' if ready else 'not_ready',
+            'checks': {'mongo': mongo, 'models': models, 'scheduler': scheduler,
+                       'anomalyQueue': anomaly_queue},
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+        }, 200 if ready else 503
+
+    @staticmethod
+    def _mongo_check():
+        import pymongo
+        timeout_s = current_app.config['READINESS_MONGO_TIMEOUT_MS'] / 1000
+        t0 = time.perf_counter()
+        try:
+            with pymongo.timeout(timeout_s):
+                current_app.db.command('ping')
+        except Exception as e:
+            return {'ok': False, 'error': str(e), 'latencyMs': round((time.perf_counter() - t0) * 1e3, 2)}
+        return {'ok': True, 'latencyMs': round((time.perf_counter() - t0) * 1e3, 2)}
+
+    @staticmethod
+    def _model_check():
+        from ml import warmup
+        from ml.model_registry import registry
+
+        prewarm = warmup.is_enabled()
+        states  = warmup.status()
+        ok = not prewarm or all(s['state'] == 'ready' for s in states.values())
+        return {'ok': ok, 'prewarm': prewarm, 'models': states, 'loaded': registry.loaded()}
+
+    @staticmethod
+    def _scheduler_check(mongo_ok=True):
+        scheduler = getattr(current_app, 'scheduler', None)
+        lock      = getattr(current_app, 'leader_lock', None)
+        if lock is None:
+            leader = {'enabled': False}
+        elif mongo_ok:
+            leader = lock.status()
+        else:
+            # Reading the lease would wait out server selection; report local state only
+            leader = {'enabled': True, 'leader': lock.is_leader(), 'owner': lock.owner}
+        if scheduler is None:
+            return {'running': False, 'jobs': [], 'leader': leader}
+        jobs = []
+        for job in scheduler.get_jobs():
+            next_run = getattr(job, 'next_run_time', None)
+            jobs.append({'id': job.id, 'nextRun': next_run.isoformat() if next_run else None})
+        return {'running': bool(scheduler.running), 'jobs': jobs, 'leader': leader}
@@ -0,0 +1,21 @@
+from flask import current_app
+from utils.response import success_response, error_response
+from utils.token_helper import is_manager
+from models.pipeline_run_model import PipelineRunModel
+
+_MAX_LIMIT = 500
+
+
+def _model():
+    return PipelineRunModel(current_app.db)
+
+
+class PipelineController:
+
+    @staticmethod
+    def get_runs(limit=50, job=None):
+        if not is_manager():
+            return error_response("Only managers can view pipeline runs", 403)
+        limit = max(1, min(limit, _MAX_LIMIT))
+        runs  = _model().get_recent(limit=limit, job=job)
+        return success_response([PipelineRunModel.serialize(r) for r in runs])
@@ -4,7 +4,9 @@ from utils.token_helper import get_current_user_id
 from models.progress_model import ProgressModel
 from models.task_model import TaskModel
 from models.alert_model import AlertModel
-from ml.anomaly_detection import check_progress_report
+from models.task_risk_model import TaskRiskModel
+from models.task_feature_state_model import TaskFeatureStateModel
+from ml.prediction_cache import invalidate_project
 
 
 def _models():
@@ -23,15 +25,21 @@ class ProgressController:
         prm, tm, am = _models()
         uid  = get_current_user_id()
 
-        # Get previous progress for anomaly comparison
-        prev_docs = prm.get_history_by_task(task_id)
-        prev_pct  = float(prev_docs[-1].get('completion_percent', 0)) if prev_docs else 0.0
+        # Get previous progress for anomaly comparison from the task's running
+        # aggregates (built from history the first time)
+        fsm   = TaskFeatureStateModel(current_app.db)
+        state = fsm.get_or_rebuild([task_id], prm).get(str(task_id))
+        prev_pct = float(state['last_completion_percent']) if state else 0.0
 
-        # Run anomaly detection
-        anomaly = check_progress_report(data, prev_pct)
+        # Run anomaly detection (imported here so NumPy/sklearn load on first use, not at startup),
+        # or leave it to the background pool when ASYNC_ANOMALY_SCORING is on
+        from ml.anomaly_detection import check_progress_report
+        pool    = getattr(current_app, 'anomaly_pool', None)
+        anomaly = None if pool is not None else check_progress_report(data, prev_pct)
 
         # Save the report
-        doc = prm.submit(data, uid, is_anomaly=anomaly['is_anomaly'])
+        doc = prm.submit(data, uid, is_anomaly=anomaly['is_anomaly'] if anomaly else False,
+                         feature_state=fsm, anomaly_pending=anomaly is None)
 
         # Update task progress in tasks collection
         new_pct = float(data.get('completion_percent', 0))
@@ -43,11 +51,22 @@ class ProgressController:
             elif new_pct > 0:
                 updates['status'] = 'in_progress'
             tm.update(task_id, updates)
+        invalidate_project(task.get('project_id') if task else data.get('project_id'))
+        TaskRiskModel(current_app.db).mark_dirty([task_id])
+
+        employee_name = data.get('employee_name', 'An employee')
+        task_name     = task.get('title', task_id) if task else task_id
+        if anomaly is None:
+            queued = pool.submit(doc['_id'], doc, prev_pct, task_id, uid,
+                                 employee_name=employee_name, task_name=task_name)
+            if not queued:
+                # Pool full or shutting down: score inline as before
+                anomaly = check_progress_report(data, prev_pct)
+                prm.set_anomaly_flag(doc['_id'], anomaly['is_anomaly'])
+                doc.update(anomaly_flag=anomaly['is_anomaly'], anomaly_pending=False)
 
         # If anomalous, create an alert
-        if anomaly['is_anomaly']:
-            employee_name = data.get('employee_name', 'An employee')
-            task_name     = task.get('title', task_id) if task else task_id
+        if anomaly and anomaly['is_anomaly']:
             am.create(
                 alert_type='fraud_detection',
                 severity='warning',
@@ -58,8 +77,9 @@ class ProgressController:
             )
 
         result = ProgressModel.serialize(doc)
-        result['anomalyDetected'] = anomaly['is_anomaly']
-        result['anomalyReason']   = anomaly.get('reason')
+        result['anomalyDetected'] = anomaly['is_anomaly'] if anomaly else None
+        result['anomalyReason']   = anomaly.get('reason') if anomaly else None
+        result['anomalyPending']  = anomaly is None
 
         return success_response(result, "Daily report submitted successfully", 201)
 
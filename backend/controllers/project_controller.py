@@ -5,8 +5,9 @@ from models.project_model import ProjectModel
 from models.task_model import TaskModel
 from models.progress_model import ProgressModel
 from models.user_model import UserModel
+from models.task_risk_model import TaskRiskModel
+from ml.prediction_cache import invalidate_project
 from datetime import date, timedelta
-import numpy as np
 
 
 def _models():
@@ -65,6 +66,7 @@ class ProjectController:
         if not pm.find_by_id(project_id):
             return error_response("Project not found", 404)
         updated = pm.update(project_id, data)
+        invalidate_project(project_id)
         return success_response(ProjectModel.serialize(updated))
 
     @staticmethod
@@ -73,6 +75,7 @@ class ProjectController:
         if not pm.find_by_id(project_id):
             return error_response("Project not found", 404)
         tm.delete_by_project(project_id)
+        TaskRiskModel(current_app.db).delete_by_project(project_id)
         pm.delete(project_id)
         return success_response(None, "Project deleted")
 
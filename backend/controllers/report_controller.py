@@ -7,7 +7,6 @@ from models.project_model import ProjectModel
 from models.task_model import TaskModel
 from models.progress_model import ProgressModel
 from models.user_model import UserModel
-from utils.pdf_generator import generate_project_report_pdf
 
 
 def _models():
@@ -40,8 +39,8 @@ class ReportController:
 
         tasks = tm.get_by_project(project_id)
 
-        # Fetch risk data via ML
-        progress_map = {str(t['_id']): prm.get_history_by_task(str(t['_id'])) for t in tasks}
+        # Fetch risk data via ML; per-task progress stats in one aggregation
+        progress_map = prm.aggregate_task_stats([str(t['_id']) for t in tasks])
         all_users    = um.get_all()
         user_map     = {str(u['_id']): u for u in all_users}
 
@@ -63,6 +62,8 @@ class ReportController:
         reports_dir = os.path.join(os.getcwd(), 'generated_reports')
         output_path = os.path.join(reports_dir, filename)
 
+        # ReportLab is only needed here; keep it out of app startup
+        from utils.pdf_generator import generate_project_report_pdf
         generate_project_report_pdf(
             ProjectModel.serialize(project), risk_data, tasks, output_path
         )
@@ -1,29 +1,32 @@
 from flask import current_app
 from utils.response import success_response, error_response
+from utils.token_helper import is_manager
 from models.project_model import ProjectModel
 from models.task_model import TaskModel
 from models.progress_model import ProgressModel
 from models.user_model import UserModel
-from ml.predict import predict_project_risk
+from models.task_risk_model import TaskRiskModel
+from models.task_feature_state_model import TaskFeatureStateModel
+from ml.prediction_cache import prediction_cache
 
 
 def _models():
     db = current_app.db
-    return ProjectModel(db), TaskModel(db), ProgressModel(db), UserModel(db)
+    return ProjectModel(db), TaskModel(db), ProgressModel(db), UserModel(db), TaskRiskModel(db)
 
 
 class RiskController:
 
     @staticmethod
     def list_projects():
-        pm, _, _, _ = _models()
+        pm, _, _, _, _ = _models()
         projects = pm.get_all()
         result = [{'_id': str(p['_id']), 'name': p['name']} for p in projects]
         return success_response(result)
 
     @staticmethod
     def get_project_risk(project_id):
-        pm, tm, prm, um = _models()
+        pm, tm, prm, um, trm = _models()
 
         project = pm.find_by_id(project_id)
         if not project:
@@ -31,18 +34,16 @@ class RiskController:
 
         tasks = tm.get_by_project(project_id)
 
-        # Build progress map: {task_id: [progress_docs...]}
-        progress_map = {}
-        for task in tasks:
-            tid = str(task['_id'])
-            progress_map[tid] = prm.get_history_by_task(tid)
-
         # Build user map: {user_id: user_doc}
         all_users = um.get_all()
         user_map  = {str(u['_id']): u for u in all_users}
 
+        # Only tasks marked dirty (or whose inputs changed) are re-scored;
+        # the rest come from the task_risk collection
         try:
-            risk_result = predict_project_risk(project, tasks, progress_map, user_map)
+            from ml.incremental_risk import refresh_project_risk
+            risk_result, _ = refresh_project_risk(project, tasks, user_map, prm, trm,
+                                                  feature_state_model=TaskFeatureStateModel(current_app.db))
         except FileNotFoundError:
             return error_response(
                 "ML model not trained. Run: python ml/train_model.py", 503
@@ -54,3 +55,9 @@ class RiskController:
         pm.update_risk_score(project_id, risk_result['riskPercent'])
 
         return success_response(risk_result)
+
+    @staticmethod
+    def get_cache_stats():
+        if not is_manager():
+            return error_response("Only managers can view cache stats", 403)
+        return success_response(prediction_cache.stats())
@@ -4,6 +4,8 @@ from utils.token_helper import get_current_user_id, is_manager
 from models.task_model import TaskModel
 from models.project_model import ProjectModel
 from models.user_model import UserModel
+from models.task_risk_model import TaskRiskModel
+from ml.prediction_cache import invalidate_project
 
 
 def _models():
@@ -68,9 +70,13 @@ class TaskController:
     @staticmethod
     def update_task(task_id, data):
         tm, _, _ = _models()
-        if not tm.find_by_id(task_id):
+        task = tm.find_by_id(task_id)
+        if not task:
             return error_response("Task not found", 404)
         updated = tm.update(task_id, data)
+        invalidate_project(task.get('project_id'))
+        invalidate_project(updated.get('project_id'))
+        TaskRiskModel(current_app.db).mark_dirty([task_id])
         return success_response(TaskModel.serialize(updated))
 
     @staticmethod
@@ -79,4 +85,5 @@ class TaskController:
         if not tm.find_by_id(task_id):
             return error_response("Task not found", 404)
         tm.delete(task_id)
+        TaskRiskModel(current_app.db).delete(task_id)
         return success_response(None, "Task deleted")
@@ -3,26 +3,59 @@ Isolation Forest anomaly detection for daily progress reports.
 A report is flagged if the hours_worked vs progress_delta ratio is implausible.
 """
 import os
-import joblib
 import numpy as np
 
-from ml.preprocess import build_anomaly_features
+from ml.preprocess import build_anomaly_matrix
+from ml.model_registry import registry
+from ml.compiled_forest import CompiledIsolationForest
 
-MODELS_DIR = os.path.join(os.path.dirname(__file__), 'saved_models')
-ANOMALY_MODEL_PATH = os.path.join(MODELS_DIR, 'anomaly_model.pkl')
+# 'sklearn' (default) or 'compiled' — see ml/compiled_forest.py
+ANOMALY_INFERENCE_ENGINE = os.getenv('ANOMALY_INFERENCE_ENGINE', 'sklearn')
 
-_anomaly_cache = None
+_compiled_cache = None
 
 
 def _load_anomaly_model():
-    global _anomaly_cache
-    if _anomaly_cache is None:
-        if not os.path.exists(ANOMALY_MODEL_PATH):
-            raise FileNotFoundError(
-                "anomaly_model.pkl not found. Run: python ml/train_model.py"
-            )
-        _anomaly_cache = joblib.load(ANOMALY_MODEL_PATH)
-    return _anomaly_cache
+    """
+    Active anomaly scorer from the registry; raises FileNotFoundError if
+    untrained. With the compiled engine this is a CompiledIsolationForest,
+    built from the memory-mapped arrays artifact when one was published.
+    """
+    return _load_anomaly_scorer()[1]
+
+
+def _load_anomaly_scorer():
+    """(model version, scorer) — _load_anomaly_model plus the version it serves."""
+    global _compiled_cache
+    if ANOMALY_INFERENCE_ENGINE != 'compiled':
+        handle = registry.get('anomaly')
+        return handle.version, handle.model
+
+    try:
+        handle = registry.get('anomaly', kind='arrays')
+    except FileNotFoundError:
+        handle = registry.get('anomaly')
+    if _compiled_cache is None or _compiled_cache[0] is not handle.model:
+        if handle.kind == 'arrays':
+            compiled = CompiledIsolationForest.from_arrays(handle.model['arrays'])
+        else:
+            compiled = CompiledIsolationForest.from_sklearn(handle.model)
+        _compiled_cache = (handle.model, compiled)
+    return handle.version, _compiled_cache[1]
+
+
+def score_features(iso, X):
+    """
+    Score a feature matrix with one pass over the trees.
+
+    Returns (scores, is_anomaly): IsolationForest.score_samples and the
+    boolean form of predict() == -1. predict is defined as
+    score_samples(X) - offset_ < 0, so deriving the label from the scores
+    gives the same answer as calling it, without traversing every tree a
+    second time. Works for the sklearn model and CompiledIsolationForest.
+    """
+    scores = np.asarray(iso.score_samples(X), dtype=float)
+    return scores, (scores - iso.offset_) < 0
 
 
 def check_progress_report(report: dict, prev_completion_percent: float = 0.0) -> dict:
@@ -37,35 +70,45 @@ def check_progress_report(report: dict, prev_completion_percent: float = 0.0) ->
             'reason': str | None
         }
     """
+    return check_progress_reports([report], [prev_completion_percent])[0]
+
+
+def check_progress_reports(reports: list, prev_completion_percents: list) -> list:
+    """Batch form of check_progress_report: one scoring pass for all reports."""
     try:
         iso = _load_anomaly_model()
     except FileNotFoundError:
         # If model not trained yet, skip anomaly check
-        return {'is_anomaly': False, 'anomaly_score': 0.0, 'reason': None}
-
-    report_with_prev = {**report, 'prev_completion_percent': prev_completion_percent}
-    features = build_anomaly_features(report_with_prev)
-
-    # predict returns -1 (anomaly) or 1 (normal)
-    prediction   = iso.predict(features)[0]
-    score        = float(iso.score_samples(features)[0])
-    is_anomaly   = (prediction == -1)
-
-    reason = None
-    if is_anomaly:
-        hours   = float(report.get('hours_worked', 0))
-        delta   = float(report.get('completion_percent', 0)) - prev_completion_percent
-        if hours > 12:
-            reason = f"Claimed {hours:.0f} hours worked is unusually high."
-        elif delta > 50:
-            reason = f"Progress jump of {delta:.0f}% in a single day is statistically unlikely."
-        elif hours > 0 and delta <= 0:
-            reason = f"Reported {hours:.0f} hours but no progress increase detected."
-        else:
-            reason = "Report pattern deviates significantly from historical norms."
+        return [{'is_anomaly': False, 'anomaly_score': 0.0, 'reason': None} for _ in reports]
+    if not reports:
+        return []
+
+    X = build_anomaly_matrix(
+        [float(r.get('hours_worked', 0)) for r in reports],
+        [float(r.get('completion_percent', 0)) for r in reports],
+        [float(p) for p in prev_completion_percents],
+    )
+    scores, flags = score_features(iso, X)
+
+    return [
+        {
+            # plain bool/float: NumPy scalars can't be stored by pymongo
+            'is_anomaly': bool(is_anomaly),
+            'anomaly_score': round(float(score), 4),
+            'reason': _anomaly_reason(report, prev) if is_anomaly else None,
+        }
+        for report, prev, score, is_anomaly in zip(reports, prev_completion_percents, scores, flags)
+    ]
+
 
-    return {
-        'is_anomaly': is_anomaly,
-        'anomaly_score': round(score, 4),
-        'reason': reason,
-    }
+def _anomaly_reason(report: dict, prev_completion_percent: float) -> str:
+    hours   = float(report.get('hours_worked', 0))
+    delta   = float(report.get('completion_percent', 0)) - prev_completion_percent
+    if hours > 12:
+        return f"Claimed {hours:.0f} hours worked is unusually high."
+    elif delta > 50:
+        return f"Progress jump of {delta:.0f}% in a single day is statistically unlikely."
+    elif hours > 0 and delta <= 0:
+        return f"Reported {hours:.0f} hours but no progress increase detected."
+    else:
+        return "Report pattern deviates significantly from historical norms."
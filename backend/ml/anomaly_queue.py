@@ -0,0 +1,197 @@
+"""
+Asynchronous anomaly scoring for progress submissions (opt-in with
+ASYNC_ANOMALY_SCORING=1).
+
+With it on, ProgressController.submit stores the report with
+anomaly_pending=True and returns; a bounded pool of worker threads then
+scores it, sets anomaly_flag on the stored document and creates the
+fraud alert if it is anomalous. When the queue is full submit() refuses
+the job and the caller scores inline, so a burst slows requests down
+instead of growing memory.
+
+shutdown() stops intake and waits for the queue to drain (up to a
+timeout); app.py registers it at exit. Reports still pending after that
+(or after a crash) are re-queued by recover_pending(), which app.py runs
+only in the process that takes the scheduler lease.
+"""
+import time
+import queue
+import logging
+import threading
+
+from models.alert_model import AlertModel
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AnomalyScoringPool:
+
+    def __init__(self, db, workers=2, max_queue=1000):
+        self.db       = db
+        self.progress = db['daily_progress']
+        self.alerts   = None            # AlertModel, built on first use: no Mongo round trip at startup
+        self.queue    = queue.Queue(maxsize=max_queue)
+
+        self._lock      = threading.Lock()
+        self._accepting = True
+        self._stats = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0,
+                       'flagged': 0, 'max_depth': 0, 'wait_seconds': 0.0, 'score_seconds': 0.0}
+        self._threads = [
+            threading.Thread(target=self._run, name=f'anomaly-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    # ── Intake ────────────────────────────────────────────────────────────────
+    def submit(self, report_id, report, prev_completion_percent, task_id, employee_id,
+               employee_name='An employee', task_name=None):
+        """
+        Queue one stored report for scoring. Returns False (and queues
+        nothing) if the pool is full or shutting down.
+        """
+        job = {
+            'report_id': report_id,
+            'hours_worked': float(report.get('hours_worked', 0)),
+            'completion_percent': float(report.get('completion_percent', 0)),
+            'prev_completion_percent': float(prev_completion_percent),
+            'task_id': task_id,
+            'employee_id': employee_id,
+            'employee_name': employee_name,
+            'task_name': task_name or task_id,
+            'queued_at': time.perf_counter(),
+        }
+        with self._lock:
+            if not self._accepting:
+                self._stats['rejected'] += 1
+                return False
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                self._stats['rejected'] += 1
+                return False
+            self._stats['submitted'] += 1
+            self._stats['max_depth'] = max(self._stats['max_depth'], self.queue.qsize())
+        return True
+
+    def recover_pending(self, limit=None):
+        """Re-queue reports left with anomaly_pending=True; returns how many were queued."""
+        self.progress.create_index('anomaly_pending', partialFilterExpression={'anomaly_pending': True})
+        cursor = self.progress.find({'anomaly_pending': True}).sort([('task_id', 1), ('date', 1), ('_id', 1)])
+        if limit:
+            cursor = cursor.limit(limit)
+        queued = 0
+        for doc in cursor:
+            prev = self.progress.find_one(
+                {'task_id': doc['task_id'], '$or': [
+                    {'date': {'$lt': doc.get('date')}},
+                    {'date': doc.get('date'), '_id': {'$lt': doc['_id']}},
+                ]},
+                {'completion_percent': 1},
+                sort=[('date', -1), ('_id', -1)],
+            )
+            prev_pct = float(prev.get('completion_percent', 0)) if prev else 0.0
+            if not self.submit(doc['_id'], doc, prev_pct, doc['task_id'], doc.get('employee_id')):
+                break
+            queued += 1
+        if queued:
+            logger.info(f"[AnomalyQueue] Re-queued {queued} pending reports")
+        return queued
+
+    # ── Workers ───────────────────────────────────────────────────────────────
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            try:
+                if job is _STOP:
+                    return
+                t0 = time.perf_counter()
+                self._process(job)
+                with self._lock:
+                    self._stats['completed']     += 1
+                    self._stats['wait_seconds']  += t0 - job['queued_at']
+                    self._stats['score_seconds'] += time.perf_counter() - t0
+            except Exception as e:
+                with self._lock:
+                    self._stats['failed'] += 1
+                logger.error(f"[AnomalyQueue] Scoring report {job.get('report_id')} failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _process(self, job):
+        from ml.anomaly_detection import check_progress_report
+
+        anomaly = check_progress_report(job, job['prev_completion_percent'])
+        # Only if the report still holds the scored values and nobody scored
+        # it yet: a resubmission the same day queues its own job, and a report
+        # re-queued by recover_pending() while this process still had it
+        # queued must raise one alert, not two
+        result = self.progress.update_one(
+            {'_id': job['report_id'], 'anomaly_pending': True, 'hours_worked': job['hours_worked'],
+             'completion_percent': job['completion_percent']},
+            {'$set': {'anomaly_flag': anomaly['is_anomaly'], 'anomaly_pending': False}},
+        )
+        if not (anomaly['is_anomaly'] and result.modified_count == 1):
+            return
+        with self._lock:
+            self._stats['flagged'] += 1
+        if self.alerts is None:
+            self.alerts = AlertModel(self.db)
+        self.alerts.create(
+            alert_type='fraud_detection',
+            severity='warning',
+            title='Suspicious Report Detected',
+            message=f'{job["employee_name"]} submitted a flagged report on "{job["task_name"]}". '
+                    f'{anomaly.get("reason", "")}',
+            task_id=job['task_id'],
+            employee_id=job['employee_id'],
+        )
+
+    # ── Metrics / shutdown ────────────────────────────────────────────────────
+    def metrics(self):
+        with self._lock:
+            s = dict(self._stats)
+            accepting = self._accepting
+        done = s['completed'] or 1
+        return {
+            'enabled': True,
+            'accepting': accepting,
+            'workers': sum(t.is_alive() for t in self._threads),
+            'queueDepth': self.queue.qsize(),
+            'queueCapacity': self.queue.maxsize,
+            'maxDepth': s['max_depth'],
+            'submitted': s['submitted'],
+            'rejected': s['rejected'],
+            'completed': s['completed'],
+            'failed': s['failed'],
+            'flagged': s['flagged'],
+            'avgWaitMs': round(s['wait_seconds'] / done * 1e3, 2),
+            'avgScoreMs': round(s['score_seconds'] / done * 1e3, 2),
+        }
+
+    def shutdown(self, timeout=30.0):
+        """
+        Stop taking jobs and wait for queued ones to finish. Returns True if
+        the queue drained within timeout; otherwise the remaining reports
+        stay anomaly_pending for recover_pending().
+        """
+        with self._lock:
+            if not self._accepting:
+                return self.queue.unfinished_tasks == 0
+            self._accepting = False
+        deadline = time.monotonic() + timeout
+        for _ in self._threads:
+            try:
+                self.queue.put(_STOP, timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Full:
+                break
+        for t in self._threads:
+            t.join(max(deadline - time.monotonic(), 0))
+        drained = not any(t.is_alive() for t in self._threads)
+        if drained:
+            logger.info(f"[AnomalyQueue] Drained: {self._stats['completed']} reports scored")
+        else:
+            logger.warning(f"[AnomalyQueue] Shutdown timed out with {self.queue.qsize()} jobs queued")
+        return drained
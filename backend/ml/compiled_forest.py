@@ -0,0 +1,227 @@
+"""
+Array-based evaluators for a fitted RandomForestClassifier / IsolationForest.
+
+Every tree is flattened into shared NumPy node arrays (feature, threshold,
+left/right children, per-leaf class distribution) and all trees are walked
+together with vectorized indexing, one depth level per step. This skips
+sklearn's per-call input validation and joblib thread dispatch, which
+dominate latency for the handful of rows a single API request scores.
+
+predict_proba reproduces sklearn's arithmetic exactly: inputs are cast to
+float32 before threshold comparison, leaf distributions are taken the way
+the installed DecisionTreeClassifier.predict_proba returns them, and per-tree
+probabilities are accumulated in estimator order before dividing by the
+number of trees. CompiledIsolationForest does the same for score_samples,
+with per-leaf path lengths precomputed exactly as IsolationForest.fit does.
+
+Both serialise to a dict of plain NumPy arrays (to_arrays / from_arrays),
+which joblib can memory-map so worker processes share the node arrays
+through the OS page cache instead of each unpickling its own copy.
+"""
+import numpy as np
+
+TREE_LEAF = -1
+
+# Rows evaluated per traversal pass; bounds the (n_trees x rows x classes) gather
+ROW_CHUNK = 4096
+
+
+def _tree_values_are_counts():
+    """
+    Before scikit-learn 1.4 tree_.value held weighted class counts and
+    DecisionTreeClassifier.predict_proba normalised them per call; since 1.4
+    it holds fractions and predict_proba returns them unchanged.
+    """
+    import sklearn
+    major, minor = (int(p) for p in sklearn.__version__.split('.')[:2])
+    return (major, minor) < (1, 4)
+
+
+class _CompiledTrees:
+    """Shared node arrays and the vectorized all-trees traversal."""
+
+    ARRAY_FIELDS = ('feature', 'threshold', 'children', 'value', 'roots')
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth):
+        self.feature   = feature      # (n_nodes,) int64   — split feature, 0 for leaves
+        self.threshold = threshold    # (n_nodes,) float64 — split threshold
+        self.children  = children     # (n_nodes, 2) int64 — [left, right]; leaves point to themselves
+        self.value     = value        # (n_nodes, ...) float64 — what a leaf contributes
+        self.roots     = roots        # (n_trees,) int64   — root node index of each tree
+        self.max_depth = int(max_depth)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def is_leaf(self):
+        return self.children[:, 0] == np.arange(len(self.children))
+
+    @staticmethod
+    def _flatten(trees, leaf_values, feature_maps=None):
+        """
+        Concatenate sklearn Tree objects into flat arrays.
+        feature_maps[i], if given, maps tree i's local feature ids to columns of X.
+        """
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset    = 0
+        max_depth = 0
+        for i, tree in enumerate(trees):
+            n     = tree.node_count
+            left  = tree.children_left.astype(np.int64)
+            right = tree.children_right.astype(np.int64)
+            is_leaf = left == TREE_LEAF
+            own     = np.arange(n, dtype=np.int64)
+
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.int64)
+            if feature_maps is not None:
+                feature = np.asarray(feature_maps[i], dtype=np.int64)[feature]
+
+            features.append(feature)
+            thresholds.append(tree.threshold.astype(np.float64))
+            children.append(np.column_stack([
+                np.where(is_leaf, own, left), np.where(is_leaf, own, right)
+            ]) + offset)
+            values.append(leaf_values[i])
+            roots.append(offset)
+            offset   += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return dict(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+        )
+
+    def apply(self, X):
+        """Return the leaf node index reached in every tree: shape (n_trees, n_rows)."""
+        X32  = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X32.shape
+        flat_x   = X32.ravel()
+        row_base = (np.arange(n_rows, dtype=np.int64) * n_features)[np.newaxis, :]
+        flat_children = self.children.ravel()
+
+        node = np.repeat(self.roots[:, np.newaxis], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            # ~(x <= t) rather than x > t so NaN goes right, as in sklearn
+            go_right = ~(flat_x[row_base + self.feature[node]] <= self.threshold[node])
+            node = flat_children[2 * node + go_right]
+        return node
+
+    def _sum_leaf_values(self, X):
+        """Sum of leaf values over trees, added in estimator order, chunked by rows."""
+        X = np.asarray(X)
+        if X.ndim != 2:
+            raise ValueError(f"Expected a 2D array, got shape {X.shape}")
+        out = np.empty((len(X),) + self.value.shape[1:], dtype=np.float64)
+        for start in range(0, len(X), ROW_CHUNK):
+            leaves = self.apply(X[start:start + ROW_CHUNK])
+            # accumulate is strictly sequential; reduce may switch to pairwise summation
+            out[start:start + ROW_CHUNK] = np.add.accumulate(self.value[leaves], axis=0)[-1]
+        return out
+
+    def to_arrays(self):
+        """Plain dict of arrays/scalars suitable for joblib.dump(..., compress=0)."""
+        arrays = {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+        arrays['max_depth'] = self.max_depth
+        arrays['kind'] = type(self).__name__
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        kwargs = {k: v for k, v in arrays.items() if k != 'kind'}
+        if arrays.get('kind', cls.__name__) != cls.__name__:
+            raise TypeError(f"Arrays hold a {arrays['kind']}, not a {cls.__name__}")
+        return cls(**kwargs)
+
+
+class CompiledForest(_CompiledTrees):
+    """Flat-array equivalent of RandomForestClassifier.predict_proba / predict."""
+
+    ARRAY_FIELDS = _CompiledTrees.ARRAY_FIELDS + ('classes_',)
+
+    def __init__(self, feature, threshold, children, value, roots, classes_, max_depth):
+        super().__init__(feature, threshold, children, value, roots, max_depth)
+        self.classes_ = classes_
+
+    @classmethod
+    def from_sklearn(cls, clf):
+        """Compile a fitted RandomForestClassifier. Raises TypeError if unsupported."""
+        estimators = getattr(clf, 'estimators_', None)
+        if not estimators or getattr(clf, 'n_outputs_', 1) != 1 or not hasattr(clf, 'classes_'):
+            raise TypeError(f"Cannot compile {type(clf).__name__}: need a fitted single-output forest classifier")
+
+        n_classes = len(clf.classes_)
+        normalise = _tree_values_are_counts()
+        leaf_values = []
+        for est in estimators:
+            proba = est.tree_.value[:, 0, :n_classes].astype(np.float64, copy=True)
+            if normalise:
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                proba /= normalizer
+            leaf_values.append(proba)
+
+        flat = cls._flatten([est.tree_ for est in estimators], leaf_values)
+        return cls(classes_=np.asarray(clf.classes_), **flat)
+
+    def predict_proba(self, X):
+        proba = self._sum_leaf_values(X)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+class CompiledIsolationForest(_CompiledTrees):
+    """Flat-array equivalent of IsolationForest.score_samples / decision_function / predict."""
+
+    ARRAY_FIELDS = _CompiledTrees.ARRAY_FIELDS + ('denominator', 'offset_')
+
+    def __init__(self, feature, threshold, children, value, roots, denominator, offset_, max_depth):
+        super().__init__(feature, threshold, children, value, roots, max_depth)
+        self.denominator = float(denominator)
+        self.offset_     = float(offset_)
+
+    @classmethod
+    def from_sklearn(cls, iso):
+        """Compile a fitted IsolationForest. Raises TypeError if unsupported."""
+        from sklearn.ensemble._iforest import _average_path_length
+
+        estimators = getattr(iso, 'estimators_', None)
+        if not estimators or not hasattr(iso, 'offset_'):
+            raise TypeError(f"Cannot compile {type(iso).__name__}: need a fitted IsolationForest")
+
+        trees = [est.tree_ for est in estimators]
+        # Per-node contribution, as IsolationForest._compute_score_samples adds it
+        leaf_values = [
+            np.asarray(depth, dtype=np.float64) + np.asarray(avg_len, dtype=np.float64) - 1.0
+            for depth, avg_len in zip(iso._decision_path_lengths, iso._average_path_length_per_tree)
+        ]
+        feature_maps = None
+        if iso._max_features != iso.n_features_in_:
+            feature_maps = iso.estimators_features_
+
+        flat = cls._flatten(trees, leaf_values, feature_maps)
+        denominator = len(estimators) * _average_path_length([iso._max_samples])
+        return cls(denominator=float(np.asarray(denominator).ravel()[0]), offset_=iso.offset_, **flat)
+
+    def score_samples(self, X):
+        depths = self._sum_leaf_values(X)
+        # For a single training sample denominator and depth are 0; sklearn scores that as 1
+        scores = 2 ** (-np.divide(depths, self.denominator, out=np.ones_like(depths),
+                                  where=self.denominator != 0))
+        return -scores
+
+    def decision_function(self, X):
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X):
+        is_inlier = np.ones(len(X), dtype=int)
+        is_inlier[self.decision_function(X) < 0] = -1
+        return is_inlier
@@ -0,0 +1,131 @@
+"""
+Incremental project risk: re-score only the tasks whose inputs changed and
+re-aggregate the project from stored per-task results (task_risk collection).
+
+A stored result is reused when all of these hold:
+  - the doc is not marked dirty (progress submit, task update and trust
+    change writers mark their tasks dirty)
+  - its fingerprint still matches: a hash of the task doc, the assignee's
+    name and trust score, the model version and today's date. This also
+    catches edits made outside the controllers and the daily shift of
+    days_remaining / predicted completion dates.
+
+Progress history is not part of the fingerprint (hashing it would mean
+reading it); new reports reach the task through the dirty flag instead.
+A refresh therefore reads progress only for the tasks it re-scores, and
+with a feature-state model that is one small running-aggregate doc per
+task instead of its whole history.
+"""
+import json
+import hashlib
+from datetime import date
+
+from ml.predict import score_tasks, aggregate_project_risk, current_model_version
+from ml.prediction_cache import prediction_cache, incremental_key
+
+
+def task_fingerprint(task: dict, user_map: dict, model_version: str, as_of: date = None) -> str:
+    assignee = user_map.get(str(task.get('assignee_id', '')))
+    material = {
+        'task': task,
+        'assignee': [assignee.get('name'), assignee.get('trust_score', 80)] if assignee else None,
+        'model': model_version,
+        'date': (as_of or date.today()).isoformat(),
+    }
+    blob = json.dumps(material, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def refresh_project_risk(project: dict, tasks: list, user_map: dict, progress_model, task_risk_model,
+                         feature_state_model=None):
+    """
+    Bring the project's stored task results up to date and aggregate them.
+    With feature_state_model, re-scored tasks read their TaskFeatureStateModel
+    doc rather than the full daily_progress history.
+
+    Returns (payload, n_rescored). The payload has the predict_project_risk
+    shape; results for tasks no longer stored (e.g. lost a dirty race) are
+    still included from this refresh. Payloads are memoised in
+    ml.prediction_cache under the tasks' fingerprints and dirty_seqs, so a
+    project polled with no change since is served without aggregating.
+    """
+    version = current_model_version()
+    stored  = {d['task_id']: d for d in task_risk_model.get_by_tasks([str(t['_id']) for t in tasks])}
+
+    stale = []
+    fingerprints = {}
+    for task in tasks:
+        tid = str(task['_id'])
+        fingerprints[tid] = task_fingerprint(task, user_map, version)
+        doc = stored.get(tid)
+        if doc is None or doc.get('dirty', True) or doc.get('fingerprint') != fingerprints[tid]:
+            stale.append(task)
+
+    key = incremental_key(project, fingerprints,
+                          {tid: doc.get('dirty_seq') for tid, doc in stored.items()}, version)
+    # A hit means these exact inputs were already scored and their results saved
+    cached = prediction_cache.get(key)
+    if cached is not None:
+        return cached, 0
+
+    fresh = {}
+    if stale:
+        stale_ids = [str(t['_id']) for t in stale]
+        if feature_state_model is not None:
+            progress_map = feature_state_model.get_or_rebuild(stale_ids, progress_model)
+        else:
+            progress_map = {tid: progress_model.get_history_by_task(tid) for tid in stale_ids}
+        version, results = score_tasks(stale, progress_map, user_map)
+        entries = []
+        for task, result in zip(stale, results):
+            tid = str(task['_id'])
+            fresh[tid] = result
+            entries.append({
+                'task_id': tid,
+                'project_id': str(task.get('project_id', '')),
+                'assignee_id': str(task.get('assignee_id', '')),
+                'fingerprint': fingerprints[tid],
+                'model_version': version,
+                'result': result,
+                'seen_seq': stored.get(tid, {}).get('dirty_seq'),
+            })
+        task_risk_model.save_results(entries)
+
+    task_results = [
+        fresh.get(str(t['_id'])) or stored[str(t['_id'])]['result'] for t in tasks
+    ]
+    payload = aggregate_project_risk(project, task_results, version)
+    # Saved results keep the dirty_seq they were read with, so the next clean
+    # refresh computes this same key; a lost dirty race changes it
+    prediction_cache.put(key, project.get('_id', ''), payload)
+    return payload, len(stale)
+
+
+def dirty_seqs(task_risk_model, task_ids) -> dict:
+    """{task_id: dirty_seq} snapshot; take it before reading progress history."""
+    return {d['task_id']: d.get('dirty_seq') for d in task_risk_model.get_by_tasks(task_ids)}
+
+
+def store_task_results(task_risk_model, tasks: list, task_results: list, user_map: dict,
+                       model_version: str, seen_seqs: dict):
+    """
+    Persist results scored elsewhere (e.g. the daily portfolio batch) so the
+    next refresh can reuse them. task_results may be in any order; seen_seqs
+    is the dirty_seqs() snapshot taken before the inputs were read.
+    """
+    by_id = {r['_id']: r for r in task_results}
+    entries = []
+    for task in tasks:
+        tid = str(task['_id'])
+        if tid not in by_id:
+            continue
+        entries.append({
+            'task_id': tid,
+            'project_id': str(task.get('project_id', '')),
+            'assignee_id': str(task.get('assignee_id', '')),
+            'fingerprint': task_fingerprint(task, user_map, model_version),
+            'model_version': model_version,
+            'result': by_id[tid],
+            'seen_seq': seen_seqs.get(tid),
+        })
+    return task_risk_model.save_results(entries)
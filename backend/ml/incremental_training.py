@@ -0,0 +1,210 @@
+"""
+Warm-start incremental retraining of the risk forest.
+
+Instead of refitting every tree on the whole history, each run fits one
+cohort of COHORT_TREES new trees on the rows whose outcome became known
+since the active model's training cutoff (ml/training_data.collect_rows),
+appends them to the active RandomForestClassifier and retires the oldest
+trees beyond MAX_TREES. The forest is therefore a sliding window of daily
+cohorts: its size is bounded, and each run's cost depends on one day's
+rows (capped at COHORT_MAX_ROWS) and COHORT_TREES, not on history length.
+
+Before the result is promoted, the current and candidate forests are both
+scored (macro-F1) on a holdout of the new rows, split by task so the
+holdout tasks were not trained on. The candidate is published either way,
+with its cohorts and scores in the manifest, but only activated if it is
+no more than MAX_F1_DROP worse.
+
+The cohort list (cutoff date, tree count, rows) is kept in the version's
+manifest metadata; the cutoff of a model without one (e.g. from
+train_model.py) is its publish date. Forests of other estimator types
+(e.g. a --select'ed HistGradientBoosting model) are left alone.
+
+Registered as the 'incremental_retrain' scheduler job when
+RISK_INCREMENTAL_RETRAIN=1, or run by hand:
+    python ml/incremental_training.py
+    python ml/incremental_training.py --no-activate
+"""
+import os
+import sys
+import copy
+import time
+import argparse
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.model_registry import registry
+
+COHORT_TREES    = int(os.getenv('RISK_COHORT_TREES', 20))
+MAX_TREES       = int(os.getenv('RISK_MAX_TREES', 200))
+COHORT_MAX_ROWS = int(os.getenv('RISK_COHORT_MAX_ROWS', 200_000))
+MIN_COHORT_ROWS = int(os.getenv('RISK_MIN_COHORT_ROWS', 200))
+MAX_F1_DROP     = float(os.getenv('RISK_RETRAIN_MAX_F1_DROP', 0.01))
+HOLDOUT_FRACTION = 0.2
+
+
+def _cohorts(handle, clf):
+    """(training cutoff, cohort list) of the active version."""
+    info = registry.version_info('risk', handle.version) or {}
+    cutoff = info.get('training_cutoff')
+    if cutoff is None:
+        created = info.get('created_at')
+        cutoff = (datetime.fromisoformat(created).date() if created
+                  else datetime.fromtimestamp(os.path.getmtime(handle.path)).date()).isoformat()
+    cohorts = info.get('cohorts') or [{'cutoff': cutoff, 'trees': len(clf.estimators_), 'rows': info.get('train_rows')}]
+    return date.fromisoformat(cutoff), [dict(c) for c in cohorts]
+
+
+def _align_classes(tree, tree_classes, classes):
+    """
+    A copy of a cohort tree whose outputs cover every class of the forest.
+    Trees fitted on rows missing a class have narrower leaf values; the
+    missing columns are filled with zeros.
+    """
+    from sklearn.tree._tree import Tree
+
+    if np.array_equal(tree_classes, classes):
+        return tree
+    cols   = np.searchsorted(classes, tree_classes)
+    state  = tree.tree_.__getstate__()
+    values = np.zeros((state['values'].shape[0], 1, len(classes)))
+    values[:, :, cols] = state['values']
+    aligned_tree = Tree(tree.n_features_in_, np.array([len(classes)], dtype=np.intp), 1)
+    aligned_tree.__setstate__({**state, 'values': values})
+
+    aligned = copy.copy(tree)
+    aligned.tree_      = aligned_tree
+    aligned.n_classes_ = len(classes)
+    aligned.classes_   = np.arange(len(classes), dtype=float)
+    return aligned
+
+
+def extend_forest(clf, cohort, cohorts, new_cohort, max_trees):
+    """
+    A new forest: clf's trees plus cohort's, minus the oldest beyond
+    max_trees. clf is not modified. Returns (forest, cohorts).
+    """
+    new_trees = [_align_classes(t, cohort.classes_, clf.classes_) for t in cohort.estimators_]
+    trees     = list(clf.estimators_) + new_trees
+    cohorts   = [dict(c) for c in cohorts] + [new_cohort]
+
+    excess = len(trees) - max_trees
+    if excess > 0:
+        trees = trees[excess:]
+        while excess > 0:
+            dropped = min(excess, cohorts[0]['trees'])
+            cohorts[0]['trees'] -= dropped
+            excess -= dropped
+            if cohorts[0]['trees'] == 0:
+                cohorts.pop(0)
+
+    forest = copy.copy(clf)
+    forest.estimators_  = trees
+    forest.n_estimators = len(trees)
+    return forest, cohorts
+
+
+def retrain_incremental(db, as_of: date = None, activate=True, log=print) -> dict:
+    """
+    Run one incremental round. Returns a summary dict whose 'status' is
+    promoted, rejected (published inactive) or skipped (with a reason).
+    """
+    from sklearn.base import clone
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import f1_score
+    from ml.train_model import LABEL_MAP, _publish_risk_model, _group_split
+    from ml.preprocess import FEATURE_COLUMNS
+    from ml.training_data import collect_rows
+
+    as_of  = as_of or date.today()
+    registry.reload('risk')          # build on the manifest's active version, not a stale handle
+    handle = registry.get('risk')
+    clf    = handle.model['model']
+    if not isinstance(clf, RandomForestClassifier):
+        return {'status': 'skipped', 'reason': f'active model is a {type(clf).__name__}, not a random forest'}
+
+    since, cohorts = _cohorts(handle, clf)
+    if since >= as_of:
+        return {'status': 'skipped', 'reason': f'already trained through {since}'}
+
+    t0 = time.perf_counter()
+    rows = collect_rows(db, since=since, as_of=as_of)
+    read_seconds = time.perf_counter() - t0
+    n = len(rows['label'])
+    if n > COHORT_MAX_ROWS:
+        idx  = np.sort(np.random.default_rng(as_of.toordinal()).choice(n, COHORT_MAX_ROWS, replace=False))
+        rows = {k: v[idx] for k, v in rows.items()}
+    X = np.column_stack([rows[c] for c in FEATURE_COLUMNS])
+    y, groups = rows['label'].astype(int), rows['group']
+    if len(y) < MIN_COHORT_ROWS or len(np.unique(groups)) < 2:
+        return {'status': 'skipped', 'reason': f'{len(y)} new rows since {since} (need {MIN_COHORT_ROWS})'}
+    if not np.isin(np.unique(y), clf.classes_).all():
+        return {'status': 'skipped', 'reason': 'new rows have classes the forest was not trained on'}
+
+    X_train, X_hold, y_train, y_hold, _, _ = _group_split(X, y, groups, test_size=HOLDOUT_FRACTION)
+    if len(np.unique(y_train)) < 2:
+        return {'status': 'skipped', 'reason': 'new training rows have a single class'}
+
+    t0 = time.perf_counter()
+    cohort = clone(clf).set_params(n_estimators=COHORT_TREES, warm_start=False,
+                                   random_state=as_of.toordinal())
+    cohort.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - t0
+
+    candidate, new_cohorts = extend_forest(clf, cohort, cohorts, {
+        'cutoff': as_of.isoformat(), 'trees': COHORT_TREES, 'rows': int(len(y_train)),
+    }, MAX_TREES)
+
+    labels = list(LABEL_MAP)
+    current_f1   = float(f1_score(y_hold, clf.predict(X_hold), labels=labels, average='macro', zero_division=0))
+    candidate_f1 = float(f1_score(y_hold, candidate.predict(X_hold), labels=labels, average='macro', zero_division=0))
+    promoted = candidate_f1 >= current_f1 - MAX_F1_DROP
+
+    version = f"{as_of:%Y%m%d}-inc-{datetime.now(timezone.utc):%H%M%S%f}"
+    version, _ = _publish_risk_model(candidate, version, activate and promoted, metadata={
+        'training_cutoff': as_of.isoformat(),
+        'cohorts': new_cohorts,
+        'base_version': handle.version,
+        'holdout_rows': int(len(y_hold)),
+        'holdout_f1': round(candidate_f1, 4),
+        'base_holdout_f1': round(current_f1, 4),
+        'promoted': promoted,
+    })
+    summary = {
+        'status': 'promoted' if promoted else 'rejected',
+        'version': version,
+        'base_version': handle.version,
+        'since': since.isoformat(),
+        'train_rows': int(len(y_train)),
+        'holdout_rows': int(len(y_hold)),
+        'holdout_f1': round(candidate_f1, 4),
+        'base_holdout_f1': round(current_f1, 4),
+        'trees': len(candidate.estimators_),
+        'cohorts': len(new_cohorts),
+        'read_seconds': round(read_seconds, 2),
+        'fit_seconds': round(fit_seconds, 2),
+    }
+    log(f"[Retrain] {summary['status']} {version}: {summary['train_rows']} rows since {since}, "
+        f"holdout F1 {current_f1:.4f} → {candidate_f1:.4f}, {summary['trees']} trees in "
+        f"{summary['cohorts']} cohorts (read {read_seconds:.1f}s, fit {fit_seconds:.1f}s)")
+    return summary
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Add a cohort of trees trained on new outcomes to the risk forest.')
+    parser.add_argument('--no-activate', action='store_true', help='publish without activating even if it passes')
+    parser.add_argument('--as-of', help='training cutoff date (default: today)')
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/risk_predictions'))
+    result = retrain_incremental(client.get_default_database(),
+                                 as_of=date.fromisoformat(args.as_of) if args.as_of else None,
+                                 activate=not args.no_activate)
+    print(result)
@@ -0,0 +1,253 @@
+"""
+Versioned model registry with hot reload.
+
+Layout under ml/saved_models/:
+    manifest.json                      {"risk": {"active": "<version>", "versions": [...]}, ...}
+    risk/<version>/model.joblib        {'model': RandomForestClassifier, 'label_map': {...}}
+    risk/<version>/arrays.joblib       {'arrays': CompiledForest.to_arrays(), 'label_map': {...}}
+    anomaly/<version>/model.joblib     IsolationForest
+    anomaly/<version>/arrays.joblib    {'arrays': CompiledIsolationForest.to_arrays()}
+
+arrays.joblib is written uncompressed and loaded with mmap_mode='r', so every
+process serving the same version maps the same pages from the OS page cache.
+The sklearn pickle cannot be shared that way: Tree.__setstate__ copies its
+node arrays into private memory.
+
+Models without a manifest entry fall back to the legacy flat files
+(risk_model.pkl / anomaly_model.pkl) so existing installs keep working.
+
+A background watcher polls the manifest (and legacy file) mtimes. When the
+active version changes it loads the new artifact on the watcher thread and
+swaps the handle in with a single reference assignment. Requests take one
+handle at the start and use it throughout, so the previous model stays in
+memory until the last in-flight request holding it finishes.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+MODELS_DIR    = os.path.join(os.path.dirname(__file__), 'saved_models')
+MANIFEST_PATH = os.path.join(MODELS_DIR, 'manifest.json')
+ARTIFACTS     = {'model': 'model.joblib', 'arrays': 'arrays.joblib'}
+
+LEGACY_PATHS = {
+    'risk':    os.path.join(MODELS_DIR, 'risk_model.pkl'),
+    'anomaly': os.path.join(MODELS_DIR, 'anomaly_model.pkl'),
+}
+
+ModelHandle = namedtuple('ModelHandle', ['name', 'kind', 'version', 'model', 'path', 'loaded_at'])
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ModelRegistry:
+    def __init__(self, models_dir=MODELS_DIR):
+        self.models_dir    = models_dir
+        self.manifest_path = os.path.join(models_dir, 'manifest.json')
+        self._handles  = {}               # (name, kind) -> ModelHandle (swapped atomically)
+        self._previous = {}               # (name, kind) -> ModelHandle replaced by the last swap
+        self._absent   = {}               # (name, kind) -> active version without that artifact
+        self._load_lock = threading.Lock()
+        self._watcher   = None
+        self._stop      = threading.Event()
+        self._seen_mtimes = {}
+
+    # ── Manifest ─────────────────────────────────────────────────────────────
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest):
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, 'w') as fh:
+            json.dump(manifest, fh, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def artifact_path(self, name, version, kind='model'):
+        return os.path.join(self.models_dir, name, version, ARTIFACTS[kind])
+
+    def _resolve(self, name, kind='model'):
+        """Return (version, path) of the artifact that should be active for name."""
+        entry = self.read_manifest().get(name)
+        if entry and entry.get('active'):
+            version = entry['active']
+            return version, self.artifact_path(name, version, kind)
+        legacy = LEGACY_PATHS.get(name)
+        if kind == 'model' and legacy and os.path.exists(legacy):
+            return f"legacy-{int(os.path.getmtime(legacy))}", legacy
+        raise FileNotFoundError(
+            f"No '{name}' model found in {self.models_dir}. Run: python ml/train_model.py"
+        )
+
+    # ── Loading ──────────────────────────────────────────────────────────────
+    @staticmethod
+    def _load_artifact(name, kind, version, path):
+        import joblib
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model artifact missing: {path}")
+        t0 = time.perf_counter()
+        model = joblib.load(path, mmap_mode='r' if kind == 'arrays' else None)
+        logger.info(f"[ModelRegistry] Loaded {name}.{kind}@{version} in {time.perf_counter() - t0:.2f}s")
+        return ModelHandle(name, kind, version, model, path, datetime.now(timezone.utc))
+
+    def get(self, name, kind='model'):
+        """Return the active ModelHandle, loading it on first use."""
+        key = (name, kind)
+        handle = self._handles.get(key)
+        if handle is not None:
+            return handle
+        if key in self._absent:
+            raise FileNotFoundError(f"'{name}@{self._absent[key]}' has no {kind} artifact")
+        with self._load_lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                version, path = self._resolve_optional(name, kind)
+                if path is None or not os.path.exists(path):
+                    self._absent[key] = version
+                    raise FileNotFoundError(f"'{name}@{version}' has no {kind} artifact")
+                handle = self._load_artifact(name, kind, version, path)
+                self._handles[key] = handle
+            return handle
+
+    def _resolve_optional(self, name, kind):
+        """_resolve, but (version or None, None) when an optional kind has nothing to load."""
+        try:
+            return self._resolve(name, kind)
+        except FileNotFoundError:
+            if kind == 'model':
+                raise
+            return None, None
+
+    def reload(self, name, kind='model'):
+        """
+        Load the manifest's active version for name if it differs from the one
+        in memory, then swap it in. Returns True if a swap happened.
+        """
+        key = (name, kind)
+        version, path = self._resolve_optional(name, kind)
+        if kind != 'model' and (path is None or not os.path.exists(path)):
+            return self._evict(key, version)
+        current = self._handles.get(key)
+        if current is not None and current.version == version and current.path == path:
+            return False
+        handle = self._load_artifact(name, kind, version, path)
+        with self._load_lock:
+            self._previous[key] = self._handles.get(key)
+            self._handles[key] = handle
+            self._absent.pop(key, None)
+        old = self._previous[key]
+        logger.info(f"[ModelRegistry] Swapped {name}.{kind}: {old.version if old else None} → {version}")
+        return True
+
+    def _evict(self, key, version):
+        """
+        The active version has no artifact of this (optional) kind, e.g. an
+        HGB model or a rollback to a pre-arrays version: drop the old handle
+        so callers fall back to the 'model' kind instead of serving it.
+        """
+        with self._load_lock:
+            old = self._handles.pop(key, None)
+            self._absent[key] = version
+            if old is not None:
+                self._previous[key] = old
+        if old is None:
+            return False
+        logger.info(f"[ModelRegistry] {key[0]}@{version} has no {key[1]} artifact; "
+                    f"dropped {key[0]}.{key[1]}@{old.version}")
+        return True
+
+    def loaded(self):
+        """{'name.kind': version} of every artifact currently in memory."""
+        return {f"{name}.{kind}": h.version for (name, kind), h in self._handles.items()}
+
+    # ── Publishing ───────────────────────────────────────────────────────────
+    def publish(self, name, model, version=None, activate=True, metadata=None, arrays=None):
+        """
+        Write a new versioned artifact and (optionally) make it active.
+        arrays, if given, is written uncompressed next to it for mmap loading.
+        """
+        import joblib
+        version = version or datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+        path = self.artifact_path(name, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(model, path)
+        if arrays is not None:
+            joblib.dump(arrays, self.artifact_path(name, version, 'arrays'), compress=0)
+
+        manifest = self.read_manifest()
+        entry = manifest.setdefault(name, {'active': None, 'versions': []})
+        entry['versions'].append({
+            'version': version,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            **(metadata or {}),
+        })
+        if activate:
+            entry['active'] = version
+        self._write_manifest(manifest)
+        return version, path
+
+    def version_info(self, name, version):
+        """The manifest entry (created_at plus publish metadata) of a version, or None."""
+        entry = self.read_manifest().get(name, {})
+        return next((v for v in entry.get('versions', []) if v['version'] == version), None)
+
+    def activate(self, name, version):
+        """Point the manifest at an already-published version (e.g. a rollback)."""
+        if not os.path.exists(self.artifact_path(name, version)):
+            raise FileNotFoundError(f"{name}@{version} has not been published")
+        manifest = self.read_manifest()
+        manifest.setdefault(name, {'active': None, 'versions': []})['active'] = version
+        self._write_manifest(manifest)
+
+    # ── Watching ─────────────────────────────────────────────────────────────
+    def _watched_mtimes(self):
+        paths = [self.manifest_path, *LEGACY_PATHS.values()]
+        return {p: _mtime(p) for p in paths}
+
+    def check_for_updates(self):
+        """Reload any loaded model whose manifest entry or legacy file changed."""
+        mtimes = self._watched_mtimes()
+        if mtimes == self._seen_mtimes:
+            return
+        ok = True
+        for name, kind in list(self._handles) + [k for k in list(self._absent) if k not in self._handles]:
+            try:
+                self.reload(name, kind)
+            except Exception as e:
+                ok = False
+                logger.warning(f"[ModelRegistry] Reload of '{name}.{kind}' failed, keeping current model: {e}")
+        if ok:
+            self._seen_mtimes = mtimes
+
+    def start_watcher(self, interval_seconds=30):
+        if self._watcher is not None or interval_seconds <= 0:
+            return
+        self._seen_mtimes = self._watched_mtimes()
+
+        def _run():
+            while not self._stop.wait(interval_seconds):
+                self.check_for_updates()
+
+        self._watcher = threading.Thread(target=_run, name='model-registry-watcher', daemon=True)
+        self._watcher.start()
+        logger.info(f"[ModelRegistry] Watching {self.models_dir} every {interval_seconds}s")
+
+    def stop_watcher(self):
+        self._stop.set()
+
+
+registry = ModelRegistry()
@@ -0,0 +1,208 @@
+"""
+Latency-budgeted selection of the risk model.
+
+Fits a grid of candidate classifiers on the same split, scores each one for
+macro-F1 on a validation set and for p50/p99 predict_proba latency on this
+machine, and picks the most accurate candidate whose latency fits the budget.
+
+Candidate families:
+  rf-*       RandomForestClassifier, from the production 200x12 down to small
+             or shallow forests
+  hgb-*      HistGradientBoostingClassifier
+  distil-*   compact forests fitted to a teacher forest's labels on a larger
+             synthetic sample (knowledge distillation)
+
+Latency is measured the way the model will be served: forests go through
+CompiledForest when RISK_INFERENCE_ENGINE=compiled, everything else through
+sklearn. Single-row latency is what one API request pays per task; batch
+latency is what the daily pipeline pays per BATCH_ROWS tasks.
+"""
+import time
+from dataclasses import dataclass, field, asdict
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import f1_score
+
+from ml.compiled_forest import CompiledForest
+
+BATCH_ROWS     = 1000
+SINGLE_REPEATS = 300
+BATCH_REPEATS  = 30
+
+
+@dataclass
+class Candidate:
+    name: str
+    family: str
+    model: object = field(repr=False)
+    params: dict = field(default_factory=dict)
+    fit_s: float = 0.0
+    val_f1: float = 0.0
+    test_f1: float = 0.0
+    single_p50_ms: float = 0.0
+    single_p99_ms: float = 0.0
+    batch_p50_ms: float = 0.0
+    batch_p99_ms: float = 0.0
+    pareto: bool = False
+
+    def report(self):
+        row = asdict(self)
+        row.pop('model')
+        return row
+
+
+def candidate_grid(random_state=42):
+    """(name, family, unfitted estimator) for every non-distilled candidate."""
+    grid = []
+    for n_estimators, max_depth in ((200, 12), (100, 12), (50, 12), (25, 12),
+                                    (100, 8), (50, 8), (50, 6), (25, 6)):
+        grid.append((f"rf-{n_estimators}x{max_depth}", 'random_forest', RandomForestClassifier(
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            min_samples_split=5,
+            class_weight='balanced',
+            random_state=random_state,
+            n_jobs=-1,
+        )))
+    for max_iter, max_depth in ((200, None), (100, 6), (50, 4)):
+        grid.append((f"hgb-{max_iter}x{max_depth or 'auto'}", 'hist_gradient_boosting',
+                     HistGradientBoostingClassifier(
+                         max_iter=max_iter,
+                         max_depth=max_depth,
+                         learning_rate=0.1,
+                         class_weight='balanced',
+                         random_state=random_state,
+                     )))
+    return grid
+
+
+def distilled_grid(random_state=42):
+    """Compact student forests; single-threaded since they are meant for one-row calls."""
+    return [
+        (f"distil-{n}x{d}", 'distilled_forest', RandomForestClassifier(
+            n_estimators=n, max_depth=d, random_state=random_state, n_jobs=1,
+        ))
+        for n, d in ((30, 10), (15, 8))
+    ]
+
+
+def serving_predictor(model, engine='sklearn'):
+    """The object whose predict_proba predict.py would call for this model."""
+    if engine == 'compiled':
+        try:
+            return CompiledForest.from_sklearn(model)
+        except TypeError:
+            pass
+    return model
+
+
+def _percentiles_ms(fn, X, repeat):
+    fn(X)                                   # warm-up: lazy init, caches
+    times = np.empty(repeat)
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn(X)
+        times[i] = time.perf_counter() - t0
+    return float(np.percentile(times, 50) * 1e3), float(np.percentile(times, 99) * 1e3)
+
+
+def measure_latency(candidate, X_pool, engine='sklearn'):
+    predictor = serving_predictor(candidate.model, engine)
+    candidate.single_p50_ms, candidate.single_p99_ms = _percentiles_ms(
+        predictor.predict_proba, X_pool[:1], SINGLE_REPEATS)
+    candidate.batch_p50_ms, candidate.batch_p99_ms = _percentiles_ms(
+        predictor.predict_proba, X_pool[:BATCH_ROWS], BATCH_REPEATS)
+
+
+def _fit(name, family, estimator, X, y):
+    t0 = time.perf_counter()
+    estimator.fit(X, y)
+    return Candidate(name, family, estimator, params=_params(estimator), fit_s=time.perf_counter() - t0)
+
+
+def _params(estimator):
+    keys = ('n_estimators', 'max_depth', 'max_iter', 'learning_rate')
+    return {k: v for k, v in estimator.get_params().items() if k in keys}
+
+
+def mark_pareto(candidates):
+    """
+    Flag candidates not dominated on (val_f1 ↑, single_p99 ↓, batch_p99 ↓):
+    no other candidate is at least as good on all three and better on one.
+    """
+    def key(c):
+        return (c.val_f1, -c.single_p99_ms, -c.batch_p99_ms)
+
+    for c in candidates:
+        kc = key(c)
+        c.pareto = not any(
+            all(a >= b for a, b in zip(key(o), kc)) and key(o) != kc
+            for o in candidates if o is not c
+        )
+    return [c for c in candidates if c.pareto]
+
+
+def choose(candidates, single_budget_ms, batch_budget_ms=None):
+    """Most accurate candidate within budget (ties → lower single-row p99), or None."""
+    fits = [
+        c for c in candidates
+        if c.single_p99_ms <= single_budget_ms
+        and (batch_budget_ms is None or c.batch_p99_ms <= batch_budget_ms)
+    ]
+    if not fits:
+        return None
+    return max(fits, key=lambda c: (round(c.val_f1, 4), -c.single_p99_ms))
+
+
+def run_selection(splits, X_unlabelled, engine='sklearn', random_state=42, log=print):
+    """
+    splits:       (X_train, X_val, X_test, y_train, y_val, y_test)
+    X_unlabelled: extra feature rows the teacher labels for distillation
+
+    Returns every fitted and measured Candidate.
+    """
+    X_train, X_val, X_test, y_train, y_val, y_test = splits
+    candidates = []
+    for name, family, estimator in candidate_grid(random_state):
+        candidates.append(_fit(name, family, clone(estimator), X_train, y_train))
+        log(f"  fitted {name:<14} in {candidates[-1].fit_s:6.2f}s")
+
+    for c in candidates:
+        c.val_f1 = float(f1_score(y_val, c.model.predict(X_val), average='macro'))
+
+    # Distil from the most accurate forest: students learn its decision surface
+    # from many more (teacher-labelled) points than the labelled set provides
+    teacher = max((c for c in candidates if c.family == 'random_forest'), key=lambda c: c.val_f1)
+    X_distil = np.vstack([X_train, X_unlabelled])
+    y_distil = teacher.model.predict(X_distil)
+    for name, family, estimator in distilled_grid(random_state):
+        student = _fit(name, family, clone(estimator), X_distil, y_distil)
+        student.params['teacher'] = teacher.name
+        student.val_f1 = float(f1_score(y_val, student.model.predict(X_val), average='macro'))
+        candidates.append(student)
+        log(f"  fitted {name:<14} in {student.fit_s:6.2f}s (teacher {teacher.name})")
+
+    X_pool = np.vstack([X_val, X_test, X_train])
+    for c in candidates:
+        c.test_f1 = float(f1_score(y_test, c.model.predict(X_test), average='macro'))
+        measure_latency(c, X_pool, engine)
+
+    mark_pareto(candidates)
+    return candidates
+
+
+def format_table(candidates, selected=None):
+    lines = [
+        f"  {'candidate':<14} {'val F1':>7} {'test F1':>7} {'1-row p50/p99 (ms)':>19} "
+        f"{f'{BATCH_ROWS}-row p50/p99 (ms)':>22}  pareto"
+    ]
+    for c in sorted(candidates, key=lambda c: c.single_p99_ms):
+        mark = '  ← selected' if selected is not None and c is selected else ''
+        lines.append(
+            f"  {c.name:<14} {c.val_f1:>7.4f} {c.test_f1:>7.4f} "
+            f"{c.single_p50_ms:>8.3f} / {c.single_p99_ms:<8.3f} "
+            f"{c.batch_p50_ms:>9.2f} / {c.batch_p99_ms:<9.2f}  {'*' if c.pareto else ' '}{mark}"
+        )
+    return '\n'.join(lines)
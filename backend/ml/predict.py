@@ -2,91 +2,199 @@
 Load the saved Random Forest model and produce per-project risk predictions.
 """
 import os
-import joblib
+import time
 import numpy as np
 from datetime import datetime, date
 
-from ml.preprocess import build_task_features, build_feature_vector
+from ml.preprocess import build_task_features, build_feature_vector, build_feature_matrix, FEATURE_COLUMNS
+from ml.compiled_forest import CompiledForest
+from ml.prediction_cache import prediction_cache, prediction_key
+from ml.model_registry import registry
 
-MODELS_DIR = os.path.join(os.path.dirname(__file__), 'saved_models')
-RISK_MODEL_PATH = os.path.join(MODELS_DIR, 'risk_model.pkl')
+# 'sklearn' (default) or 'compiled' — the flat-array evaluator in ml/compiled_forest.py
+INFERENCE_ENGINES = ('sklearn', 'compiled')
+INFERENCE_ENGINE  = os.getenv('RISK_INFERENCE_ENGINE', 'sklearn')
+# Above this many rows sklearn's compiled tree loop beats NumPy traversal
+COMPILED_MAX_ROWS = 1000
 
-_model_cache = None
+_compiled_cache = None
+
+
+def _load_handle():
+    """
+    Active risk model handle from the registry; raises FileNotFoundError if
+    untrained. With the compiled engine, the memory-mapped arrays artifact is
+    preferred so the sklearn pickle is never loaded in this process.
+    """
+    if INFERENCE_ENGINE == 'compiled':
+        try:
+            return registry.get('risk', kind='arrays')
+        except FileNotFoundError:
+            pass
+    return registry.get('risk')
 
 
 def _load_model():
-    global _model_cache
-    if _model_cache is None:
-        if not os.path.exists(RISK_MODEL_PATH):
-            raise FileNotFoundError(
-                "risk_model.pkl not found. Run: python ml/train_model.py"
-            )
-        _model_cache = joblib.load(RISK_MODEL_PATH)
-    return _model_cache
+    return _load_handle().model
+
+
+def set_inference_engine(engine: str):
+    """Switch between the sklearn forest and the compiled evaluator at runtime."""
+    global INFERENCE_ENGINE
+    if engine not in INFERENCE_ENGINES:
+        raise ValueError(f"Unknown inference engine '{engine}'. Use one of {INFERENCE_ENGINES}")
+    INFERENCE_ENGINE = engine
+
+
+def _load_estimator(bundle: dict, n_rows: int = 1):
+    """
+    Return the object used for predict_proba: the sklearn model, or its
+    compiled form when INFERENCE_ENGINE is 'compiled' and the batch has at
+    most COMPILED_MAX_ROWS rows. Both give identical probabilities; models
+    the compiler does not support are always served by sklearn.
+
+    A memory-mapped arrays bundle has no sklearn model, so it serves every
+    batch size.
+    """
+    global _compiled_cache
+    if 'arrays' not in bundle and (INFERENCE_ENGINE != 'compiled' or n_rows > COMPILED_MAX_ROWS):
+        return bundle['model']
+    if _compiled_cache is None or _compiled_cache[0] is not bundle:
+        try:
+            if 'arrays' in bundle:
+                compiled = CompiledForest.from_arrays(bundle['arrays'])
+            else:
+                compiled = CompiledForest.from_sklearn(bundle['model'])
+        except TypeError:
+            compiled = bundle['model']
+        _compiled_cache = (bundle, compiled)
+    return _compiled_cache[1]
 
 
 RISK_LEVEL_SCORE = {'Low': 15, 'Medium': 40, 'High': 70, 'Critical': 90}
 SEVERITY_MAP     = {'Low': 'Safe', 'Medium': 'Warning', 'High': 'High Risk', 'Critical': 'Critical'}
 
+# Max rows per predict_proba call when scoring a whole portfolio
+PORTFOLIO_CHUNK_ROWS = 50_000
 
-def predict_project_risk(project: dict, tasks: list, progress_map: dict, user_map: dict) -> dict:
+
+def predict_project_risk(project: dict, tasks: list, progress_map: dict, user_map: dict,
+                         use_cache: bool = True) -> dict:
     """
     progress_map: {task_id: [progress_doc, ...]}
     user_map:     {user_id: user_doc}
 
     Returns the frontend-compatible risk payload:
     {
-        projectName, overallRisk, riskPercent, confidence,
+        projectName, overallRisk, riskPercent, confidence, modelVersion,
         tasks: [{_id, name, employee, completionPercent, daysRemaining,
-                 predictedCompletion, riskLevel, reason, suggestedActions}]
+                 predictedCompletion, riskLevel, confidence, reason, suggestedActions}]
     }
+
+    All tasks are scored with one predict_proba call on a stacked feature matrix.
+    Results are memoised in ml.prediction_cache under a hash of all inputs.
     """
-    bundle = _load_model()
-    clf = bundle['model']
+    handle = _load_handle()
+    bundle = handle.model
+
+    key = None
+    if use_cache:
+        key = prediction_key(project, tasks, progress_map, user_map, handle.version)
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            return cached
+
+    clf = _load_estimator(bundle, len(tasks))
     label_map = bundle['label_map']
 
-    task_results = []
-    risk_scores  = []
+    rows = [_task_features(task, progress_map, user_map) for task in tasks]
+    X = np.vstack([build_feature_vector(feats) for _, feats, _ in rows]) if rows else None
+    labels, confidences = _score_matrix(clf, X)
 
-    for task in tasks:
-        tid = str(task.get('_id', ''))
-        progress_docs = progress_map.get(tid, [])
+    payload = _project_payload(project, rows, labels, confidences, label_map, handle.version)
+    if key is not None:
+        prediction_cache.put(key, project.get('_id', ''), payload)
+    return payload
 
-        assignee = user_map.get(str(task.get('assignee_id', '')))
-        employee_name  = assignee['name'] if assignee else 'Unassigned'
-        trust_score    = float(assignee.get('trust_score', 80)) if assignee else 80.0
-
-        feats  = build_task_features(task, progress_docs, trust_score)
-        vector = build_feature_vector(feats).reshape(1, -1)
-
-        label_idx   = clf.predict(vector)[0]
-        proba       = clf.predict_proba(vector)[0]
-        confidence  = round(float(np.max(proba)) * 100, 1)
-        risk_level  = label_map[label_idx]
-        risk_score  = RISK_LEVEL_SCORE[risk_level]
-        risk_scores.append(risk_score)
-
-        days_rem = int(feats['days_remaining'])
-        predicted_completion = _estimate_completion_date(
-            task.get('progress', 0), feats['avg_daily_progress'], days_rem
+
+def predict_portfolio_risk(projects: list, tasks_by_project: dict, progress_map: dict,
+                           user_map: dict, chunk_size: int = PORTFOLIO_CHUNK_ROWS,
+                           timings: dict = None) -> dict:
+    """
+    Score many projects at once.
+
+    tasks_by_project: {project_id: [task_doc, ...]}
+    progress_map:     {task_id: [progress_doc, ...]}   (across all projects)
+    user_map:         {user_id: user_doc}
+
+    Every task of every project is stacked into one feature matrix (built
+    column-wise by build_feature_matrix) and scored in chunks of at most
+    chunk_size rows, then split back per project.
+
+    timings: optional dict; the seconds spent building features and running
+    inference (model load included) are added under 'features' and 'inference'.
+
+    Returns {project_id: payload} where payload matches predict_project_risk.
+    """
+    t_load = time.perf_counter()
+    handle = _load_handle()
+    bundle = handle.model
+    label_map = bundle['label_map']
+
+    t0 = time.perf_counter()
+    all_tasks = [task for project in projects for task in tasks_by_project.get(str(project['_id']), [])]
+    all_rows, X = _task_rows(all_tasks, progress_map, user_map)
+    t1 = time.perf_counter()
+
+    rows_by_project = []
+    offset = 0
+    for project in projects:
+        n = len(tasks_by_project.get(str(project['_id']), []))
+        rows_by_project.append((project, all_rows[offset:offset + n]))
+        offset += n
+
+    labels, confidences = [], []
+    if len(X):
+        clf = _load_estimator(bundle, min(len(X), chunk_size))
+        for start in range(0, len(X), chunk_size):
+            chunk_labels, chunk_conf = _score_matrix(clf, X[start:start + chunk_size])
+            labels.extend(chunk_labels)
+            confidences.extend(chunk_conf)
+    if timings is not None:
+        timings['features']  = timings.get('features', 0.0) + t1 - t0
+        timings['inference'] = timings.get('inference', 0.0) + (t0 - t_load) + (time.perf_counter() - t1)
+
+    results = {}
+    offset  = 0
+    for project, rows in rows_by_project:
+        end = offset + len(rows)
+        results[str(project['_id'])] = _project_payload(
+            project, rows, labels[offset:end], confidences[offset:end], label_map, handle.version
         )
+        offset = end
+    return results
+
+
+def _project_payload(project: dict, rows: list, labels: list, confidences: list,
+                     label_map: dict, model_version: str) -> dict:
+    """Assemble the frontend risk payload from scored task rows."""
+    task_results = [
+        _task_result(task, feats, label_map[label_idx], confidence, employee_name)
+        for (task, feats, employee_name), label_idx, confidence in zip(rows, labels, confidences)
+    ]
+    return aggregate_project_risk(project, task_results, model_version)
 
-        reason, actions = _generate_insight(feats, risk_level, employee_name)
 
-        task_results.append({
-            '_id': tid,
-            'name': task.get('title', ''),
-            'employee': employee_name,
-            'completionPercent': int(task.get('progress', 0)),
-            'daysRemaining': max(days_rem, 0),
-            'predictedCompletion': predicted_completion,
-            'riskLevel': risk_level,
-            'reason': reason,
-            'suggestedActions': actions,
-        })
+def aggregate_project_risk(project: dict, task_results: list, model_version: str) -> dict:
+    """
+    Roll per-task results (as built by _task_result, in task order) up into
+    the project payload. Used both right after scoring and on task results
+    loaded from the task_risk collection.
+    """
+    risk_scores = [RISK_LEVEL_SCORE[t['riskLevel']] for t in task_results]
 
     # Sort: highest risk first
-    task_results.sort(key=lambda t: RISK_LEVEL_SCORE.get(t['riskLevel'], 0), reverse=True)
+    task_results = sorted(task_results, key=lambda t: RISK_LEVEL_SCORE.get(t['riskLevel'], 0), reverse=True)
 
     overall_score = round(float(np.mean(risk_scores)), 1) if risk_scores else 0
     overall_risk_label = (
@@ -102,10 +210,95 @@ def predict_project_risk(project: dict, tasks: list, progress_map: dict, user_ma
         'overallRisk': overall_risk_label,
         'riskPercent': overall_score,
         'confidence': avg_confidence,
+        'modelVersion': model_version,
         'tasks': task_results,
     }
 
 
+def score_tasks(tasks: list, progress_map: dict, user_map: dict):
+    """
+    Score tasks from any mix of projects with one predict_proba call.
+    Returns (model_version, [task_result, ...]) in the order of tasks.
+    """
+    handle = _load_handle()
+    bundle = handle.model
+    rows, X = _task_rows(tasks, progress_map, user_map)
+    labels, confidences = _score_matrix(_load_estimator(bundle, len(rows)), X)
+    return handle.version, [
+        _task_result(task, feats, bundle['label_map'][label_idx], confidence, employee_name)
+        for (task, feats, employee_name), label_idx, confidence in zip(rows, labels, confidences)
+    ]
+
+
+def current_model_version() -> str:
+    return _load_handle().version
+
+
+def _task_features(task: dict, progress_map: dict, user_map: dict):
+    """Return (task, feature dict, assignee name) for one task."""
+    tid = str(task.get('_id', ''))
+    progress_docs = progress_map.get(tid, [])
+
+    assignee = user_map.get(str(task.get('assignee_id', '')))
+    employee_name = assignee['name'] if assignee else 'Unassigned'
+    trust_score   = float(assignee.get('trust_score', 80)) if assignee else 80.0
+
+    return task, build_task_features(task, progress_docs, trust_score), employee_name
+
+
+def _task_rows(tasks: list, progress_map: dict, user_map: dict):
+    """
+    Batch counterpart of _task_features: ([(task, feature dict, assignee name)], X)
+    with X from build_feature_matrix, identical to stacking the scalar vectors.
+    """
+    trust_by_assignee = {uid: float(u.get('trust_score', 80)) for uid, u in user_map.items()}
+    X = build_feature_matrix(tasks, progress_map, trust_by_assignee)
+    rows = []
+    for task, x in zip(tasks, X):
+        assignee = user_map.get(str(task.get('assignee_id', '')))
+        rows.append((task, dict(zip(FEATURE_COLUMNS, x.tolist())), assignee['name'] if assignee else 'Unassigned'))
+    return rows, X
+
+
+def _score_matrix(clf, X):
+    """
+    Score a (n_tasks x n_features) matrix with a single predict_proba call.
+    Labels are derived from the probabilities exactly as clf.predict does,
+    so the forest is traversed once instead of twice per task.
+
+    Returns (labels, confidences) — confidence is the max class probability in %.
+    """
+    if X is None or len(X) == 0:
+        return [], []
+    proba = clf.predict_proba(X)
+    labels = clf.classes_.take(np.argmax(proba, axis=1))
+    confidences = np.round(np.max(proba, axis=1) * 100, 1)
+    return labels.tolist(), confidences.tolist()
+
+
+def _task_result(task: dict, feats: dict, risk_level: str, confidence: float, employee_name: str) -> dict:
+    """Build the frontend task payload for one scored task."""
+    days_rem = int(feats['days_remaining'])
+    predicted_completion = _estimate_completion_date(
+        task.get('progress', 0), feats['avg_daily_progress'], days_rem
+    )
+
+    reason, actions = _generate_insight(feats, risk_level, employee_name)
+
+    return {
+        '_id': str(task.get('_id', '')),
+        'name': task.get('title', ''),
+        'employee': employee_name,
+        'completionPercent': int(task.get('progress', 0)),
+        'daysRemaining': max(days_rem, 0),
+        'predictedCompletion': predicted_completion,
+        'riskLevel': risk_level,
+        'confidence': confidence,
+        'reason': reason,
+        'suggestedActions': actions,
+    }
+
+
 def _estimate_completion_date(current_progress: float, avg_daily: float, days_remaining: int) -> str:
     """Estimate ISO date when task will finish at current velocity."""
     remaining_pct = 100 - current_progress
@@ -0,0 +1,135 @@
+"""
+In-process cache of project risk payloads.
+
+Entries are keyed by a SHA-256 over everything the prediction depends on:
+the task docs, their progress history, the assignees' names and trust
+scores, the model version and today's date (days_remaining and the
+predicted completion dates move every day). A changed input therefore
+always misses; explicit invalidation on writes only frees stale entries
+early so they don't crowd out live ones.
+
+Payloads refreshed incrementally (ml/incremental_risk.py, the
+/api/risk/<id> path) use incremental_key instead: the task fingerprints
+already cover task docs, assignees, model and date, and each task's
+task_risk dirty_seq stands in for its progress history — every write
+that changes a task's inputs bumps it.
+
+Eviction is LRU, bounded by RISK_CACHE_MAX_ENTRIES, with a per-entry TTL
+of RISK_CACHE_TTL_SECONDS.
+"""
+import os
+import copy
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+
+
+class PredictionCache:
+    def __init__(self, max_entries=256, ttl_seconds=900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()   # key -> (expires_at, project_id, payload)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return a copy of the cached payload, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            payload = entry[2]
+        return copy.deepcopy(payload)
+
+    def put(self, key, project_id, payload):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, str(project_id), copy.deepcopy(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_project(self, project_id):
+        """Drop every entry computed for project_id."""
+        pid = str(project_id)
+        with self._lock:
+            stale = [k for k, entry in self._entries.items() if entry[1] == pid]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'maxEntries': self.max_entries,
+                'ttlSeconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+def prediction_key(project: dict, tasks: list, progress_map: dict, user_map: dict, model_version: str) -> str:
+    """Content hash of every input predict_project_risk reads."""
+    assignees = {}
+    for task in tasks:
+        uid = str(task.get('assignee_id', ''))
+        user = user_map.get(uid)
+        if user:
+            assignees[uid] = [user.get('name'), user.get('trust_score', 80)]
+
+    material = {
+        'project': [str(project.get('_id', '')), project.get('name', '')],
+        'tasks': tasks,
+        'progress': {str(t.get('_id', '')): progress_map.get(str(t.get('_id', '')), []) for t in tasks},
+        'assignees': assignees,
+        'model': model_version,
+        'date': date.today().isoformat(),
+    }
+    blob = json.dumps(material, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def incremental_key(project: dict, fingerprints: dict, dirty_seqs: dict, model_version: str) -> str:
+    """
+    Key for an incrementally refreshed payload. fingerprints: {task_id:
+    task_fingerprint}; dirty_seqs: {task_id: stored dirty_seq}, in task order.
+    """
+    material = {
+        'project': [str(project.get('_id', '')), project.get('name', '')],
+        'tasks': [[tid, fp, dirty_seqs.get(tid)] for tid, fp in fingerprints.items()],
+        'model': model_version,
+    }
+    blob = json.dumps(material, sort_keys=True, default=str, separators=(',', ':'))
+    return 'incremental:' + hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv('RISK_CACHE_MAX_ENTRIES', 256)),
+    ttl_seconds=int(os.getenv('RISK_CACHE_TTL_SECONDS', 900)),
+)
+
+
+def invalidate_project(project_id):
+    """Convenience hook for controllers that write prediction inputs."""
+    if project_id:
+        prediction_cache.invalidate_project(project_id)
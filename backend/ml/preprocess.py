@@ -3,45 +3,82 @@ Feature engineering: converts raw MongoDB docs into a numeric feature matrix
 that the Random Forest and Isolation Forest models can consume.
 """
 import numpy as np
-import pandas as pd
 from datetime import datetime, timezone, date
 
 
 PRIORITY_MAP = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
 
+FEATURE_COLUMNS = [
+    'progress', 'days_remaining', 'progress_gap', 'avg_daily_progress',
+    'needed_daily_velocity', 'priority_score', 'employee_trust_score',
+    'avg_hours_worked', 'overdue',
+]
 
-def _days_remaining(deadline_str: str) -> float:
-    """Return days from today to deadline (negative if overdue)."""
+DEFAULT_TRUST_SCORE = 80.0
+
+
+def _deadline_date(deadline_str):
+    """Deadline as a date, or None if it can't be parsed (treated as due today)."""
     try:
         if isinstance(deadline_str, str):
-            dl = datetime.fromisoformat(deadline_str.replace('Z', '+00:00')).date()
-        else:
-            dl = deadline_str.date() if hasattr(deadline_str, 'date') else date.today()
-        return (dl - date.today()).days
+            return datetime.fromisoformat(deadline_str.replace('Z', '+00:00')).date()
+        return deadline_str.date() if hasattr(deadline_str, 'date') else None
     except Exception:
-        return 0
+        return None
+
+
+def _days_remaining(deadline_str: str, as_of: date = None) -> float:
+    """Return days from today (or as_of) to deadline (negative if overdue)."""
+    dl = _deadline_date(deadline_str)
+    return (dl - (as_of or date.today())).days if dl is not None else 0
+
 
+def _sequential_mean(values) -> float:
+    """Mean with the sum taken strictly left to right, as build_feature_matrix does."""
+    arr = np.asarray(values, dtype=float)
+    return np.add.accumulate(arr)[-1] / len(arr)
 
-def build_task_features(task: dict, progress_docs: list, employee_trust_score: float = 80.0) -> dict:
+
+def state_averages(state: dict):
+    """
+    (avg_daily_progress, avg_hours_worked) from a task feature-state doc
+    (models/task_feature_state_model.py). The mean of consecutive deltas
+    telescopes to (last - first) / (count - 1).
+    """
+    count = int(state.get('count', 0))
+    if count >= 2:
+        avg_daily = (state['last_completion_percent'] - state['first_completion_percent']) / (count - 1)
+    elif count == 1:
+        avg_daily = state['last_completion_percent']
+    else:
+        avg_daily = 0
+    avg_hours = state.get('sum_hours', 0) / count if count else 0
+    return avg_daily, avg_hours
+
+
+def build_task_features(task: dict, progress_docs, employee_trust_score: float = 80.0,
+                        as_of: date = None) -> dict:
     """
     Build a flat feature dict for a single task.
-    progress_docs: list of daily_progress docs ordered by date (oldest first)
+    progress_docs: list of daily_progress docs ordered by date (oldest first),
+                   or the task's feature-state doc
     """
     progress = float(task.get('progress', 0))
-    days_rem = _days_remaining(task.get('deadline', ''))
+    days_rem = _days_remaining(task.get('deadline', ''), as_of)
     priority_score = PRIORITY_MAP.get(task.get('priority', 'medium'), 2)
 
     # Planned progress based on elapsed time
-    total_days = max(_days_remaining(task.get('deadline', '')) * -1 +
-                     max(days_rem, 0) + max(-days_rem, 0), 1)
+    total_days = max(days_rem * -1 + max(days_rem, 0) + max(-days_rem, 0), 1)
     elapsed_ratio = max(1 - (days_rem / total_days), 0) if total_days > 0 else 1
     expected_progress = elapsed_ratio * 100
     progress_gap = progress - expected_progress   # negative = behind
 
     # Average daily progress velocity
-    if len(progress_docs) >= 2:
+    if isinstance(progress_docs, dict):
+        avg_daily, avg_hours = state_averages(progress_docs)
+    elif len(progress_docs) >= 2:
         prog_values = [d.get('completion_percent', 0) for d in progress_docs]
-        avg_daily = np.mean(np.diff(prog_values)) if len(prog_values) > 1 else 0
+        avg_daily = _sequential_mean(np.diff(np.asarray(prog_values, dtype=float)))
     elif len(progress_docs) == 1:
         avg_daily = progress_docs[0].get('completion_percent', 0)
     else:
@@ -51,7 +88,8 @@ def build_task_features(task: dict, progress_docs: list, employee_trust_score: f
     needed_daily = (100 - progress) / max(days_rem, 1) if days_rem > 0 else 99
 
     # Average hours worked per day
-    avg_hours = np.mean([d.get('hours_worked', 0) for d in progress_docs]) if progress_docs else 0
+    if not isinstance(progress_docs, dict):
+        avg_hours = _sequential_mean([d.get('hours_worked', 0) for d in progress_docs]) if progress_docs else 0
 
     return {
         'progress': progress,
@@ -68,12 +106,144 @@ def build_task_features(task: dict, progress_docs: list, employee_trust_score: f
 
 def build_feature_vector(features: dict) -> np.ndarray:
     """Return a 1D numpy array in the canonical feature order."""
-    cols = [
-        'progress', 'days_remaining', 'progress_gap', 'avg_daily_progress',
-        'needed_daily_velocity', 'priority_score', 'employee_trust_score',
-        'avg_hours_worked', 'overdue',
-    ]
-    return np.array([features.get(c, 0) for c in cols], dtype=float)
+    return np.array([features.get(c, 0) for c in FEATURE_COLUMNS], dtype=float)
+
+
+def build_feature_matrix(tasks: list, progress_by_task: dict, trust_by_assignee: dict,
+                         as_of: date = None) -> np.ndarray:
+    """
+    Columnar equivalent of build_feature_vector(build_task_features(...)) for
+    many tasks: returns an (n_tasks x 9) float matrix, bit-identical row for
+    row to the scalar path.
+
+    progress_by_task:  {task_id: [progress_doc, ...]} ordered by date (oldest first),
+                       or {task_id: feature-state doc}; the two may be mixed
+    trust_by_assignee: {assignee_id: trust_score}; missing assignees get 80.0
+
+    Every task's reports are laid out in one flat array with per-task
+    offsets; deadlines are parsed once per distinct value and the rest is
+    array arithmetic. Grouped means add each task's values left to right
+    (see _grouped_sums), matching _sequential_mean exactly.
+    """
+    as_of = as_of or date.today()
+    n = len(tasks)
+    X = np.zeros((n, len(FEATURE_COLUMNS)), dtype=float)
+    if n == 0:
+        return X
+
+    # ── Per-task scalars ─────────────────────────────────────────────────────
+    progress = np.fromiter((float(t.get('progress', 0)) for t in tasks), dtype=float, count=n)
+    priority = np.fromiter((PRIORITY_MAP.get(t.get('priority', 'medium'), 2) for t in tasks),
+                           dtype=float, count=n)
+    trust = np.fromiter(
+        (float(trust_by_assignee.get(str(t.get('assignee_id', '')), DEFAULT_TRUST_SCORE)) for t in tasks),
+        dtype=float, count=n,
+    )
+
+    # Deadlines repeat a lot; parse each distinct value once
+    ordinals = {}
+    as_of_ordinal = as_of.toordinal()
+    days_rem = np.empty(n, dtype=np.int64)
+    for i, t in enumerate(tasks):
+        deadline = t.get('deadline', '')
+        try:
+            ordinal = ordinals[deadline]
+        except KeyError:
+            dl = _deadline_date(deadline)
+            ordinal = ordinals[deadline] = dl.toordinal() if dl is not None else as_of_ordinal
+        except TypeError:                 # unhashable value
+            dl = _deadline_date(deadline)
+            ordinal = dl.toordinal() if dl is not None else as_of_ordinal
+        days_rem[i] = ordinal - as_of_ordinal
+
+    progress_gap, needed_daily, overdue = schedule_features(progress, days_rem)
+
+    # ── Grouped progress reductions ──────────────────────────────────────────
+    docs_per_task = [progress_by_task.get(str(t.get('_id', '')), []) for t in tasks]
+    states = {i: docs for i, docs in enumerate(docs_per_task) if isinstance(docs, dict)}
+    for i in states:
+        docs_per_task[i] = []
+    counts  = np.fromiter((len(docs) for docs in docs_per_task), dtype=np.int64, count=n)
+    starts  = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    n_rows  = int(counts.sum())
+    pct     = np.fromiter((d.get('completion_percent', 0) for docs in docs_per_task for d in docs),
+                          dtype=float, count=n_rows)
+    hours   = np.fromiter((d.get('hours_worked', 0) for docs in docs_per_task for d in docs),
+                          dtype=float, count=n_rows)
+
+    avg_hours = np.zeros(n)
+    has_docs  = counts > 0
+    avg_hours[has_docs] = _grouped_sums(hours, starts[has_docs], counts[has_docs]) / counts[has_docs]
+
+    avg_daily = np.zeros(n)
+    single = counts == 1
+    avg_daily[single] = pct[starts[single]]
+    multi = counts >= 2
+    if multi.any():
+        # Diffs that stay inside one task: drop the one spanning each task boundary
+        diffs = np.diff(pct)
+        keep  = np.ones(len(diffs), dtype=bool)
+        ends  = (starts + counts - 1)[has_docs]
+        keep[ends[ends < len(diffs)]] = False
+        diffs = diffs[keep]
+        diff_counts = np.maximum(counts - 1, 0)
+        diff_starts = np.concatenate(([0], np.cumsum(diff_counts)[:-1]))
+        avg_daily[multi] = _grouped_sums(diffs, diff_starts[multi], diff_counts[multi]) / diff_counts[multi]
+
+    for i, state in states.items():
+        avg_daily[i], avg_hours[i] = state_averages(state)
+
+    X[:, 0] = progress
+    X[:, 1] = days_rem
+    X[:, 2] = progress_gap
+    X[:, 3] = avg_daily
+    X[:, 4] = needed_daily
+    X[:, 5] = priority
+    X[:, 6] = trust
+    X[:, 7] = avg_hours
+    X[:, 8] = overdue
+    return X
+
+
+def schedule_features(progress: np.ndarray, days_rem: np.ndarray):
+    """
+    (progress_gap, needed_daily_velocity, overdue) columns from progress and
+    whole days remaining, as build_task_features computes them per task.
+    """
+    total_days    = np.maximum(-days_rem + np.maximum(days_rem, 0) + np.maximum(-days_rem, 0), 1)
+    elapsed_ratio = np.maximum(1 - (days_rem / total_days), 0)
+    progress_gap  = progress - elapsed_ratio * 100
+    needed_daily  = np.where(days_rem > 0, (100 - progress) / np.maximum(days_rem, 1), 99.0)
+    overdue       = ((days_rem < 0) & (progress < 100)).astype(float)
+    return progress_gap, needed_daily, overdue
+
+
+def _grouped_sums(flat: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Sum flat[starts[i]:starts[i] + counts[i]] for every group (counts > 0).
+
+    np.add.reduceat would be one call, but its summation order is not
+    np.add.accumulate's, so sums could differ in the last bit. Instead,
+    groups are sorted by length and position k of every group still that
+    long is added in one vectorized step: each group is summed strictly
+    left to right, in max(counts) array operations.
+    """
+    order     = np.argsort(-counts, kind='stable')
+    s_starts  = starts[order]
+    s_counts  = counts[order]
+    # n_active[k] = number of groups with more than k values (a prefix, after sorting)
+    n_active  = np.searchsorted(-s_counts, -np.arange(int(s_counts[0]) if len(s_counts) else 0), side='left')
+
+    sorted_sums = np.zeros(len(counts))
+    for k, a in enumerate(n_active):
+        if k == 0:
+            sorted_sums[:a] = flat[s_starts[:a]]
+        else:
+            sorted_sums[:a] += flat[s_starts[:a] + k]
+
+    sums = np.empty(len(counts))
+    sums[order] = sorted_sums
+    return sums
 
 
 def build_anomaly_features(report: dict) -> np.ndarray:
@@ -93,3 +263,18 @@ def build_anomaly_features(report: dict) -> np.ndarray:
         hours_per_pct,
         min(hours, 24),   # sanity cap
     ], dtype=float).reshape(1, -1)
+
+
+def build_anomaly_matrix(hours, completion_percent, prev_completion_percent) -> np.ndarray:
+    """
+    build_anomaly_features for many reports at once, from equal-length
+    sequences of hours_worked, completion_percent and the completion % before
+    each report. Row i equals build_anomaly_features for report i.
+    """
+    hours    = np.asarray(hours, dtype=float)
+    pct      = np.asarray(completion_percent, dtype=float)
+    prev_pct = np.asarray(prev_completion_percent, dtype=float)
+    progress_delta = pct - prev_pct
+    hours_per_pct  = hours / np.maximum(progress_delta, 0.1)
+
+    return np.column_stack([hours, progress_delta, hours_per_pct, np.minimum(hours, 24)])
@@ -5,23 +5,43 @@ Train and save the two ML models:
 
 Run once before starting the server:
     python ml/train_model.py
+
+Each run publishes a new version to the model registry (ml/saved_models/
+manifest.json); running servers pick it up without a restart.
+    python ml/train_model.py --version 2026-10-18 --no-activate
+
+--select fits a grid of candidate risk models instead of the fixed forest and
+publishes the most accurate one whose p99 single-row latency fits the budget
+(see ml/model_selection.py). The full Pareto report is saved next to it.
+    python ml/train_model.py --select --latency-budget-ms 5
+
+--dataset trains the risk model on real history exported by
+ml/training_data.py instead of synthetic rows. The columns are memory-mapped
+and at most --max-rows of them are sampled, so memory stays bounded however
+long the history is. Train/validation/test splits are by task.
+    python ml/train_model.py --dataset ml/datasets/2026-10-18 --max-rows 2000000
 """
 import os
 import sys
+import json
+import argparse
 import numpy as np
-import joblib
 from sklearn.ensemble import RandomForestClassifier, IsolationForest
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, GroupShuffleSplit
 from sklearn.metrics import classification_report
 
 # ── ensure project root is on path ────────────────────────────────────────────
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-MODELS_DIR = os.path.join(os.path.dirname(__file__), 'saved_models')
-os.makedirs(MODELS_DIR, exist_ok=True)
+from ml.model_registry import registry
+from ml.compiled_forest import CompiledForest, CompiledIsolationForest
+
+# p99 single-row predict_proba budget for --select (ms); batch budget is optional
+LATENCY_BUDGET_MS       = float(os.getenv('RISK_LATENCY_BUDGET_MS', 10))
+BATCH_LATENCY_BUDGET_MS = os.getenv('RISK_BATCH_LATENCY_BUDGET_MS')
 
-RISK_MODEL_PATH   = os.path.join(MODELS_DIR, 'risk_model.pkl')
-ANOMALY_MODEL_PATH = os.path.join(MODELS_DIR, 'anomaly_model.pkl')
+# Most rows sampled from a --dataset for fitting (bounds training memory)
+TRAIN_MAX_ROWS = int(os.getenv('RISK_TRAIN_MAX_ROWS', 2_000_000))
 
 # ── Risk model labels ─────────────────────────────────────────────────────────
 # 0=Low  1=Medium  2=High  3=Critical
@@ -55,23 +75,19 @@ def _generate_risk_training_data(n=2000, seed=42):
     ])
 
     # Rule-based label generation (deterministic ground truth)
-    labels = []
-    for i in range(n):
-        score = 0
-        if progress[i] < 25 and days_remaining[i] < 10:  score += 3
-        if progress_gap[i] < -20:                          score += 2
-        if needed_velocity[i] > avg_daily[i] * 2:         score += 2
-        if overdue[i]:                                     score += 3
-        if priority_score[i] >= 3 and progress_gap[i] < -10: score += 1
-        if trust_score[i] < 50:                            score += 1
-        if days_remaining[i] < 0:                          score += 1
-
-        if score >= 6:    labels.append(3)   # Critical
-        elif score >= 4:  labels.append(2)   # High
-        elif score >= 2:  labels.append(1)   # Medium
-        else:             labels.append(0)   # Low
+    score = (
+        3 * ((progress < 25) & (days_remaining < 10))
+        + 2 * (progress_gap < -20)
+        + 2 * (needed_velocity > avg_daily * 2)
+        + 3 * overdue
+        + 1 * ((priority_score >= 3) & (progress_gap < -10))
+        + 1 * (trust_score < 50)
+        + 1 * (days_remaining < 0)
+    )
+    # 0=Low (<2)  1=Medium (2–3)  2=High (4–5)  3=Critical (6+)
+    labels = np.digitize(score, [2, 4, 6])
 
-    return X, np.array(labels)
+    return X, labels
 
 
 def _generate_anomaly_training_data(n=2000, seed=99):
@@ -104,10 +120,32 @@ def _generate_anomaly_training_data(n=2000, seed=99):
     return np.vstack([X_normal, X_anom1, X_anom2])
 
 
-def train_risk_model():
+def _load_risk_dataset(path, max_rows=TRAIN_MAX_ROWS):
+    """(X, y, groups) sampled from an exported dataset; see ml/training_data.py."""
+    from ml.preprocess import FEATURE_COLUMNS
+    from ml.training_data import load_dataset, sample_rows
+
+    meta, columns = load_dataset(path)
+    X, y, groups = sample_rows(columns, FEATURE_COLUMNS, max_rows)
+    print(f"  dataset {path}: {meta['rows']:,} rows, {len(y):,} sampled, classes {meta['class_counts']}")
+    return X, y, groups
+
+
+def _group_split(X, y, groups, test_size, random_state=42):
+    """train_test_split that keeps every task's rows on one side."""
+    train, test = next(GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+                       .split(X, y, groups))
+    return X[train], X[test], y[train], y[test], groups[train], groups[test]
+
+
+def train_risk_model(version=None, activate=True, dataset=None, max_rows=TRAIN_MAX_ROWS):
     print("Training Risk Prediction Model (Random Forest)...")
-    X, y = _generate_risk_training_data()
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    if dataset:
+        X, y, groups = _load_risk_dataset(dataset, max_rows)
+        X_train, X_test, y_train, y_test, _, _ = _group_split(X, y, groups, test_size=0.2)
+    else:
+        X, y = _generate_risk_training_data()
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
     clf = RandomForestClassifier(
         n_estimators=200,
@@ -120,14 +158,87 @@ def train_risk_model():
     clf.fit(X_train, y_train)
 
     y_pred = clf.predict(X_test)
-    print(classification_report(y_test, y_pred, target_names=list(LABEL_MAP.values())))
+    print(classification_report(y_test, y_pred, labels=list(LABEL_MAP), target_names=list(LABEL_MAP.values()),
+                                zero_division=0))
 
-    joblib.dump({'model': clf, 'label_map': LABEL_MAP}, RISK_MODEL_PATH)
-    print(f"  ✓ Risk model saved → {RISK_MODEL_PATH}")
+    metadata = {'dataset': dataset, 'train_rows': len(y_train)} if dataset else None
+    version, path = _publish_risk_model(clf, version, activate, metadata=metadata)
+    print(f"  ✓ Risk model saved → {path} (version {version})")
     return clf
 
 
-def train_anomaly_model():
+def _publish_risk_model(clf, version, activate, metadata=None):
+    """Publish clf, plus its compiled arrays when it is a forest the compiler supports."""
+    try:
+        arrays = {'arrays': CompiledForest.from_sklearn(clf).to_arrays(), 'label_map': LABEL_MAP}
+    except TypeError:
+        arrays = None
+    return registry.publish(
+        'risk', {'model': clf, 'label_map': LABEL_MAP}, version=version, activate=activate,
+        metadata=metadata, arrays=arrays,
+    )
+
+
+def select_risk_model(version=None, activate=True, latency_budget_ms=LATENCY_BUDGET_MS,
+                      batch_budget_ms=BATCH_LATENCY_BUDGET_MS, dataset=None, max_rows=TRAIN_MAX_ROWS):
+    """
+    Fit every candidate in ml.model_selection, then publish the most accurate
+    one (validation macro-F1) whose p99 single-row latency — and batch
+    latency, if batch_budget_ms is set — fits the budget. Nothing is
+    published when no candidate fits; the active model stays in place.
+    """
+    from ml.model_selection import run_selection, choose, format_table, mark_pareto
+    from ml.predict import INFERENCE_ENGINE
+
+    batch_budget_ms = float(batch_budget_ms) if batch_budget_ms not in (None, '') else None
+    print(f"Selecting Risk Prediction Model (budget: p99 {latency_budget_ms} ms/row"
+          f"{f', {batch_budget_ms} ms/batch' if batch_budget_ms is not None else ''}, "
+          f"engine: {INFERENCE_ENGINE})...")
+
+    if dataset:
+        X, y, groups = _load_risk_dataset(dataset, max_rows)
+        X_train, X_rest, y_train, y_rest, _, g_rest = _group_split(X, y, groups, test_size=0.4)
+        X_val, X_test, y_val, y_test, _, _ = _group_split(X_rest, y_rest, g_rest, test_size=0.5)
+        X_unlabelled = X_train[:0]        # real history has labelled rows enough to distil on
+    else:
+        X, y = _generate_risk_training_data()
+        X_train, X_rest, y_train, y_rest = train_test_split(X, y, test_size=0.4, random_state=42, stratify=y)
+        X_val, X_test, y_val, y_test = train_test_split(X_rest, y_rest, test_size=0.5, random_state=42,
+                                                        stratify=y_rest)
+        X_unlabelled, _ = _generate_risk_training_data(n=20_000, seed=7)
+
+    candidates = run_selection((X_train, X_val, X_test, y_train, y_val, y_test), X_unlabelled,
+                               engine=INFERENCE_ENGINE)
+    selected = choose(candidates, latency_budget_ms, batch_budget_ms)
+    print(format_table(candidates, selected))
+
+    report = {
+        'engine': INFERENCE_ENGINE,
+        'dataset': dataset,
+        'latency_budget_ms': latency_budget_ms,
+        'batch_latency_budget_ms': batch_budget_ms,
+        'selected': selected.name if selected else None,
+        'pareto_frontier': [c.name for c in mark_pareto(candidates)],
+        'candidates': [c.report() for c in candidates],
+    }
+    if selected is None:
+        print("  ✗ No candidate fits the latency budget; nothing published.")
+        return None, report
+
+    version, path = _publish_risk_model(selected.model, version, activate, metadata={
+        'selected': selected.name,
+        'val_f1': round(selected.val_f1, 4),
+        'single_p99_ms': round(selected.single_p99_ms, 3),
+    })
+    report_path = os.path.join(os.path.dirname(path), 'selection_report.json')
+    with open(report_path, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    print(f"  ✓ Risk model '{selected.name}' saved → {path} (version {version})")
+    print(f"  ✓ Selection report → {report_path}")
+    return selected.model, report
+
+
+def train_anomaly_model(version=None, activate=True):
     print("Training Anomaly Detection Model (Isolation Forest)...")
     X = _generate_anomaly_training_data()
 
@@ -139,12 +250,36 @@ def train_anomaly_model():
     )
     iso.fit(X)
 
-    joblib.dump(iso, ANOMALY_MODEL_PATH)
-    print(f"  ✓ Anomaly model saved → {ANOMALY_MODEL_PATH}")
+    version, path = registry.publish(
+        'anomaly', iso, version=version, activate=activate,
+        arrays={'arrays': CompiledIsolationForest.from_sklearn(iso).to_arrays()},
+    )
+    print(f"  ✓ Anomaly model saved → {path} (version {version})")
     return iso
 
 
 if __name__ == '__main__':
-    train_risk_model()
-    train_anomaly_model()
+    parser = argparse.ArgumentParser(description='Train and publish the risk and anomaly models.')
+    parser.add_argument('--version', help='version label (default: UTC timestamp)')
+    parser.add_argument('--no-activate', action='store_true',
+                        help='publish without making the new version active')
+    parser.add_argument('--select', action='store_true',
+                        help='pick the risk model from a candidate grid under a latency budget')
+    parser.add_argument('--latency-budget-ms', type=float, default=LATENCY_BUDGET_MS,
+                        help='p99 single-row inference budget for --select')
+    parser.add_argument('--batch-budget-ms', type=float, default=BATCH_LATENCY_BUDGET_MS,
+                        help='optional p99 budget for a 1000-row batch for --select')
+    parser.add_argument('--dataset', help='train the risk model on a dataset from ml/training_data.py')
+    parser.add_argument('--max-rows', type=int, default=TRAIN_MAX_ROWS,
+                        help='most dataset rows sampled for fitting')
+    args = parser.parse_args()
+
+    if args.select:
+        select_risk_model(args.version, activate=not args.no_activate,
+                          latency_budget_ms=args.latency_budget_ms, batch_budget_ms=args.batch_budget_ms,
+                          dataset=args.dataset, max_rows=args.max_rows)
+    else:
+        train_risk_model(args.version, activate=not args.no_activate, dataset=args.dataset,
+                         max_rows=args.max_rows)
+    train_anomaly_model(args.version, activate=not args.no_activate)
     print("\n✅  Both models trained and saved successfully.")
@@ -0,0 +1,304 @@
+"""
+Risk-model training data from real MongoDB history.
+
+export_dataset() streams daily_progress in (task_id, date, _id) order and
+turns every report into one training row: the task's features as they were
+on that report's date (progress = the report's completion %, days_remaining
+counted from the report date, velocity and hours from the reports up to and
+including it — the feature-state averages the serving path uses). Rows after
+the report that completed the task are dropped.
+
+Each row is labelled with its task's actual outcome, the slip between the
+date it reached 100% and its deadline:
+
+    slip <= 0 days   Low        4–14 days   High
+    1–3 days         Medium     > 14 days   Critical
+
+Tasks still open are censored (left out) unless they are already more than
+14 days past their deadline, which makes them Critical whatever happens
+next. The trust score is the assignee's current one; no history is kept.
+
+collect_rows(since=...) returns only rows whose label became known after a
+date (the task completed, or went more than 14 days late, since then): the
+new training data for ml/incremental_training.py.
+
+Reports are read in chunks of whole tasks, so memory is bounded by the
+chunk size, not the collection. Each chunk is featurized and labelled with
+array operations and appended to one raw file per column:
+
+    <dir>/dataset.json         schema, row count, class counts, export stats
+    <dir>/<feature>.f32        one per FEATURE_COLUMNS entry (float32)
+    <dir>/label.i8             outcome class
+    <dir>/group.i32            task sequence number (for task-level splits)
+    <dir>/date.i32             report date as a proleptic ordinal
+
+npz compression would rule out memory-mapping, so columns are stored
+uncompressed but narrow: float32 is what sklearn's trees train on anyway.
+load_dataset() maps the columns and sample_rows() gathers a bounded,
+reproducible sample of them, which is what the trainer fits on.
+
+Run (the trainer then takes --dataset <dir>):
+    python ml/training_data.py --out ml/datasets/2026-10-18
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.preprocess import (FEATURE_COLUMNS, PRIORITY_MAP, DEFAULT_TRUST_SCORE,
+                           _deadline_date, schedule_features)
+
+LABEL_MAP = {0: 'Low', 1: 'Medium', 2: 'High', 3: 'Critical'}
+
+# Upper slip bounds (days past deadline) of Low, Medium and High
+OUTCOME_SLIP_DAYS = (0, 3, 14)
+
+CENSORED = -1
+
+_COLUMNS = [(name, 'float32', 'f32') for name in FEATURE_COLUMNS] + [
+    ('label', 'int8', 'i8'),
+    ('group', 'int32', 'i32'),
+    ('date', 'int32', 'i32'),
+]
+
+_REPORT_PROJECTION = {'task_id': 1, 'date': 1, 'completion_percent': 1, 'hours_worked': 1, '_id': 0}
+_TASK_PROJECTION   = {'deadline': 1, 'priority': 1, 'assignee_id': 1}
+
+
+def outcome_labels(slip_days: np.ndarray, completed: np.ndarray) -> np.ndarray:
+    """
+    Class per task from its slip (completion date - deadline, or days past
+    the deadline so far if still open). Open tasks that could still land
+    in a better class are CENSORED.
+    """
+    labels = np.digitize(slip_days, np.asarray(OUTCOME_SLIP_DAYS) + 1).astype(np.int8)
+    return np.where(completed | (slip_days > OUTCOME_SLIP_DAYS[-1]), labels, CENSORED).astype(np.int8)
+
+
+def _date_ordinal(value):
+    d = _deadline_date(value)
+    return d.toordinal() if d is not None else None
+
+
+def featurize_chunk(reports: list, tasks_by_id: dict, trust_by_assignee: dict, as_of: date, group_offset=0,
+                    resolved_after: date = None):
+    """
+    Point-in-time rows for a run of reports sorted by (task_id, date), every
+    task's reports complete. Returns a {column: array} dict (see _COLUMNS)
+    of the labelled rows, and the number of tasks censored.
+    resolved_after: keep only tasks whose outcome became known after this date.
+    """
+    n = len(reports)
+    task_ids = [r['task_id'] for r in reports]
+    date_ord = np.fromiter((_date_ordinal(r.get('date')) or 0 for r in reports), dtype=np.int64, count=n)
+    pct      = np.fromiter((r.get('completion_percent', 0) for r in reports), dtype=float, count=n)
+    hours    = np.fromiter((r.get('hours_worked', 0) for r in reports), dtype=float, count=n)
+
+    # Group boundaries
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = [a != b for a, b in zip(task_ids[1:], task_ids[:-1])]
+    starts = np.flatnonzero(new_group)
+    counts = np.diff(np.append(starts, n))
+    group  = np.repeat(np.arange(len(starts)), counts)
+    pos    = np.arange(n) - starts[group]                  # 0-based index within the task
+
+    # Per-task attributes
+    task_docs = [tasks_by_id.get(task_ids[s]) for s in starts]
+    deadline_ord = np.array(
+        [(_date_ordinal(t.get('deadline')) if t else None) or -1 for t in task_docs], dtype=np.int64)
+    priority = np.array(
+        [PRIORITY_MAP.get(t.get('priority', 'medium'), 2) if t else 2 for t in task_docs], dtype=float)
+    trust = np.array(
+        [float(trust_by_assignee.get(str(t.get('assignee_id', '')), DEFAULT_TRUST_SCORE)) if t
+         else DEFAULT_TRUST_SCORE for t in task_docs], dtype=float)
+
+    # Outcome: first report at 100%, else still open as of the export
+    done_ord   = np.where(pct >= 100, date_ord, np.iinfo(np.int64).max)
+    completion = np.minimum.reduceat(done_ord, starts)
+    completed  = completion != np.iinfo(np.int64).max
+    slip       = np.where(completed, completion, as_of.toordinal()) - deadline_ord
+    labels     = outcome_labels(slip, completed)
+    labels[deadline_ord < 0] = CENSORED                   # no usable deadline, no outcome
+
+    # Running averages up to each report (feature-state formulas)
+    first_pct = pct[starts][group]
+    cum_hours = np.cumsum(hours)
+    cum_hours -= np.repeat(cum_hours[starts] - hours[starts], counts)
+    avg_daily = np.where(pos >= 1, (pct - first_pct) / np.maximum(pos, 1), pct)
+    avg_hours = cum_hours / (pos + 1)
+
+    days_rem = deadline_ord[group] - date_ord
+    progress_gap, needed_daily, overdue = schedule_features(pct, days_rem)
+
+    keep = (labels[group] != CENSORED) & (date_ord <= completion[group])
+    if resolved_after is not None:
+        resolved = np.where(completed, completion, deadline_ord + OUTCOME_SLIP_DAYS[-1] + 1)
+        keep &= resolved[group] > resolved_after.toordinal()
+    columns = {
+        'progress': pct,
+        'days_remaining': days_rem,
+        'progress_gap': progress_gap,
+        'avg_daily_progress': avg_daily,
+        'needed_daily_velocity': needed_daily,
+        'priority_score': priority[group],
+        'employee_trust_score': trust[group],
+        'avg_hours_worked': avg_hours,
+        'overdue': overdue,
+        'label': labels[group],
+        'group': group + group_offset,
+        'date': date_ord,
+    }
+    rows = {name: np.asarray(columns[name][keep], dtype=dtype) for name, dtype, _ in _COLUMNS}
+    return rows, int((labels == CENSORED).sum())
+
+
+def _fetch_tasks(db, task_ids):
+    from bson import ObjectId
+    oids = []
+    for tid in set(task_ids):
+        try:
+            oids.append(ObjectId(tid))
+        except Exception:
+            continue
+    return {str(t['_id']): t for t in db['tasks'].find({'_id': {'$in': oids}}, _TASK_PROJECTION)}
+
+
+def _stream_chunks(db, chunk_rows, as_of, since=None):
+    """
+    Yield (rows, reports_read, tasks, censored) per chunk of whole tasks.
+    With since, only tasks reported on after it are read and only rows
+    resolved after it are kept.
+    """
+    trust = {str(u['_id']): u.get('trust_score', DEFAULT_TRUST_SCORE)
+             for u in db['users'].find({}, {'trust_score': 1})}
+    query = {}
+    if since is not None:
+        # A task resolved after `since` has a report after it (its 100% one), or is
+        # open and late, in which case it was reported on recently or not at all
+        query = {'task_id': {'$in': db['daily_progress'].distinct('task_id', {'date': {'$gt': since.isoformat()}})}}
+    cursor = db['daily_progress'].find(query, _REPORT_PROJECTION) \
+        .sort([('task_id', 1), ('date', 1), ('_id', 1)]).batch_size(10_000)
+
+    n_tasks, chunk = 0, []
+
+    def featurize(reports):
+        rows, censored = featurize_chunk(reports, _fetch_tasks(db, [r['task_id'] for r in reports]),
+                                         trust, as_of, group_offset=n_tasks, resolved_after=since)
+        return rows, len(reports), len({r['task_id'] for r in reports}), censored
+
+    try:
+        for doc in cursor:
+            # Cut only between tasks, so every task is featurized whole
+            if len(chunk) >= chunk_rows and doc['task_id'] != chunk[-1]['task_id']:
+                result = featurize(chunk)
+                n_tasks += result[2]
+                yield result
+                chunk = []
+            chunk.append(doc)
+        if chunk:
+            yield featurize(chunk)
+    finally:
+        cursor.close()
+
+
+def export_dataset(db, out_dir, chunk_rows=200_000, as_of: date = None, log=print):
+    """
+    Stream daily_progress into a columnar dataset under out_dir.
+    Returns the dataset.json metadata.
+    """
+    as_of = as_of or date.today()
+    os.makedirs(out_dir, exist_ok=True)
+    files = {name: open(os.path.join(out_dir, f'{name}.{ext}'), 'wb') for name, _, ext in _COLUMNS}
+
+    t0 = time.perf_counter()
+    stats = {'reports_read': 0, 'rows': 0, 'tasks': 0, 'censored_tasks': 0}
+    class_counts = np.zeros(len(LABEL_MAP), dtype=np.int64)
+    try:
+        for rows, reports, tasks, censored in _stream_chunks(db, chunk_rows, as_of):
+            for name, _, _ in _COLUMNS:
+                rows[name].tofile(files[name])
+            stats['reports_read']   += reports
+            stats['rows']           += len(rows['label'])
+            stats['tasks']          += tasks
+            stats['censored_tasks'] += censored
+            class_counts[:] += np.bincount(rows['label'], minlength=len(LABEL_MAP))
+            log(f"  {stats['reports_read']:,} reports → {stats['rows']:,} rows "
+                f"({stats['reports_read'] / (time.perf_counter() - t0):,.0f} reports/s)")
+    finally:
+        for fh in files.values():
+            fh.close()
+
+    meta = {
+        'rows': stats['rows'],
+        'feature_columns': FEATURE_COLUMNS,
+        'columns': {name: {'dtype': dtype, 'file': f'{name}.{ext}'} for name, dtype, ext in _COLUMNS},
+        'label_map': {str(k): v for k, v in LABEL_MAP.items()},
+        'outcome_slip_days': list(OUTCOME_SLIP_DAYS),
+        'class_counts': {LABEL_MAP[i]: int(c) for i, c in enumerate(class_counts)},
+        'reports_read': stats['reports_read'],
+        'tasks': stats['tasks'],
+        'censored_tasks': stats['censored_tasks'],
+        'as_of': as_of.isoformat(),
+        'exported_at': datetime.now(timezone.utc).isoformat(),
+        'seconds': round(time.perf_counter() - t0, 2),
+    }
+    with open(os.path.join(out_dir, 'dataset.json'), 'w') as fh:
+        json.dump(meta, fh, indent=2)
+    log(f"✅ {meta['rows']:,} rows from {meta['reports_read']:,} reports ({meta['tasks']:,} tasks, "
+        f"{meta['censored_tasks']:,} censored) in {meta['seconds']}s → {out_dir}")
+    return meta
+
+
+def collect_rows(db, since: date, as_of: date = None, chunk_rows=200_000):
+    """In-memory {column: array} of the rows resolved after since (see _stream_chunks)."""
+    parts = [rows for rows, _, _, _ in _stream_chunks(db, chunk_rows, as_of or date.today(), since)]
+    return {name: np.concatenate([p[name] for p in parts]) if parts else np.empty(0, dtype=dtype)
+            for name, dtype, _ in _COLUMNS}
+
+
+def load_dataset(path):
+    """(metadata, {column: read-only memmap}) for a directory written by export_dataset."""
+    with open(os.path.join(path, 'dataset.json')) as fh:
+        meta = json.load(fh)
+    columns = {}
+    for name, spec in meta['columns'].items():
+        if meta['rows'] == 0:
+            columns[name] = np.empty(0, dtype=spec['dtype'])
+        else:
+            columns[name] = np.memmap(os.path.join(path, spec['file']), dtype=spec['dtype'],
+                                      mode='r', shape=(meta['rows'],))
+    return meta, columns
+
+
+def sample_rows(columns, feature_columns, max_rows=None, seed=0):
+    """
+    (X, y, groups) for at most max_rows rows, chosen uniformly at random and
+    read in file order. Memory is O(max_rows) however large the dataset.
+    """
+    n = len(columns['label'])
+    if max_rows is None or n <= max_rows:
+        idx = slice(None)
+    else:
+        idx = np.sort(np.random.default_rng(seed).choice(n, size=max_rows, replace=False))
+    X = np.column_stack([np.asarray(columns[c][idx]) for c in feature_columns])
+    return X, np.asarray(columns['label'][idx]), np.asarray(columns['group'][idx])
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Export risk training data from MongoDB history.')
+    parser.add_argument('--out', required=True, help='output directory')
+    parser.add_argument('--chunk-rows', type=int, default=200_000, help='reports featurized per chunk')
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/risk_predictions'))
+    export_dataset(client.get_default_database(), args.out, chunk_rows=args.chunk_rows)
@@ -0,0 +1,100 @@
+"""
+Background pre-warm of the risk and anomaly models.
+
+Loading a model means unpickling it (or mapping its arrays) and, on the
+first predict, paying sklearn's one-off setup costs. warm_models() does both
+on a daemon thread right after startup with a dummy inference, so the first
+real /api/risk call or progress submission doesn't. Memory-mapped arrays
+are read end to end to fault their pages in.
+
+The per-model state is exposed through status() for the readiness endpoint.
+"""
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+MODELS = ('risk', 'anomaly')
+
+_lock   = threading.Lock()
+_thread = None
+_state  = {name: {'state': 'cold'} for name in MODELS}
+
+
+def _set(name, **fields):
+    with _lock:
+        _state[name] = fields
+
+
+def _touch_arrays(bundle):
+    """Read every mapped array once so its pages are resident."""
+    import numpy as np
+    arrays = bundle.get('arrays', {}) if isinstance(bundle, dict) else {}
+    for value in arrays.values():
+        if isinstance(value, np.ndarray):
+            np.asarray(value).sum()
+
+
+def _warm_risk():
+    import numpy as np
+    from ml.predict import _load_handle, _load_estimator, _score_matrix
+
+    handle = _load_handle()
+    _touch_arrays(handle.model)
+    clf = _load_estimator(handle.model, 1)
+    _score_matrix(clf, np.zeros((1, 9)))
+    return handle.version
+
+
+def _warm_anomaly():
+    from ml.anomaly_detection import _load_anomaly_model
+    from ml.model_registry import registry
+    from ml.preprocess import build_anomaly_features
+
+    model  = _load_anomaly_model()
+    kind   = 'arrays' if 'anomaly.arrays' in registry.loaded() else 'model'
+    handle = registry.get('anomaly', kind=kind)
+    _touch_arrays(handle.model)
+    model.score_samples(build_anomaly_features({'hours_worked': 4, 'completion_percent': 10}))
+    return handle.version
+
+
+_WARMERS = {'risk': _warm_risk, 'anomaly': _warm_anomaly}
+
+
+def warm_models():
+    """Load and exercise every model once; failures are recorded, not raised."""
+    for name in MODELS:
+        _set(name, state='loading')
+        t0 = time.perf_counter()
+        try:
+            version = _WARMERS[name]()
+        except Exception as e:
+            _set(name, state='failed', error=str(e))
+            logger.warning(f"[Warmup] {name} model failed to warm: {e}")
+            continue
+        seconds = round(time.perf_counter() - t0, 3)
+        _set(name, state='ready', version=version, seconds=seconds)
+        logger.info(f"[Warmup] {name} model {version} warm in {seconds:.2f}s")
+
+
+def start_prewarm():
+    """Run warm_models() once on a daemon thread; later calls are no-ops."""
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return _thread
+        _thread = threading.Thread(target=warm_models, name='model-prewarm', daemon=True)
+    _thread.start()
+    return _thread
+
+
+def is_enabled():
+    return _thread is not None
+
+
+def status():
+    """{name: {'state': cold|loading|ready|failed, ...}} copy of the warm-up state."""
+    with _lock:
+        return {name: dict(fields) for name, fields in _state.items()}
@@ -1,15 +1,68 @@
 from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+# Keys a recurring alert is coalesced on (see raise_many)
+DEDUP_FIELDS = ('type', 'project_id', 'task_id', 'severity')
+
+# Alerts moved per find / insert_many / delete_many round in archive_read
+ARCHIVE_BATCH_SIZE = 1000
 
 
 class AlertModel:
     def __init__(self, db):
         self.collection = db['alerts']
+        self.archive    = db['alerts_archive']
         self.collection.create_index('timestamp')
+        # Open (unread) alerts by dedup key, for raise_many's upserts. Not
+        # unique: the scheduler's leader lock already makes it the only writer
+        self.collection.create_index('dedup_key', partialFilterExpression={'read': False})
+        self.collection.create_index([('read', 1), ('read_at', 1)])
 
     def create(self, alert_type, severity, title, message,
                project_id=None, task_id=None, employee_id=None, report_id=None):
-        doc = {
+        doc = self._build(alert_type, severity, title, message, project_id, task_id, employee_id, report_id)
+        result = self.collection.insert_one(doc)
+        doc['_id'] = str(result.inserted_id)
+        return doc
+
+    def raise_many(self, alerts):
+        """
+        alerts: [dict of create() keyword arguments, ...], written with one
+        bulk_write. An alert whose (type, project, task, severity) matches an
+        unread one is coalesced into it — occurrences goes up by one and
+        last_seen, timestamp, title and message are refreshed — instead of
+        being inserted again. Once read, the next occurrence is a new alert.
+        Returns (inserted, coalesced).
+        """
+        now = datetime.now(timezone.utc)
+        ops = []
+        for a in alerts:
+            doc = self._build(**a)
+            doc['timestamp'] = now
+            key = self.dedup_key(doc)
+            refreshed = {k: doc.pop(k) for k in ('title', 'message', 'timestamp')}
+            ops.append(UpdateOne(
+                {'dedup_key': key, 'read': False},
+                {'$set': {**refreshed, 'last_seen': now},
+                 '$inc': {'occurrences': 1},
+                 '$setOnInsert': {**doc, 'dedup_key': key, 'first_seen': now}},
+                upsert=True,
+            ))
+        if not ops:
+            return 0, 0
+        result = self.collection.bulk_write(ops, ordered=False)
+        return result.upserted_count, result.matched_count
+
+    @staticmethod
+    def dedup_key(doc):
+        return '|'.join(str(doc.get(f) or '') for f in DEDUP_FIELDS)
+
+    @staticmethod
+    def _build(alert_type, severity, title, message,
+               project_id=None, task_id=None, employee_id=None, report_id=None):
+        return {
             'type': alert_type,       # deadline_risk|fraud_detection|productivity|milestone
             'severity': severity,     # critical|warning|info|success
             'title': title,
@@ -21,9 +74,6 @@ class AlertModel:
             'read': False,
             'timestamp': datetime.now(timezone.utc),
         }
-        result = self.collection.insert_one(doc)
-        doc['_id'] = str(result.inserted_id)
-        return doc
 
     def get_all(self, severity=None, alert_type=None, unread_only=False):
         query = {}
@@ -40,12 +90,50 @@ class AlertModel:
 
     def mark_as_read(self, alert_id):
         self.collection.update_one(
-            {'_id': ObjectId(alert_id)},
-            {'$set': {'read': True}}
+            {'_id': ObjectId(alert_id), 'read': False},
+            {'$set': {'read': True, 'read_at': datetime.now(timezone.utc)}}
         )
 
     def mark_all_as_read(self):
-        self.collection.update_many({}, {'$set': {'read': True}})
+        self.collection.update_many(
+            {'read': False},
+            {'$set': {'read': True, 'read_at': datetime.now(timezone.utc)}}
+        )
+
+    def archive_read(self, before, batch_size=ARCHIVE_BATCH_SIZE):
+        """
+        Move alerts read before `before` (or, if read before read_at was
+        recorded, raised before it) to alerts_archive, batch_size at a time
+        so a large backlog never sits in memory or one request. Returns how
+        many moved.
+        """
+        query = {'read': True, '$or': [
+            {'read_at': {'$lt': before}},
+            {'read_at': {'$exists': False}, 'timestamp': {'$lt': before}},
+        ]}
+        moved = 0
+        while True:
+            docs = list(self.collection.find(query).limit(batch_size))
+            if not docs:
+                return moved
+            now = datetime.now(timezone.utc)
+            for d in docs:
+                d['archived_at'] = now
+            try:
+                self.archive.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                # Already archived by a run that stopped before deleting
+                if any(err['code'] != 11000 for err in e.details['writeErrors']):
+                    raise
+            deleted = self.collection.delete_many({'_id': {'$in': [d['_id'] for d in docs]}}).deleted_count
+            moved += deleted
+            if not deleted:                 # removed under us; do not spin on the same batch
+                return moved
+
+    def ensure_archive_ttl(self, ttl_days):
+        """Expire archived alerts ttl_days after archiving (MongoDB TTL index)."""
+        if ttl_days > 0:
+            self.archive.create_index('archived_at', expireAfterSeconds=int(ttl_days * 86400))
 
     @staticmethod
     def serialize(alert):
@@ -53,6 +141,8 @@ class AlertModel:
             return None
         a = dict(alert)
         a['_id'] = str(a['_id'])
-        if a.get('timestamp') and not isinstance(a['timestamp'], str):
-            a['timestamp'] = str(a['timestamp'])
+        a.pop('dedup_key', None)
+        for field in ('timestamp', 'first_seen', 'last_seen', 'read_at'):
+            if a.get(field) and not isinstance(a[field], str):
+                a[field] = str(a[field])
         return a
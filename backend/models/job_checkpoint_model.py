@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+
+class JobCheckpointModel:
+    """
+    Progress of long-running maintenance jobs, one doc per job name, so an
+    interrupted run can pick up where it stopped.
+    """
+
+    def __init__(self, db):
+        self.collection = db['job_checkpoints']
+
+    def get(self, job):
+        return self.collection.find_one({'_id': job})
+
+    def save(self, job, fields):
+        self.collection.update_one(
+            {'_id': job},
+            {'$set': {**fields, 'updated_at': datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+
+    def clear(self, job):
+        self.collection.delete_one({'_id': job})
@@ -0,0 +1,36 @@
+from datetime import timezone
+
+
+class PipelineRunModel:
+    """
+    One doc per scheduled pipeline run (scheduler/pipeline_telemetry.py):
+    timings per stage, portfolio size, throughput, failures and peak memory.
+    Written when the run starts (status 'running') and completed at the end.
+    """
+
+    def __init__(self, db):
+        self.collection = db['pipeline_runs']
+        self.collection.create_index([('job', 1), ('started_at', -1)])
+        self.collection.create_index('started_at')
+
+    def start(self, fields):
+        result = self.collection.insert_one({**fields, 'status': 'running'})
+        return result.inserted_id
+
+    def finish(self, run_id, fields):
+        self.collection.update_one({'_id': run_id}, {'$set': fields})
+
+    def get_recent(self, limit=50, job=None):
+        query = {'job': job} if job else {}
+        return list(self.collection.find(query).sort('started_at', -1).limit(limit))
+
+    @staticmethod
+    def serialize(run):
+        if run is None:
+            return None
+        r = dict(run)
+        r['_id'] = str(r['_id'])
+        for key in ('started_at', 'finished_at'):
+            if r.get(key) and not isinstance(r[key], str):
+                r[key] = r[key].replace(tzinfo=r[key].tzinfo or timezone.utc).isoformat()
+        return r
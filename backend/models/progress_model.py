@@ -6,8 +6,17 @@ class ProgressModel:
     def __init__(self, db):
         self.collection = db['daily_progress']
         self.collection.create_index([('task_id', 1), ('employee_id', 1), ('date', 1)])
+        self.collection.create_index([('task_id', 1), ('date', 1), ('_id', 1)])
+        self.collection.create_index('submitted_at')
 
-    def submit(self, data, employee_id, is_anomaly=False):
+    def submit(self, data, employee_id, is_anomaly=False, feature_state=None, anomaly_pending=False):
+        """
+        Save today's report for (task, employee), replacing an earlier one
+        from the same day. feature_state (a TaskFeatureStateModel), if given,
+        has the report folded into the task's running aggregates.
+        anomaly_pending marks a report whose anomaly check runs later
+        (ml/anomaly_queue.py).
+        """
         today_str = date.today().isoformat()
         doc = {
             'task_id': data['task_id'],
@@ -22,25 +31,30 @@ class ProgressModel:
             'notes': data.get('notes', ''),
             'proof_file': data.get('proof_file'),
             'anomaly_flag': is_anomaly,
+            'anomaly_pending': anomaly_pending,
             'submitted_at': datetime.now(timezone.utc),
         }
         # Upsert: one report per (task, employee, date)
-        result = self.collection.update_one(
-            {'task_id': data['task_id'], 'employee_id': employee_id, 'date': today_str},
-            {'$set': doc},
-            upsert=True
-        )
+        key = {'task_id': data['task_id'], 'employee_id': employee_id, 'date': today_str}
+        existing = self.collection.find_one(key, {'_id': 1, 'hours_worked': 1, 'completion_percent': 1})
+        result = self.collection.update_one(key, {'$set': doc}, upsert=True)
         if result.upserted_id:
             doc['_id'] = result.upserted_id
-        else:
-            existing = self.collection.find_one(
-                {'task_id': data['task_id'], 'employee_id': employee_id, 'date': today_str},
-                {'_id': 1}
-            )
-            if existing:
-                doc['_id'] = existing['_id']
+            existing = None
+        elif existing:
+            doc['_id'] = existing['_id']
+
+        if feature_state is not None:
+            feature_state.apply_report(data['task_id'], today_str, doc['hours_worked'],
+                                       doc['completion_percent'], replaced=existing)
         return doc
 
+    def set_anomaly_flag(self, report_id, is_anomaly):
+        self.collection.update_one(
+            {'_id': report_id},
+            {'$set': {'anomaly_flag': is_anomaly, 'anomaly_pending': False}},
+        )
+
     def get_today(self, task_id, employee_id):
         today_str = date.today().isoformat()
         return self.collection.find_one(
@@ -54,6 +68,39 @@ class ProgressModel:
     def get_history_by_task(self, task_id):
         return list(self.collection.find({'task_id': task_id}).sort('date', 1))
 
+    def aggregate_task_stats(self, task_ids):
+        """
+        Reduce the history of many tasks (one project or the whole portfolio)
+        server-side in a single aggregation instead of one find per task.
+
+        Returns {task_id: stats} for tasks with at least one report, where
+        stats has the shape of a task feature-state doc (count, first/last
+        completion_percent and report date, sum_hours) plus avg_hours, so
+        it can be passed to build_feature_matrix as progress_by_task.
+        """
+        ids = [str(t) for t in task_ids]
+        if not ids:
+            return {}
+        pipeline = [
+            {'$match': {'task_id': {'$in': ids}}},
+            {'$sort': {'task_id': 1, 'date': 1}},
+            {'$group': {
+                '_id': '$task_id',
+                'count': {'$sum': 1},
+                'first_completion_percent': {'$first': {'$ifNull': ['$completion_percent', 0]}},
+                'last_completion_percent': {'$last': {'$ifNull': ['$completion_percent', 0]}},
+                'first_report_date': {'$first': '$date'},
+                'last_report_date': {'$last': '$date'},
+                'sum_hours': {'$sum': {'$ifNull': ['$hours_worked', 0]}},
+                'avg_hours': {'$avg': {'$ifNull': ['$hours_worked', 0]}},
+            }},
+        ]
+        stats = {}
+        for doc in self.collection.aggregate(pipeline, allowDiskUse=True):
+            doc['task_id'] = doc.pop('_id')
+            stats[doc['task_id']] = doc
+        return stats
+
     def get_history_by_employee(self, employee_id, days=30):
         return list(self.collection.find({'employee_id': employee_id}).sort('date', -1).limit(days))
 
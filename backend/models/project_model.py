@@ -1,5 +1,6 @@
 from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo import UpdateOne
 
 
 class ProjectModel:
@@ -50,11 +51,27 @@ class ProjectModel:
             updates['status'] = status
         self.collection.update_one({'_id': ObjectId(project_id)}, {'$set': updates})
 
+    def bulk_update_risk_scores(self, updates):
+        """updates: [(project_id, risk_score, status or None), ...] written in one bulk_write."""
+        now = datetime.now(timezone.utc)
+        ops = []
+        for project_id, risk_score, status in updates:
+            fields = {'risk_score': risk_score, 'updated_at': now}
+            if status:
+                fields['status'] = status
+            ops.append(UpdateOne({'_id': ObjectId(project_id)}, {'$set': fields}))
+        if not ops:
+            return 0
+        return self.collection.bulk_write(ops, ordered=False).modified_count
+
     def delete(self, project_id):
         return self.collection.delete_one({'_id': ObjectId(project_id)})
 
-    def get_in_progress(self):
-        return list(self.collection.find({'status': {'$in': ['in_progress', 'at_risk']}}))
+    def get_in_progress(self, project_ids=None):
+        query = {'status': {'$in': ['in_progress', 'at_risk']}}
+        if project_ids is not None:
+            query['_id'] = {'$in': [ObjectId(p) for p in project_ids if ObjectId.is_valid(p)]}
+        return list(self.collection.find(query))
 
     @staticmethod
     def serialize(project):
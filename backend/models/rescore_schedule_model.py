@@ -0,0 +1,36 @@
+from pymongo import UpdateOne
+
+
+class RescoreScheduleModel:
+    """
+    Adaptive rescoring schedule (scheduler/adaptive_rescoring.py), one doc
+    per project keyed by its id: when it was last scored, the interval chosen
+    then, the next due time that gave and the day (YYYY-MM-DD, UTC) its
+    alerts were last raised.
+    """
+
+    def __init__(self, db):
+        self.collection = db['rescore_schedule']
+        self.collection.create_index('next_due')
+
+    def get_all(self):
+        return list(self.collection.find())
+
+    def bulk_save(self, entries):
+        """entries: [(project_id, scored_at, interval_seconds, next_due, alerted_on), ...] in one bulk_write."""
+        ops = [
+            UpdateOne({'_id': project_id},
+                      {'$set': {'scored_at': scored_at, 'interval_seconds': interval_seconds,
+                                'next_due': next_due, 'alerted_on': alerted_on}},
+                      upsert=True)
+            for project_id, scored_at, interval_seconds, next_due, alerted_on in entries
+        ]
+        if not ops:
+            return 0
+        result = self.collection.bulk_write(ops, ordered=False)
+        return result.upserted_count + result.modified_count
+
+    def remove(self, project_ids):
+        if not project_ids:
+            return 0
+        return self.collection.delete_many({'_id': {'$in': list(project_ids)}}).deleted_count
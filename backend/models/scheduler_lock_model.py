@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+class SchedulerLockModel:
+    """
+    Leases for scheduler leadership, one doc per lock name:
+        {_id: name, owner, token, expires_at, heartbeat_at}
+
+    token is the fencing token: it goes up by one every time the lease
+    changes hands and never goes down, so a write checked against it is
+    refused once a newer leader exists. Expired docs are therefore taken
+    over, never deleted (a TTL index would reset the token).
+    """
+
+    def __init__(self, db):
+        self.collection = db['scheduler_locks']
+
+    def acquire(self, name, owner, ttl_seconds):
+        """Take the lease if it is free or expired; returns the new token or None."""
+        now = datetime.now(timezone.utc)
+        fields = {'owner': owner, 'expires_at': now + timedelta(seconds=ttl_seconds), 'heartbeat_at': now}
+        doc = self.collection.find_one_and_update(
+            {'_id': name, 'expires_at': {'$lt': now}},
+            {'$set': fields, '$inc': {'token': 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is not None:
+            return doc['token']
+        try:
+            self.collection.insert_one({'_id': name, 'token': 1, **fields})
+            return 1
+        except DuplicateKeyError:
+            return None       # held by a live owner
+
+    def renew(self, name, owner, token, ttl_seconds):
+        """Extend a lease we hold; False if it has been taken over."""
+        now = datetime.now(timezone.utc)
+        result = self.collection.update_one(
+            {'_id': name, 'owner': owner, 'token': token},
+            {'$set': {'expires_at': now + timedelta(seconds=ttl_seconds), 'heartbeat_at': now}},
+        )
+        return result.matched_count == 1
+
+    def holds(self, name, owner, token):
+        """True if owner still holds the unexpired lease issued with token."""
+        return self.collection.count_documents({
+            '_id': name, 'owner': owner, 'token': token,
+            'expires_at': {'$gt': datetime.now(timezone.utc)},
+        }, limit=1) == 1
+
+    def release(self, name, owner, token):
+        """Expire our lease now so another process can take over without waiting."""
+        self.collection.update_one(
+            {'_id': name, 'owner': owner, 'token': token},
+            {'$set': {'expires_at': datetime(1970, 1, 1, tzinfo=timezone.utc)}},
+        )
+
+    def get(self, name):
+        return self.collection.find_one({'_id': name})
@@ -0,0 +1,120 @@
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+
+
+class TaskFeatureStateModel:
+    """
+    Running aggregates of a task's daily_progress history — everything
+    build_task_features needs from it, in one small doc per task:
+
+        count                     reports so far
+        first_completion_percent  completion % of the earliest report
+        first_report_date
+        last_completion_percent   completion % of the latest report
+        last_report_date
+        sum_hours                 total hours_worked over all reports
+
+    ProgressModel.submit keeps it current with one atomic $inc/$set per
+    report; backfill_feature_state.py builds it for existing history.
+    """
+
+    def __init__(self, db):
+        self.collection = db['task_feature_state']
+        self.collection.create_index('task_id', unique=True)
+
+    def get(self, task_id):
+        return self.collection.find_one({'task_id': str(task_id)}, {'_id': 0})
+
+    def get_by_tasks(self, task_ids):
+        """{task_id: state} for the tasks that have one."""
+        ids = [str(t) for t in task_ids]
+        return {d['task_id']: d for d in self.collection.find({'task_id': {'$in': ids}}, {'_id': 0})}
+
+    def get_or_rebuild(self, task_ids, progress_model):
+        """
+        {task_id: state} like get_by_tasks, rebuilding missing states from
+        history (tasks without any report are left out).
+        """
+        states = self.get_by_tasks(task_ids)
+        for tid in (str(t) for t in task_ids):
+            if tid not in states:
+                state = self.rebuild(tid, progress_model.get_history_by_task(tid))
+                if state is not None:
+                    states[tid] = state
+        return states
+
+    def apply_report(self, task_id, report_date, hours, completion_percent, replaced=None):
+        """
+        Fold one submitted report into the task's state.
+        replaced: the report it overwrote (same task, employee and date), if any.
+        """
+        now = datetime.now(timezone.utc)
+        if replaced is None:
+            self.collection.update_one(
+                {'task_id': str(task_id)},
+                {
+                    '$inc': {'count': 1, 'sum_hours': hours},
+                    '$set': {'last_completion_percent': completion_percent,
+                             'last_report_date': report_date, 'updated_at': now},
+                    '$setOnInsert': {'first_completion_percent': completion_percent,
+                                     'first_report_date': report_date},
+                },
+                upsert=True,
+            )
+            return
+
+        old_hours = float(replaced.get('hours_worked', 0))
+        self.collection.update_one(
+            {'task_id': str(task_id)},
+            {
+                '$inc': {'sum_hours': hours - old_hours},
+                '$set': {'last_completion_percent': completion_percent,
+                         'last_report_date': report_date, 'updated_at': now},
+            },
+        )
+        # The overwritten report was also the first one
+        self.collection.update_one(
+            {'task_id': str(task_id), 'count': 1, 'first_report_date': report_date},
+            {'$set': {'first_completion_percent': completion_percent}},
+        )
+
+    def rebuild(self, task_id, progress_docs):
+        """Replace the state with one computed from the full history (oldest first)."""
+        state = self.from_history(task_id, progress_docs)
+        if state is None:
+            self.collection.delete_one({'task_id': str(task_id)})
+            return None
+        self.collection.replace_one({'task_id': str(task_id)}, state, upsert=True)
+        state.pop('_id', None)
+        return state
+
+    def bulk_insert_missing(self, states, overwrite=False):
+        """
+        Write many states at once. Unless overwrite, tasks that already have
+        a state keep it, since submits may have updated it since it was read.
+        """
+        op = '$set' if overwrite else '$setOnInsert'
+        ops = [UpdateOne({'task_id': st['task_id']}, {op: st}, upsert=True) for st in states]
+        if not ops:
+            return 0
+        result = self.collection.bulk_write(ops, ordered=False)
+        return result.upserted_count + (result.modified_count if overwrite else 0)
+
+    @staticmethod
+    def from_history(task_id, progress_docs):
+        """State dict for a date-ordered history, or None if there are no reports."""
+        if not progress_docs:
+            return None
+        sum_hours = 0.0
+        for d in progress_docs:
+            sum_hours += float(d.get('hours_worked', 0))
+        return {
+            'task_id': str(task_id),
+            'count': len(progress_docs),
+            'first_completion_percent': float(progress_docs[0].get('completion_percent', 0)),
+            'first_report_date': progress_docs[0].get('date'),
+            'last_completion_percent': float(progress_docs[-1].get('completion_percent', 0)),
+            'last_report_date': progress_docs[-1].get('date'),
+            'sum_hours': sum_hours,
+            'updated_at': datetime.now(timezone.utc),
+        }
@@ -7,6 +7,7 @@ class TaskModel:
         self.collection = db['tasks']
         self.collection.create_index('project_id')
         self.collection.create_index('assignee_id')
+        self.collection.create_index('updated_at')
 
     def create(self, data):
         doc = {
@@ -29,6 +30,15 @@ class TaskModel:
     def get_by_project(self, project_id):
         return list(self.collection.find({'project_id': project_id}))
 
+    def get_by_projects(self, project_ids):
+        """{project_id: [task, ...]} for many projects in one query; every id gets a list."""
+        ids = [str(p) for p in project_ids]
+        by_project = {pid: [] for pid in ids}
+        if ids:
+            for task in self.collection.find({'project_id': {'$in': ids}}):
+                by_project.setdefault(task['project_id'], []).append(task)
+        return by_project
+
     def get_by_assignee(self, assignee_id):
         return list(self.collection.find({'assignee_id': assignee_id}))
 
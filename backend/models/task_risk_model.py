@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY = 11000
+
+
+class TaskRiskModel:
+    """
+    Last risk result per task, so a project refresh only re-scores tasks whose
+    inputs changed.
+
+    Writers that change a task's inputs call mark_dirty*, which sets dirty and
+    bumps dirty_seq. save_results only overwrites a doc whose dirty_seq still
+    equals the value read before scoring, so a report submitted mid-refresh
+    leaves the task dirty instead of being silently overwritten.
+    """
+
+    def __init__(self, db):
+        self.collection = db['task_risk']
+        self.collection.create_index('task_id', unique=True)
+        self.collection.create_index('project_id')
+        self.collection.create_index('assignee_id')
+        self.collection.create_index('dirty', partialFilterExpression={'dirty': True})
+
+    def get_by_tasks(self, task_ids):
+        return list(self.collection.find({'task_id': {'$in': list(task_ids)}}))
+
+    def get_by_project(self, project_id):
+        return list(self.collection.find({'project_id': project_id}))
+
+    def get_dirty(self):
+        """Tasks flagged for re-scoring: [{'task_id', 'project_id'}, ...]."""
+        return list(self.collection.find({'dirty': True}, {'_id': 0, 'task_id': 1, 'project_id': 1}))
+
+    def mark_dirty(self, task_ids):
+        """Flag tasks for re-scoring; creates the doc if the task was never scored."""
+        ops = [
+            UpdateOne({'task_id': str(tid)},
+                      {'$set': {'dirty': True, 'updated_at': datetime.now(timezone.utc)},
+                       '$inc': {'dirty_seq': 1}},
+                      upsert=True)
+            for tid in task_ids if tid
+        ]
+        if ops:
+            self._bulk_write(ops)
+
+    def mark_dirty_by_assignee(self, assignee_id):
+        """Flag every scored task of an employee (e.g. after a trust score change)."""
+        self.collection.update_many(
+            {'assignee_id': str(assignee_id)},
+            {'$set': {'dirty': True, 'updated_at': datetime.now(timezone.utc)}, '$inc': {'dirty_seq': 1}},
+        )
+
+    def save_results(self, entries):
+        """
+        entries: [{'task_id', 'project_id', 'assignee_id', 'fingerprint',
+                   'model_version', 'result', 'seen_seq'}, ...]
+        Returns the number of tasks stored; the rest were marked dirty again
+        while being scored and stay dirty.
+        """
+        now = datetime.now(timezone.utc)
+        ops = []
+        for e in entries:
+            doc = {k: v for k, v in e.items() if k != 'seen_seq'}
+            doc.update({'dirty': False, 'scored_at': now, 'updated_at': now})
+            seq = e.get('seen_seq')
+            match = {'task_id': e['task_id'], 'dirty_seq': seq if seq is not None else {'$exists': False}}
+            ops.append(UpdateOne(match, {'$set': doc}, upsert=True))
+        if not ops:
+            return 0
+        result = self._bulk_write(ops)
+        return result['nMatched'] + result['nUpserted']
+
+    def delete(self, task_id):
+        return self.collection.delete_one({'task_id': str(task_id)})
+
+    def delete_by_project(self, project_id):
+        return self.collection.delete_many({'project_id': project_id})
+
+    def _bulk_write(self, ops):
+        """Unordered bulk write; a lost dirty_seq race surfaces as a duplicate-key upsert and is skipped."""
+        try:
+            return self.collection.bulk_write(ops, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            if any(err.get('code') != DUPLICATE_KEY for err in e.details.get('writeErrors', [])):
+                raise
+            return e.details
@@ -39,10 +39,13 @@ class UserModel:
         return list(self.collection.find({'role': 'employee'}, {'password_hash': 0}))
 
     def update_trust_score(self, user_id, score):
+        from models.task_risk_model import TaskRiskModel
         self.collection.update_one(
             {'_id': ObjectId(user_id)},
             {'$set': {'trust_score': score, 'updated_at': datetime.now(timezone.utc)}}
         )
+        # Trust is a risk feature: the employee's stored task scores are stale
+        TaskRiskModel(self.collection.database).mark_dirty_by_assignee(user_id)
 
     @staticmethod
     def serialize(user):
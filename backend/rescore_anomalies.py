@@ -0,0 +1,151 @@
+"""
+Re-score the anomaly_flag of every daily_progress report with the active
+anomaly model, e.g. after retraining it.
+
+Streams the collection in (task_id, date, _id) order, so each report's
+prev_completion_percent is the completion % of the task's previous report
+(0 for its first), the same input the submit path uses. Reports are scored
+in batches with one IsolationForest pass per batch; only flags that change
+are written back, with one bulk_write per batch. After every batch the
+position is checkpointed in job_checkpoints, and a later run with the same
+model version resumes from there. A new model version starts over.
+
+Run after activating a new anomaly model:
+    python rescore_anomalies.py
+    python rescore_anomalies.py --batch-size 50000 --max-batches 20   # bounded run; rerun to continue
+    python rescore_anomalies.py --restart
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+from ml.anomaly_detection import _load_anomaly_scorer, score_features
+from ml.preprocess import build_anomaly_matrix
+from models.job_checkpoint_model import JobCheckpointModel
+
+load_dotenv()
+
+JOB = 'rescore_anomalies'
+
+_PROJECTION = {'task_id': 1, 'date': 1, 'hours_worked': 1, 'completion_percent': 1, 'anomaly_flag': 1}
+_SORT       = [('task_id', 1), ('date', 1), ('_id', 1)]
+
+
+def _after(key):
+    """Filter for reports sorting after key ({'task_id', 'date', '_id'}) in _SORT order."""
+    tid, day, oid = key['task_id'], key['date'], key['_id']
+    return {'$or': [
+        {'task_id': {'$gt': tid}},
+        {'task_id': tid, 'date': {'$gt': day}},
+        {'task_id': tid, 'date': day, '_id': {'$gt': oid}},
+    ]}
+
+
+def _score_batch(collection, iso, docs, prevs):
+    """Score one batch and write back the flags that changed. Returns the number changed."""
+    hours = [float(d.get('hours_worked', 0)) for d in docs]
+    pct   = [float(d.get('completion_percent', 0)) for d in docs]
+    _, flags = score_features(iso, build_anomaly_matrix(hours, pct, prevs))
+
+    ops = [
+        # Matching the scored values leaves reports edited mid-run to their submit's own check
+        UpdateOne({'_id': d['_id'], 'hours_worked': d.get('hours_worked'),
+                   'completion_percent': d.get('completion_percent')},
+                  {'$set': {'anomaly_flag': bool(flag)}})
+        for d, flag in zip(docs, flags)
+        if bool(flag) != bool(d.get('anomaly_flag', False))
+    ]
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def rescore(db, batch_size=10000, restart=False, max_batches=None, log=print):
+    """
+    Returns (reports scored this run, flags changed this run, finished).
+    Raises FileNotFoundError if no anomaly model is trained.
+    """
+    version, iso = _load_anomaly_scorer()
+    collection   = db['daily_progress']
+    checkpoints  = JobCheckpointModel(db)
+
+    state = checkpoints.get(JOB)
+    if restart or state is None or state.get('model_version') != version:
+        state = {'model_version': version, 'started_at': datetime.now(timezone.utc),
+                 'last_key': None, 'prev_completion_percent': 0.0,
+                 'scored': 0, 'changed': 0, 'finished': False}
+        checkpoints.save(JOB, state)
+    elif state.get('finished'):
+        log(f"✅ Already rescored with anomaly model {version}; use --restart to run again")
+        return 0, 0, True
+    else:
+        log(f"Resuming after {state['scored']} reports (task {state['last_key']['task_id']})")
+
+    query  = _after(state['last_key']) if state['last_key'] else {}
+    cursor = collection.find(query, _PROJECTION).sort(_SORT).batch_size(batch_size)
+
+    t0 = time.perf_counter()
+    scored, changed, batches = 0, 0, 0
+    prev_task = state['last_key']['task_id'] if state['last_key'] else None
+    prev_pct  = float(state['prev_completion_percent'])
+    docs, prevs = [], []
+
+    def flush():
+        nonlocal docs, prevs, scored, changed, batches
+        changed += _score_batch(collection, iso, docs, prevs)
+        scored  += len(docs)
+        batches += 1
+        last = docs[-1]
+        checkpoints.save(JOB, {
+            'last_key': {'task_id': last['task_id'], 'date': last.get('date'), '_id': last['_id']},
+            'prev_completion_percent': prev_pct,
+            'scored': state['scored'] + scored,
+            'changed': state['changed'] + changed,
+        })
+        log(f"  {state['scored'] + scored} reports, {state['changed'] + changed} flags changed "
+            f"({scored / (time.perf_counter() - t0):,.0f} reports/s)")
+        docs, prevs = [], []
+
+    finished = True
+    for doc in cursor:
+        if doc['task_id'] != prev_task:
+            prev_task, prev_pct = doc['task_id'], 0.0
+        docs.append(doc)
+        prevs.append(prev_pct)
+        prev_pct = float(doc.get('completion_percent', 0))
+        if len(docs) >= batch_size:
+            flush()
+            if max_batches is not None and batches >= max_batches:
+                finished = False
+                break
+    if docs:
+        flush()
+    cursor.close()
+
+    if finished:
+        checkpoints.save(JOB, {'finished': True, 'finished_at': datetime.now(timezone.utc)})
+    elapsed = time.perf_counter() - t0
+    rate = scored / elapsed if elapsed > 0 else 0.0
+    log(f"{'✅ Finished' if finished else '⏸  Stopped'}: {scored} reports scored, {changed} flags changed "
+        f"in {elapsed:.1f}s ({rate:,.0f} reports/s) with anomaly model {version}")
+    return scored, changed, finished
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Re-score daily_progress anomaly flags with the active model.')
+    parser.add_argument('--batch-size', type=int, default=10000, help='reports per scoring pass and bulk write')
+    parser.add_argument('--max-batches', type=int, default=None, help='stop after this many batches')
+    parser.add_argument('--restart', action='store_true', help='ignore the checkpoint and start from the beginning')
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/risk_predictions'))
+    try:
+        rescore(client.get_default_database(), batch_size=args.batch_size,
+                restart=args.restart, max_batches=args.max_batches)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify
+from controllers.health_controller import HealthController
+
+health_bp = Blueprint('health', __name__)
+
+
+@health_bp.route('', methods=['GET'])
+@health_bp.route('/live', methods=['GET'])
+def liveness():
+    result, code = HealthController.liveness()
+    return jsonify(result), code
+
+
+@health_bp.route('/ready', methods=['GET'])
+def readiness():
+    result, code = HealthController.readiness()
+    return jsonify(result), code
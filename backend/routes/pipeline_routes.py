@@ -0,0 +1,14 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from controllers.pipeline_controller import PipelineController
+
+pipeline_bp = Blueprint('pipeline', __name__)
+
+
+@pipeline_bp.route('/runs', methods=['GET'])
+@jwt_required()
+def get_runs():
+    limit = request.args.get('limit', 50, type=int)
+    job   = request.args.get('job')
+    result, code = PipelineController.get_runs(limit, job)
+    return jsonify(result), code
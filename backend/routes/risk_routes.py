@@ -12,6 +12,13 @@ def list_projects():
     return jsonify(result), code
 
 
+@risk_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def cache_stats():
+    result, code = RiskController.get_cache_stats()
+    return jsonify(result), code
+
+
 @risk_bp.route('/<project_id>', methods=['GET'])
 @jwt_required()
 def get_risk(project_id):
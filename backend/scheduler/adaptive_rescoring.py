@@ -0,0 +1,332 @@
+"""
+Adaptive, deadline-aware rescoring (RISK_ADAPTIVE_RESCORING) — replaces the
+09:00 full sweep with a continuous one in which every in-progress project
+has its own rescoring interval.
+
+The interval (rescore_interval) starts from the days left to the deadline
+(_DEADLINE_TIERS: half an hour in the last three days, three days beyond a
+quarter) and is then shortened for a high last risk score or recent task
+activity, and lengthened for a low score or a project idle for two weeks.
+It is clamped to RISK_ADAPTIVE_MIN_INTERVAL_MINUTES ..
+RISK_ADAPTIVE_MAX_INTERVAL_HOURS.
+
+AdaptiveRescorer keeps two heaps: projects wait in one by due time, and
+once due move to a ready heap ranked by due time plus interval. Every
+RISK_ADAPTIVE_TICK_SECONDS it pops the ready projects in batches of
+RISK_ADAPTIVE_BATCH_SIZE and scores them with the daily pipeline's own
+read_and_score / _write_back (scores, task_risk and alerts), until the
+tick's CPU budget — RISK_ADAPTIVE_CPU_BUDGET of one core — is spent. The
+budget is charged with the process CPU time of each batch, so the worker
+threads of an n_jobs=-1 forest count; CPU that request threads use
+meanwhile counts too, which errs towards scoring less. Whatever is still
+due waits for the next tick. Under load the rank lets a project due this
+week run up to its own short interval late before one due in six months,
+which may run up to its long one late: both are delayed, in proportion,
+and neither starves. A batch that overruns the budget is paid back from
+the next tick; unused budget is not carried.
+
+Alerts are raised at most once per project per UTC day, by its first
+scoring that day (alerted_on in rescore_schedule), as with the 09:00
+sweep; later scorings that day only update scores, so an unread alert's
+occurrences still count days, not rescorings. The intraday job
+(RISK_INTRADAY_INTERVAL_MINUTES) is not scheduled in this mode.
+
+A due project that was already scored today and has had no task update
+and no dirty task since is pushed on by its interval without scoring:
+the result would be the stored one, as only the date shifts its inputs.
+Scoring work therefore follows activity and the calendar, and a short
+interval mostly bounds how long a change waits for its score.
+
+The queue is rebuilt from Mongo every _RESYNC (and in a process that has
+just taken the scheduler lease): new projects are due at once, and the
+others are due at their last scoring time plus an interval recomputed
+from current deadline, score and activity, so a burst of progress reports
+pulls a project forward. Last scoring times live in rescore_schedule.
+
+benchmarks/simulate_adaptive_rescoring.py compares the inference work and
+the freshness of near-deadline scores with the daily sweep.
+"""
+import time
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+
+from scheduler.intraday_jobs import _aware
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'adaptive_rescore'
+_RESYNC  = timedelta(minutes=10)
+
+# (at most this many days to the deadline, base interval); overdue projects use the first tier
+_DEADLINE_TIERS = (
+    (3,  timedelta(minutes=30)),
+    (7,  timedelta(hours=1)),
+    (14, timedelta(hours=4)),
+    (30, timedelta(hours=12)),
+    (90, timedelta(days=2)),
+)
+_FAR_INTERVAL = timedelta(days=3)
+
+
+def rescore_interval(project, now, last_activity=None,
+                     min_interval=timedelta(minutes=15), max_interval=_FAR_INTERVAL):
+    """How long the project's score may age before it is rescored."""
+    from ml.preprocess import _deadline_date
+
+    deadline = _deadline_date(project.get('deadline'))
+    days     = (deadline - now.date()).days if deadline is not None else 0
+    interval = next((base for limit, base in _DEADLINE_TIERS if days <= limit), _FAR_INTERVAL)
+
+    risk_score = project.get('risk_score') or 0
+    if risk_score >= 80:
+        interval *= 0.5
+    elif risk_score >= 60:
+        interval *= 0.75
+    elif risk_score < 35:
+        interval *= 1.5
+
+    idle = now - _aware(last_activity) if last_activity else None
+    if idle is not None and idle <= timedelta(days=1):
+        interval *= 0.5
+    elif idle is None or idle >= timedelta(days=14):
+        interval *= 2
+
+    return max(min_interval, min(interval, max_interval))
+
+
+class AdaptiveRescorer:
+
+    # CPU seconds used by the process (all threads); the simulation swaps in a modelled clock
+    cpu_clock = staticmethod(time.process_time)
+
+    def __init__(self, db, cpu_budget=0.25, tick_seconds=60, batch_size=50,
+                 min_interval=timedelta(minutes=15), max_interval=_FAR_INTERVAL, resync=_RESYNC):
+        self.db           = db
+        self.cpu_budget   = cpu_budget
+        self.tick_seconds = tick_seconds
+        self.batch_size   = batch_size
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.resync       = resync
+        self._waiting   = []     # (due, rank, project_id) until due
+        self._ready     = []     # (rank, due, project_id) once due, lowest rank first
+        self._due       = {}     # project_id -> due; heap entries not matching it are stale
+        self._activity  = {}     # project_id -> last task update
+        self._projects  = {}     # project_id -> project doc, risk_score kept current
+        self._scored_at = {}     # project_id -> last scoring here
+        self._alerted_on = {}    # project_id -> 'YYYY-MM-DD' its alerts were last raised
+        self._dirty     = set()  # projects with tasks marked dirty in task_risk
+        self._synced_at = None
+        self._debt      = 0.0
+        # Lease the queue was built under (run_adaptive_rescoring)
+        self.fencing_token = None
+
+    @classmethod
+    def from_config(cls, db, config):
+        return cls(
+            db,
+            cpu_budget=config.get('RISK_ADAPTIVE_CPU_BUDGET', 0.25),
+            tick_seconds=config.get('RISK_ADAPTIVE_TICK_SECONDS', 60),
+            batch_size=config.get('RISK_ADAPTIVE_BATCH_SIZE', 50),
+            min_interval=timedelta(minutes=config.get('RISK_ADAPTIVE_MIN_INTERVAL_MINUTES', 15)),
+            max_interval=timedelta(hours=config.get('RISK_ADAPTIVE_MAX_INTERVAL_HOURS', 72)),
+        )
+
+    def interval(self, project, now):
+        return rescore_interval(project, now, self._activity.get(str(project['_id'])),
+                                self.min_interval, self.max_interval)
+
+    # ── Queue ─────────────────────────────────────────────────────────────────
+    def sync(self, now):
+        """Rebuild the queue from in-progress projects, task activity and rescore_schedule."""
+        from models.project_model import ProjectModel
+        from models.rescore_schedule_model import RescoreScheduleModel
+        from scheduler.intraday_jobs import _dirty_projects
+
+        schedule_model = RescoreScheduleModel(self.db)
+        projects  = ProjectModel(self.db).get_in_progress()
+        schedule  = {d['_id']: d for d in schedule_model.get_all()}
+        self._projects = {str(p['_id']): p for p in projects}
+        self._activity = {pid: _aware(at) for pid, at in self._last_activity(list(self._projects)).items()}
+        self._dirty    = _dirty_projects(self.db)
+
+        self._waiting, self._ready, self._due, self._scored_at = [], [], {}, {}
+        self._alerted_on = {}
+        for pid, project in self._projects.items():
+            interval = self.interval(project, now)
+            entry    = schedule.pop(pid, None)
+            if entry is None:
+                self._push(pid, now, interval)
+                continue
+            self._scored_at[pid] = _aware(entry['scored_at'])
+            if entry.get('alerted_on'):
+                self._alerted_on[pid] = entry['alerted_on']
+            self._push(pid, self._scored_at[pid] + interval, interval)
+        schedule_model.remove(list(schedule))        # projects no longer in progress
+        self._synced_at = now
+
+    def _last_activity(self, project_ids):
+        rows = self.db['tasks'].aggregate([
+            {'$match': {'project_id': {'$in': project_ids}}},
+            {'$group': {'_id': '$project_id', 'last': {'$max': '$updated_at'}}},
+        ])
+        return {r['_id']: r['last'] for r in rows if r.get('last')}
+
+    def _push(self, pid, due, interval):
+        self._due[pid] = due
+        heapq.heappush(self._waiting, (due, due + interval, pid))
+
+    def _requeue(self, batch):
+        """Put popped (project_id, due, rank) entries back, still due."""
+        for pid, due, rank in batch:
+            self._due[pid] = due
+            heapq.heappush(self._ready, (rank, due, pid))
+
+    def _pop_due(self, now):
+        """
+        Up to batch_size due projects that changed, lowest rank first;
+        unchanged ones are pushed an interval on.
+        """
+        while self._waiting and self._waiting[0][0] <= now:
+            due, rank, pid = heapq.heappop(self._waiting)
+            if self._due.get(pid) == due:
+                heapq.heappush(self._ready, (rank, due, pid))
+
+        batch = []
+        while self._ready and len(batch) < self.batch_size:
+            rank, due, pid = heapq.heappop(self._ready)
+            if self._due.get(pid) != due:
+                continue
+            del self._due[pid]
+            if self._unchanged(pid, now):
+                interval = self.interval(self._projects[pid], now)
+                self._push(pid, now + interval, interval)
+            else:
+                batch.append((pid, due, rank))
+        return batch
+
+    def _unchanged(self, pid, now):
+        """
+        Scored today, with no task update or dirty task since: rescoring
+        would reproduce the stored score (inputs only shift with the date).
+        """
+        scored_at = self._scored_at.get(pid)
+        if scored_at is None or scored_at.date() != now.date() or pid in self._dirty:
+            return False
+        activity = self._activity.get(pid)
+        return activity is None or activity <= scored_at
+
+    def backlog(self, now):
+        """Projects already due."""
+        return sum(1 for due in self._due.values() if due <= now)
+
+    # ── Processing ────────────────────────────────────────────────────────────
+    def tick(self, now=None, app=None, fencing_token=None):
+        """
+        Score due projects within this tick's CPU budget. Returns {'scored',
+        'backlog', 'cpu_seconds', 'max_lateness_seconds'}.
+        """
+        now = now or datetime.now(timezone.utc)
+        if self._synced_at is None or now - self._synced_at >= self.resync:
+            self.sync(now)
+
+        budget   = self.cpu_budget * self.tick_seconds - self._debt
+        used     = 0.0
+        scored   = 0
+        lateness = 0.0
+        while used < budget:
+            batch = self._pop_due(now)
+            if not batch:
+                break
+            today = now.date().isoformat()
+            alert = {pid for pid, _, _ in batch if self._alerted_on.get(pid) != today}
+            t0 = self.cpu_clock()
+            try:
+                results = self._score([pid for pid, _, _ in batch], app, fencing_token, alert_projects=alert)
+            except Exception:
+                self._requeue(batch)
+                raise
+            used += self.cpu_clock() - t0
+            if results is None:                       # lost the lease: leave them for the new leader
+                self._requeue(batch)
+                break
+            self._reschedule(batch, results, now)
+            scored += len(results)
+            for pid, due, _ in batch:
+                if pid in results:
+                    lateness = max(lateness, (now - due).total_seconds())
+
+        self._debt = max(0.0, used - budget)
+        return {'scored': scored, 'backlog': self.backlog(now),
+                'cpu_seconds': round(used, 3), 'max_lateness_seconds': round(lateness, 1)}
+
+    def _reschedule(self, batch, results, now):
+        from models.rescore_schedule_model import RescoreScheduleModel
+
+        entries = []
+        for pid, _, _ in batch:
+            project = results.get(pid)
+            if project is None:
+                # Failed, or no longer in progress; a later sync drops the latter
+                self._push(pid, now + self.min_interval, self.min_interval)
+                continue
+            self._projects[pid]  = project
+            self._scored_at[pid] = now
+            self._dirty.discard(pid)
+            self._alerted_on[pid] = now.date().isoformat()    # raised now, or earlier today
+            interval = self.interval(project, now)
+            self._push(pid, now + interval, interval)
+            entries.append((pid, now, interval.total_seconds(), now + interval, self._alerted_on[pid]))
+        RescoreScheduleModel(self.db).bulk_save(entries)
+
+    def _score(self, project_ids, app=None, fencing_token=None, alert_projects=None):
+        """
+        Score and write back the projects like the daily pipeline, raising
+        alerts only for alert_projects (all if None). Returns
+        {project_id: project with its new risk_score}, or None if the lease
+        was lost before the write.
+        """
+        from models.project_model import ProjectModel
+        from models.user_model import UserModel
+        from models.alert_model import AlertModel
+        from models.task_risk_model import TaskRiskModel
+        from scheduler.daily_jobs import read_and_score, _write_back
+        from scheduler.leader_lock import still_leader
+
+        project_model   = ProjectModel(self.db)
+        task_risk_model = TaskRiskModel(self.db)
+        projects = project_model.get_in_progress(project_ids)
+        user_map = {str(u['_id']): u for u in UserModel(self.db).get_all()}
+
+        tasks_by_project, seen_seqs, risk_results = read_and_score(self.db, projects, user_map)
+        if app is not None and not still_leader(app, fencing_token):
+            return None
+        _write_back(project_model, AlertModel(self.db), task_risk_model,
+                    projects, tasks_by_project, risk_results, user_map, seen_seqs,
+                    alert_projects=alert_projects)
+
+        scored = {}
+        for project in projects:
+            pid = str(project['_id'])
+            if pid in risk_results:
+                scored[pid] = {**project, 'risk_score': risk_results[pid]['riskPercent']}
+        return scored
+
+
+def run_adaptive_rescoring(app, fencing_token=None):
+    """Scheduler entry point (leader-only through run_leader_job)."""
+    with app.app_context():
+        try:
+            rescorer = getattr(app, 'adaptive_rescorer', None)
+            if rescorer is None or rescorer.fencing_token != fencing_token:
+                # First tick in this process, or the lease changed hands since: start from Mongo
+                rescorer = app.adaptive_rescorer = AdaptiveRescorer.from_config(app.db, app.config)
+                rescorer.fencing_token = fencing_token
+            summary = rescorer.tick(app=app, fencing_token=fencing_token)
+            if summary['scored'] or summary['backlog']:
+                logger.info(f"[Scheduler] Adaptive rescore: {summary['scored']} projects in "
+                            f"{summary['cpu_seconds']:.1f} CPU s, {summary['backlog']} still due")
+        except Exception as e:
+            logger.error(f"[Scheduler] Adaptive rescore error: {e}", exc_info=True)
+
@@ -1,109 +1,353 @@
 """
 APScheduler daily pipeline — runs every morning at 09:00.
   1. Fetches all in-progress projects
-  2. Runs ML risk prediction
-  3. Updates risk_score in MongoDB
+  2. Runs ML risk prediction for the whole portfolio in one batch
+  3. Updates risk_score in MongoDB and the per-task scores in task_risk
   4. Generates alerts for high/critical projects and overdue tasks
+
+Reads and writes are batched across the portfolio — one $in task query,
+one progress aggregation and one bulk write per collection — so the round
+trips do not grow with the number of projects
+(benchmarks/bench_pipeline_queries.py). An alert still unread from an
+earlier run has its occurrence count bumped instead of being repeated;
+read alerts are archived at 03:00 after ALERT_READ_RETENTION_DAYS.
+
+With RISK_PIPELINE_WORKERS > 1 the reads and scoring of step 2 are
+sharded across worker processes (scheduler/sharded_pipeline.py); the
+write-back stays here, batched over every shard's results.
+
+With RISK_INCREMENTAL_RETRAIN on, the risk forest is also warm-start
+retrained at 02:00 (ml/incremental_training.py), ahead of the pipeline.
+
+With RISK_INTRADAY_INTERVAL_MINUTES set, projects whose tasks or progress
+changed are also re-scored between runs (scheduler/intraday_jobs.py).
+
+With RISK_ADAPTIVE_RESCORING on, the 09:00 run is replaced by a continuous
+one that rescores each project at an interval set by its deadline, last
+risk and activity, within a CPU budget (scheduler/adaptive_rescoring.py).
+
+Every app process schedules the jobs; with SCHEDULER_LEADER_LOCK on, only
+the one holding the Mongo lease runs them (scheduler/leader_lock.py).
+
+Each run records its stage timings, portfolio size, failures and peak
+memory in pipeline_runs (scheduler/pipeline_telemetry.py), served to
+managers by GET /api/pipeline/runs.
 """
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from apscheduler.schedulers.background import BackgroundScheduler
 
 logger = logging.getLogger(__name__)
 
 
-def run_daily_risk_pipeline(app):
-    """Core pipeline logic — called by scheduler with app context."""
+def run_daily_risk_pipeline(app, fencing_token=None):
+    """
+    Core pipeline logic — called by scheduler with app context. With a
+    fencing_token (scheduler/leader_lock.py) nothing is written unless the
+    lease is still ours when scoring ends.
+    """
     with app.app_context():
         try:
             from models.project_model import ProjectModel
-            from models.task_model import TaskModel
-            from models.progress_model import ProgressModel
             from models.user_model import UserModel
             from models.alert_model import AlertModel
-            from ml.predict import predict_project_risk
+            from models.task_risk_model import TaskRiskModel
+            from scheduler.pipeline_telemetry import PipelineRun
 
             db = app.db
             project_model = ProjectModel(db)
-            task_model    = TaskModel(db)
-            progress_model = ProgressModel(db)
             user_model    = UserModel(db)
             alert_model   = AlertModel(db)
+            task_risk_model = TaskRiskModel(db)
+            workers = app.config.get('RISK_PIPELINE_WORKERS', 0)
+
+            with PipelineRun(db, 'daily_risk_pipeline', workers=workers, fencing_token=fencing_token) as run:
+                with run.stage('fetch'):
+                    projects = project_model.get_in_progress()
+                    all_users = user_model.get_all()
+                    user_map  = {str(u['_id']): u for u in all_users}
+                logger.info(f"[Scheduler] Running risk pipeline for {len(projects)} projects")
+                run.set(projects=len(projects))
+
+                if workers > 1 and len(projects) > 1:
+                    from functools import partial
+                    from scheduler.sharded_pipeline import score_sharded, mongo_database
+                    with run.stage('scoring_wall'):
+                        tasks_by_project, seen_seqs, risk_results = score_sharded(
+                            projects, workers, partial(mongo_database, app.config['MONGO_URI']),
+                            shards_per_worker=app.config.get('RISK_PIPELINE_SHARDS_PER_WORKER', 4),
+                            timings=run.timings, failures=run.failures,
+                        )
+                else:
+                    tasks_by_project, seen_seqs, risk_results = read_and_score(
+                        db, projects, user_map, timings=run.timings, failures=run.failures)
+                run.set(tasks=sum(len(t) for t in tasks_by_project.values()),
+                        projects_scored=len(risk_results))
+
+                from scheduler.leader_lock import still_leader
+                if not still_leader(app, fencing_token):
+                    logger.warning(f"[Scheduler] Lost the scheduler lease (token {fencing_token}); "
+                                   f"discarding this run's scores")
+                    run.set(status='discarded')
+                    return
+
+                _write_back(project_model, alert_model, task_risk_model,
+                            projects, tasks_by_project, risk_results, user_map, seen_seqs,
+                            timings=run.timings)
+
+            logger.info("[Scheduler] Daily risk pipeline completed.")
+        except Exception as e:
+            logger.error(f"[Scheduler] Pipeline error: {e}", exc_info=True)
+
+
+def read_and_score(db, projects, user_map, models=None, timings=None, failures=None):
+    """
+    Read the tasks and progress of projects and score them.
+    Returns (tasks_by_project, seen_seqs, {project_id: risk_result}).
+    models: (TaskModel, ProgressModel, TaskRiskModel) to reuse, if any.
+    timings / failures: optional run telemetry (scheduler/pipeline_telemetry.py).
+    """
+    from scheduler.pipeline_telemetry import timed
+
+    if models is None:
+        from models.task_model import TaskModel
+        from models.progress_model import ProgressModel
+        from models.task_risk_model import TaskRiskModel
+        models = (TaskModel(db), ProgressModel(db), TaskRiskModel(db))
+    task_model, progress_model, task_risk_model = models
+
+    with timed(timings, 'fetch'):
+        # Tasks of every project in one $in query
+        tasks_by_project = task_model.get_by_projects([str(p['_id']) for p in projects])
+
+        all_tasks = [t for tasks in tasks_by_project.values() for t in tasks]
+        seen_seqs = _dirty_seqs(task_risk_model, all_tasks)
+
+        # Per-task progress stats for the whole portfolio in one aggregation
+        progress_map = progress_model.aggregate_task_stats([str(t['_id']) for t in all_tasks])
+
+    risk_results = _score_portfolio(projects, tasks_by_project, progress_map, user_map, timings, failures)
+    return tasks_by_project, seen_seqs, risk_results
+
+
+def _write_back(project_model, alert_model, task_risk_model,
+                projects, tasks_by_project, risk_results, user_map, seen_seqs, timings=None,
+                alert_projects=None):
+    """
+    Store scores, statuses and alerts with one bulk write per collection.
+    alert_projects, if given, limits alerts to those project ids.
+    """
+    from scheduler.pipeline_telemetry import timed
+
+    score_updates = []
+    alerts        = []
+    scored        = []
+    for project in projects:
+        pid = str(project['_id'])
+        risk_result = risk_results.get(pid)
+        if risk_result is None:
+            continue
+
+        risk_score = risk_result['riskPercent']
+        score_updates.append((pid, risk_score, risk_status(risk_score)))
+        scored.append((tasks_by_project.get(pid, []), risk_result))
+        if alert_projects is None or pid in alert_projects:
+            alerts.extend(_project_alerts(project, risk_result))
 
-            projects = project_model.get_in_progress()
-            logger.info(f"[Scheduler] Running risk pipeline for {len(projects)} projects")
+    with timed(timings, 'write_back'):
+        project_model.bulk_update_risk_scores(score_updates)
+        _store_task_results(task_risk_model, scored, user_map, seen_seqs)
+    with timed(timings, 'alerts'):
+        alert_model.raise_many(alerts)
 
-            all_users = user_model.get_all()
-            user_map  = {str(u['_id']): u for u in all_users}
 
-            for project in projects:
-                pid   = str(project['_id'])
-                tasks = task_model.get_by_project(pid)
+def run_alert_archival(app, fencing_token=None):
+    """Move alerts read more than ALERT_READ_RETENTION_DAYS ago to alerts_archive."""
+    with app.app_context():
+        try:
+            from models.alert_model import AlertModel
+
+            alert_model = AlertModel(app.db)
+            alert_model.ensure_archive_ttl(app.config.get('ALERT_ARCHIVE_TTL_DAYS', 0))
+            before = datetime.now(timezone.utc) - timedelta(days=app.config['ALERT_READ_RETENTION_DAYS'])
+            moved  = alert_model.archive_read(before)
+            logger.info(f"[Scheduler] Archived {moved} read alerts")
+        except Exception as e:
+            logger.error(f"[Scheduler] Alert archival error: {e}", exc_info=True)
+
+
+def run_incremental_retrain(app, fencing_token=None):
+    """Add a cohort of trees trained on outcomes resolved since the last run."""
+    with app.app_context():
+        try:
+            from ml.incremental_training import retrain_incremental
+            result = retrain_incremental(app.db, log=logger.info)
+            if result['status'] == 'skipped':
+                logger.info(f"[Scheduler] Incremental retrain skipped: {result['reason']}")
+        except Exception as e:
+            logger.error(f"[Scheduler] Incremental retrain error: {e}", exc_info=True)
+
 
-                progress_map = {}
-                for task in tasks:
-                    tid = str(task['_id'])
-                    progress_map[tid] = progress_model.get_history_by_task(tid)
+def _score_portfolio(projects, tasks_by_project, progress_map, user_map, timings=None, failures=None):
+    """
+    Score every project in one batched inference. If the batch fails, fall
+    back to per-project scoring so a single bad project is skipped instead
+    of aborting the whole run (and listed in failures, if given).
+    """
+    from ml.predict import predict_project_risk, predict_portfolio_risk
+    from scheduler.pipeline_telemetry import timed
 
-                try:
-                    risk_result = predict_project_risk(project, tasks, progress_map, user_map)
-                except Exception as e:
-                    logger.warning(f"[Scheduler] ML prediction failed for project {pid}: {e}")
-                    continue
+    try:
+        return predict_portfolio_risk(projects, tasks_by_project, progress_map, user_map, timings=timings)
+    except Exception as e:
+        logger.warning(f"[Scheduler] Batched prediction failed, scoring projects one by one: {e}")
 
-                risk_score = risk_result['riskPercent']
-                new_status = (
-                    'at_risk'     if risk_score >= 60
-                    else 'in_progress'
+    results = {}
+    with timed(timings, 'inference'):
+        for project in projects:
+            pid = str(project['_id'])
+            try:
+                results[pid] = predict_project_risk(
+                    project, tasks_by_project.get(pid, []), progress_map, user_map
                 )
-                project_model.update_risk_score(pid, risk_score, new_status)
-
-                # ── Generate alerts if needed ──────────────────────────────
-                if risk_score >= 80:
-                    alert_model.create(
-                        alert_type='deadline_risk',
-                        severity='critical',
-                        title=f'{project["name"]} at Critical Risk',
-                        message=f'Project "{project["name"]}" has {risk_score:.0f}% risk score — critical deadline threat detected by AI.',
-                        project_id=pid,
-                    )
-                elif risk_score >= 60:
-                    alert_model.create(
-                        alert_type='deadline_risk',
-                        severity='warning',
-                        title=f'{project["name"]} Risk Elevated',
-                        message=f'Project "{project["name"]}" risk score is {risk_score:.0f}%. Immediate attention required.',
-                        project_id=pid,
-                    )
-
-                # Alert for individual critical tasks
-                for task_result in risk_result.get('tasks', []):
-                    if task_result['riskLevel'] == 'Critical' and task_result['daysRemaining'] <= 5:
-                        alert_model.create(
-                            alert_type='deadline_risk',
-                            severity='critical',
-                            title=f'{task_result["name"]} — Critical Task Alert',
-                            message=task_result['reason'],
-                            project_id=pid,
-                            task_id=task_result['_id'],
-                        )
+            except Exception as e:
+                logger.warning(f"[Scheduler] ML prediction failed for project {pid}: {e}")
+                if failures is not None:
+                    failures.append({'project_id': pid, 'stage': 'inference', 'error': str(e)})
+    return results
 
-            logger.info("[Scheduler] Daily risk pipeline completed.")
+
+def _dirty_seqs(task_risk_model, tasks):
+    from ml.incremental_risk import dirty_seqs
+    return dirty_seqs(task_risk_model, [str(t['_id']) for t in tasks])
+
+
+def risk_status(risk_score):
+    """Project status the pipeline sets for a risk score."""
+    return (
+        'at_risk'     if risk_score >= 60
+        else 'in_progress'
+    )
+
+
+def _project_alerts(project, risk_result):
+    """AlertModel.create keyword arguments for a scored project (may be empty)."""
+    pid        = str(project['_id'])
+    risk_score = risk_result['riskPercent']
+    alerts     = []
+    if risk_score >= 80:
+        alerts.append(dict(
+            alert_type='deadline_risk',
+            severity='critical',
+            title=f'{project["name"]} at Critical Risk',
+            message=f'Project "{project["name"]}" has {risk_score:.0f}% risk score — critical deadline threat detected by AI.',
+            project_id=pid,
+        ))
+    elif risk_score >= 60:
+        alerts.append(dict(
+            alert_type='deadline_risk',
+            severity='warning',
+            title=f'{project["name"]} Risk Elevated',
+            message=f'Project "{project["name"]}" risk score is {risk_score:.0f}%. Immediate attention required.',
+            project_id=pid,
+        ))
+
+    # Alert for individual critical tasks
+    for task_result in risk_result.get('tasks', []):
+        if task_result['riskLevel'] == 'Critical' and task_result['daysRemaining'] <= 5:
+            alerts.append(dict(
+                alert_type='deadline_risk',
+                severity='critical',
+                title=f'{task_result["name"]} — Critical Task Alert',
+                message=task_result['reason'],
+                project_id=pid,
+                task_id=task_result['_id'],
+            ))
+    return alerts
+
+
+def _store_task_results(task_risk_model, scored, user_map, seen_seqs):
+    """
+    Keep per-task scores so today's API refreshes only re-score changed tasks.
+    scored: [(project tasks, risk_result), ...]; written with one bulk write
+    per model version (normally one).
+    """
+    from ml.incremental_risk import store_task_results
+
+    by_version = {}
+    for tasks, risk_result in scored:
+        entry = by_version.setdefault(risk_result.get('modelVersion'), ([], []))
+        entry[0].extend(tasks)
+        entry[1].extend(risk_result.get('tasks', []))
+    for version, (tasks, task_results) in by_version.items():
+        try:
+            store_task_results(task_risk_model, tasks, task_results, user_map, version, seen_seqs)
         except Exception as e:
-            logger.error(f"[Scheduler] Pipeline error: {e}", exc_info=True)
+            logger.warning(f"[Scheduler] Could not store task scores: {e}")
 
 
 def start_scheduler(app):
+    from scheduler.leader_lock import run_leader_job
+
     scheduler = BackgroundScheduler()
-    scheduler.add_job(
-        func=run_daily_risk_pipeline,
-        args=[app],
-        trigger='cron',
-        hour=9,
-        minute=0,
-        id='daily_risk_pipeline',
-        replace_existing=True,
-    )
+    if app.config.get('RISK_ADAPTIVE_RESCORING'):
+        from scheduler.adaptive_rescoring import run_adaptive_rescoring, JOB_NAME
+        scheduler.add_job(
+            func=run_leader_job,
+            args=[app, run_adaptive_rescoring, JOB_NAME],
+            trigger='interval',
+            seconds=app.config['RISK_ADAPTIVE_TICK_SECONDS'],
+            id=JOB_NAME,
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+        logger.info("[Scheduler] Adaptive rescoring replaces the 09:00 risk pipeline.")
+    else:
+        scheduler.add_job(
+            func=run_leader_job,
+            args=[app, run_daily_risk_pipeline, 'daily_risk_pipeline'],
+            trigger='cron',
+            hour=9,
+            minute=0,
+            id='daily_risk_pipeline',
+            replace_existing=True,
+        )
+    if app.config.get('RISK_INCREMENTAL_RETRAIN'):
+        scheduler.add_job(
+            func=run_leader_job,
+            args=[app, run_incremental_retrain, 'incremental_retrain'],
+            trigger='cron',
+            hour=2,
+            minute=0,
+            id='incremental_retrain',
+            replace_existing=True,
+        )
+        logger.info("[Scheduler] Incremental risk retrain scheduled at 02:00.")
+    if app.config.get('RISK_INTRADAY_INTERVAL_MINUTES', 0) > 0 and not app.config.get('RISK_ADAPTIVE_RESCORING'):
+        # Adaptive rescoring already follows task activity through the day
+        from scheduler.intraday_jobs import run_intraday_rescore
+        scheduler.add_job(
+            func=run_leader_job,
+            args=[app, run_intraday_rescore, 'intraday_rescore'],
+            trigger='interval',
+            minutes=app.config['RISK_INTRADAY_INTERVAL_MINUTES'],
+            id='intraday_rescore',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+    if app.config.get('ALERT_READ_RETENTION_DAYS', 0) > 0:
+        scheduler.add_job(
+            func=run_leader_job,
+            args=[app, run_alert_archival, 'alert_archival'],
+            trigger='cron',
+            hour=3,
+            minute=0,
+            id='alert_archival',
+            replace_existing=True,
+        )
     scheduler.start()
-    logger.info("[Scheduler] Daily risk pipeline scheduled at 09:00.")
+    if not app.config.get('RISK_ADAPTIVE_RESCORING'):
+        logger.info("[Scheduler] Daily risk pipeline scheduled at 09:00.")
     return scheduler
@@ -0,0 +1,198 @@
+"""
+Intraday rescoring — every RISK_INTRADAY_INTERVAL_MINUTES, re-score only
+the in-progress projects whose inputs changed since the last run, so the
+stored risk_score that dashboards read is minutes old rather than up to a
+day.
+
+A project counts as changed when one of its tasks was created or updated,
+a progress report was submitted for one of its tasks, or a task was marked
+dirty in task_risk (e.g. its assignee's trust score changed). Changes are
+found with a change stream on tasks and daily_progress when the server
+supports one (replica set; resumed from the token stored in the
+checkpoint), and otherwise with updated_at / submitted_at watermarks kept
+in job_checkpoints. The watermark queries look back _OVERLAP before the
+last seen timestamp so a write committed late with an earlier timestamp
+is still caught; re-scoring a project twice is harmless.
+
+Changed projects go through ml.incremental_risk.refresh_project_risk, so
+only their dirty or stale tasks are re-scored. Scores and statuses are
+written with one bulk write; alerts stay with the 09:00 pipeline. The
+checkpoint only advances after the write, so a failed run is retried.
+Deleted tasks are not detected here; the daily pipeline catches them.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'intraday_rescore'
+_OVERLAP = timedelta(seconds=30)
+
+_stream_available = True
+
+
+def run_intraday_rescore(app, fencing_token=None):
+    """Scheduler entry point (leader-only through run_leader_job)."""
+    with app.app_context():
+        try:
+            summary = rescore_changed(app.db, app, fencing_token,
+                                      use_change_stream=app.config.get('RISK_INTRADAY_CHANGE_STREAM', True))
+            if summary['projects']:
+                logger.info(f"[Scheduler] Intraday rescore: {summary['projects']} changed projects "
+                            f"({summary['source']}), {summary['rescored']} rescored")
+        except Exception as e:
+            logger.error(f"[Scheduler] Intraday rescore error: {e}", exc_info=True)
+
+
+def rescore_changed(db, app=None, fencing_token=None, use_change_stream=True, now=None, overlap=_OVERLAP):
+    """
+    Find and re-score changed projects. Returns {'projects', 'rescored',
+    'source'}; source is 'change_stream' or 'watermarks'.
+    """
+    from models.job_checkpoint_model import JobCheckpointModel
+    from scheduler.leader_lock import still_leader
+
+    checkpoints = JobCheckpointModel(db)
+    state = checkpoints.get(JOB_NAME) or {}
+    now   = now or datetime.now(timezone.utc)
+
+    stream = _changes_from_stream(db, state.get('resume_token')) if use_change_stream else None
+    if stream is not None and state.get('resume_token') is not None:
+        project_ids, task_ids, token = stream
+        new_state = {'resume_token': token, 'tasks_at': now, 'progress_at': now}
+        source = 'change_stream'
+    else:
+        project_ids, task_ids, new_state = _changes_from_watermarks(db, state, now, overlap)
+        if stream is not None:
+            new_state['resume_token'] = stream[2]      # the next run resumes from here
+        source = 'watermarks'
+
+    project_ids |= _projects_of_tasks(db, task_ids)
+    project_ids |= _dirty_projects(db)
+    project_ids.discard('')
+    project_ids.discard(None)
+
+    rescored = rescore_projects(db, project_ids) if project_ids else []
+    if app is not None and not still_leader(app, fencing_token):
+        logger.warning(f"[Scheduler] Lost the scheduler lease (token {fencing_token}); "
+                       f"discarding intraday scores")
+        return {'projects': len(project_ids), 'rescored': 0, 'source': source}
+
+    if rescored:
+        from models.project_model import ProjectModel
+        ProjectModel(db).bulk_update_risk_scores(rescored)
+    checkpoints.save(JOB_NAME, new_state)
+    return {'projects': len(project_ids), 'rescored': len(rescored), 'source': source}
+
+
+def rescore_projects(db, project_ids):
+    """
+    Incrementally refresh the in-progress projects among project_ids.
+    Returns [(project_id, risk_score, status), ...] for bulk_update_risk_scores.
+    """
+    from models.project_model import ProjectModel
+    from models.task_model import TaskModel
+    from models.progress_model import ProgressModel
+    from models.user_model import UserModel
+    from models.task_risk_model import TaskRiskModel
+    from models.task_feature_state_model import TaskFeatureStateModel
+    from ml.incremental_risk import refresh_project_risk
+    from scheduler.daily_jobs import risk_status
+
+    progress_model, task_risk_model = ProgressModel(db), TaskRiskModel(db)
+    feature_state_model = TaskFeatureStateModel(db)
+
+    projects = ProjectModel(db).get_in_progress(list(project_ids))
+    tasks_by_project = TaskModel(db).get_by_projects([str(p['_id']) for p in projects])
+    user_map = {str(u['_id']): u for u in UserModel(db).get_all()}
+
+    updates = []
+    for project in projects:
+        pid = str(project['_id'])
+        try:
+            risk_result, _ = refresh_project_risk(project, tasks_by_project.get(pid, []), user_map,
+                                                  progress_model, task_risk_model,
+                                                  feature_state_model=feature_state_model)
+        except Exception as e:
+            logger.warning(f"[Scheduler] Intraday rescore failed for project {pid}: {e}")
+            continue
+        updates.append((pid, risk_result['riskPercent'], risk_status(risk_result['riskPercent'])))
+    return updates
+
+
+# ── Change detection ──────────────────────────────────────────────────────────
+def _changes_from_stream(db, resume_token):
+    """
+    (project_ids, task_ids, resume_token) from the change stream since
+    resume_token, or None when change streams are unavailable (standalone
+    server, mongomock) or the token has fallen off the oplog. Without a
+    token the stream starts now, so that run still uses the watermarks.
+    """
+    global _stream_available
+    if not _stream_available:
+        return None
+    pipeline = [{'$match': {'ns.coll': {'$in': ['tasks', 'daily_progress']},
+                            'operationType': {'$in': ['insert', 'update', 'replace']}}}]
+    project_ids, task_ids = set(), set()
+    try:
+        with db.watch(pipeline, full_document='updateLookup', resume_after=resume_token) as stream:
+            change = stream.try_next()
+            while change is not None:
+                doc = change.get('fullDocument') or {}
+                project_ids.add(doc.get('project_id'))
+                if change['ns']['coll'] == 'daily_progress':
+                    task_ids.add(doc.get('task_id'))
+                change = stream.try_next()
+            token = stream.resume_token
+    except Exception as e:
+        if resume_token is None:
+            _stream_available = False
+            logger.info(f"[Scheduler] Change streams unavailable, using watermarks: {e}")
+        else:
+            logger.warning(f"[Scheduler] Change stream could not resume, using watermarks: {e}")
+        return None
+    return project_ids, task_ids, token
+
+
+def _changes_from_watermarks(db, state, now, overlap):
+    """(project_ids, task_ids, new checkpoint fields) from updated_at / submitted_at."""
+    first_run = now - timedelta(minutes=15)
+    tasks_at    = _aware(state.get('tasks_at')) or first_run
+    progress_at = _aware(state.get('progress_at')) or first_run
+
+    project_ids, task_ids = set(), set()
+    for t in db['tasks'].find({'updated_at': {'$gt': tasks_at - overlap}},
+                              {'project_id': 1, 'updated_at': 1}):
+        project_ids.add(t.get('project_id'))
+        tasks_at = max(tasks_at, _aware(t['updated_at']))
+    for r in db['daily_progress'].find({'submitted_at': {'$gt': progress_at - overlap}},
+                                       {'project_id': 1, 'task_id': 1, 'submitted_at': 1}):
+        project_ids.add(r.get('project_id'))
+        task_ids.add(r.get('task_id'))
+        progress_at = max(progress_at, _aware(r['submitted_at']))
+    return project_ids, task_ids, {'tasks_at': tasks_at, 'progress_at': progress_at, 'resume_token': None}
+
+
+def _projects_of_tasks(db, task_ids):
+    """Project ids of tasks (progress reports do not always carry project_id)."""
+    ids = [ObjectId(t) for t in task_ids if t and ObjectId.is_valid(t)]
+    if not ids:
+        return set()
+    return {t.get('project_id') for t in db['tasks'].find({'_id': {'$in': ids}}, {'project_id': 1})}
+
+
+def _dirty_projects(db):
+    from models.task_risk_model import TaskRiskModel
+
+    dirty = TaskRiskModel(db).get_dirty()
+    known = {d['project_id'] for d in dirty if d.get('project_id')}
+    return known | _projects_of_tasks(db, [d['task_id'] for d in dirty if not d.get('project_id')])
+
+
+def _aware(dt):
+    """Stored datetimes come back naive (UTC) unless the client is tz_aware."""
+    if dt is None or dt.tzinfo is not None:
+        return dt
+    return dt.replace(tzinfo=timezone.utc)
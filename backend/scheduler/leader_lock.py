@@ -0,0 +1,152 @@
+"""
+Leader election for scheduled jobs across processes (SCHEDULER_LEADER_LOCK).
+
+Every app process — each waitress/gunicorn worker, the Flask reloader's
+child — starts its BackgroundScheduler, but a job only runs in the process
+holding the 'scheduler' lease in Mongo (models/scheduler_lock_model.py).
+
+A heartbeat thread renews the lease every ttl/3 seconds while it is held
+and tries to take it over when it has expired, so if the leader dies the
+next heartbeat of another process after the TTL makes that process leader.
+At exit the leader releases the lease so failover is immediate.
+Callbacks registered with on_acquire() run each time this process becomes
+leader, for one-off work that only the leader should do (e.g. re-queueing
+anomaly reports a dead process left pending).
+
+Each job firing re-confirms the lease in Mongo before starting (a process
+that was paused past its TTL finds it lost and skips) and gets the lease's
+fencing token; jobs check it with still_holds() right before their writes
+so a leader that lost the lease mid-run does not write. Expiry uses each
+process's clock, so clock skew between hosts must stay well under the TTL.
+"""
+import os
+import uuid
+import socket
+import logging
+import threading
+
+from models.scheduler_lock_model import SchedulerLockModel
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+
+    def __init__(self, db, name='scheduler', ttl_seconds=60, owner=None):
+        self.model = SchedulerLockModel(db)
+        self.name  = name
+        self.ttl   = ttl_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.token = None               # fencing token while leader, else None
+
+        self._lock   = threading.Lock()
+        self._stop   = threading.Event()
+        self._thread = None
+        self._on_acquire = []
+
+    # ── Lease ─────────────────────────────────────────────────────────────────
+    def heartbeat(self):
+        """Renew the lease if held, else try to take it. Returns the token or None."""
+        acquired = False
+        with self._lock:
+            if self.token is not None and not self.model.renew(self.name, self.owner, self.token, self.ttl):
+                logger.warning(f"[Leader] {self.owner} lost the '{self.name}' lease (token {self.token})")
+                self.token = None
+            if self.token is None:
+                self.token = self.model.acquire(self.name, self.owner, self.ttl)
+                if self.token is not None:
+                    acquired = True
+                    logger.info(f"[Leader] {self.owner} is now leader of '{self.name}' (token {self.token})")
+            token = self.token
+        if acquired:
+            for callback in self._on_acquire:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"[Leader] on_acquire callback failed: {e}")
+        return token
+
+    def on_acquire(self, callback):
+        """Call callback() (outside the lock) every time this process becomes leader."""
+        self._on_acquire.append(callback)
+
+    def is_leader(self):
+        return self.token is not None
+
+    def still_holds(self, token):
+        """True if token is still the live lease of this process (check before writing)."""
+        return token is not None and self.model.holds(self.name, self.owner, token)
+
+    # ── Heartbeat thread ──────────────────────────────────────────────────────
+    def start(self):
+        """
+        Start the heartbeat thread. The first acquire happens on that thread,
+        so an unreachable Mongo at boot only means "not leader yet".
+        """
+        if self._thread is not None:
+            return
+
+        def _run():
+            while True:
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    logger.warning(f"[Leader] Heartbeat failed: {e}")
+                if self._stop.wait(self.ttl / 3):
+                    return
+
+        self._thread = threading.Thread(target=_run, name='scheduler-leader-heartbeat', daemon=True)
+        self._thread.start()
+
+    def stop(self, release=True):
+        """Stop the heartbeat and, by default, hand the lease back."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self.token is None:
+            return                      # never led (or Mongo is down): nothing to hand back
+        with self._lock:
+            if release and self.token is not None:
+                try:
+                    self.model.release(self.name, self.owner, self.token)
+                    logger.info(f"[Leader] {self.owner} released '{self.name}'")
+                except Exception as e:
+                    logger.warning(f"[Leader] Could not release '{self.name}', it expires in {self.ttl}s: {e}")
+            self.token = None
+
+    def status(self):
+        doc = self.model.get(self.name) or {}
+        expires = doc.get('expires_at')
+        return {
+            'enabled': True,
+            'leader': self.is_leader(),
+            'owner': self.owner,
+            'currentLeader': doc.get('owner'),
+            'token': doc.get('token'),
+            'leaseExpires': expires.isoformat() if expires else None,
+        }
+
+
+def run_leader_job(app, func, job_id):
+    """
+    Scheduler entry point: run func(app, fencing_token=...) if this process
+    leads. Without a leader lock (SCHEDULER_LEADER_LOCK off) it always runs.
+    """
+    lock = getattr(app, 'leader_lock', None)
+    if lock is None:
+        return func(app)
+    try:
+        token = lock.heartbeat()
+    except Exception as e:
+        logger.error(f"[Leader] Could not confirm the lease, skipping '{job_id}': {e}")
+        return None
+    if token is None:
+        logger.info(f"[Leader] Skipping '{job_id}': another process is leader")
+        return None
+    return func(app, fencing_token=token)
+
+
+def still_leader(app, fencing_token):
+    """For jobs: False if a leader lock is on and fencing_token is no longer current."""
+    lock = getattr(app, 'leader_lock', None)
+    return lock is None or fencing_token is None or lock.still_holds(fencing_token)
@@ -0,0 +1,151 @@
+"""
+Telemetry for scheduled pipeline runs, stored in pipeline_runs and served
+by GET /api/pipeline/runs (managers only).
+
+A PipelineRun is recorded when the run starts and completed when it ends:
+
+    stages        seconds per stage — fetch, features, inference,
+                  write_back, alerts. Stage code adds to run.timings through
+                  timed(); with sharded scoring the fetch/features/inference
+                  figures are summed over shards (worker seconds) and
+                  other_timings.scoring_wall is the elapsed time of that step.
+    projects / tasks processed, projects_scored, throughput per second
+    failures      [{project_id, stage, error}] — projects skipped by the
+                  per-project fallback, failed shards, or the whole run
+    peak_rss_mb   highest resident memory of the process sampled during
+                  the run (None where it cannot be read, e.g. Windows)
+"""
+import os
+import sys
+import time
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('fetch', 'features', 'inference', 'write_back', 'alerts')
+_RSS_SAMPLE_SECONDS = 0.1
+
+
+@contextmanager
+def timed(timings, stage):
+    """Add the block's elapsed seconds to timings[stage] (no-op if timings is None)."""
+    if timings is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
+
+
+def _rss_bytes():
+    """Current resident set size, or None if this platform does not expose it."""
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss    # peak, not current
+        return rss if sys.platform == 'darwin' else rss * 1024
+    except ImportError:
+        return None
+
+
+class PipelineRun:
+
+    def __init__(self, db, job, **fields):
+        from models.pipeline_run_model import PipelineRunModel
+
+        self.model    = PipelineRunModel(db)
+        self.job      = job
+        self.timings  = {}
+        self.failures = []
+        self.fields   = fields
+        self._peak    = None
+        self._stop    = threading.Event()
+        self._sampler = None
+        self._t0      = None
+        self.run_id   = None
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        self._sample()
+        self._sampler = threading.Thread(target=self._sample_loop, name='pipeline-rss-sampler', daemon=True)
+        self._sampler.start()
+        try:
+            self.run_id = self.model.start({
+                'job': self.job,
+                'started_at': datetime.now(timezone.utc),
+                'host': f"{socket.gethostname()}:{os.getpid()}",
+                **self.fields,
+            })
+        except Exception as e:
+            logger.warning(f"[Telemetry] Could not record the start of {self.job}: {e}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.fail(None, 'run', exc)
+        self.finish('failed' if exc is not None else None)
+        return False
+
+    # ── Recording ─────────────────────────────────────────────────────────────
+    def stage(self, name):
+        return timed(self.timings, name)
+
+    def fail(self, project_id, stage, error):
+        self.failures.append({'project_id': project_id, 'stage': stage, 'error': str(error)})
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def finish(self, status=None):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1)
+        self._sample()
+        duration = time.perf_counter() - self._t0
+        projects = self.fields.get('projects', 0)
+        tasks    = self.fields.get('tasks', 0)
+        status   = status or self.fields.pop('status', None) or ('partial' if self.failures else 'success')
+        doc = {
+            **self.fields,
+            'status': status,
+            'finished_at': datetime.now(timezone.utc),
+            'duration_seconds': round(duration, 3),
+            'stages': {name: round(self.timings.get(name, 0.0), 3) for name in STAGES},
+            'throughput': {
+                'projects_per_second': round(projects / duration, 2) if duration else None,
+                'tasks_per_second': round(tasks / duration, 2) if duration else None,
+            },
+            'failures': self.failures,
+            'failure_count': len(self.failures),
+            'peak_rss_mb': round(self._peak / 2**20, 1) if self._peak else None,
+        }
+        extra = {k: round(v, 3) for k, v in self.timings.items() if k not in STAGES}
+        if extra:
+            doc['other_timings'] = extra
+        if self.run_id is None:
+            return doc
+        try:
+            self.model.finish(self.run_id, doc)
+        except Exception as e:
+            logger.warning(f"[Telemetry] Could not record the end of {self.job}: {e}")
+        return doc
+
+    # ── Memory ────────────────────────────────────────────────────────────────
+    def _sample(self):
+        rss = _rss_bytes()
+        if rss is not None and (self._peak is None or rss > self._peak):
+            self._peak = rss
+
+    def _sample_loop(self):
+        while not self._stop.wait(_RSS_SAMPLE_SECONDS):
+            self._sample()
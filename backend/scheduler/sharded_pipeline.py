@@ -0,0 +1,145 @@
+"""
+Sharded scoring for the daily risk pipeline (RISK_PIPELINE_WORKERS > 1).
+
+In-progress projects are dealt round-robin into workers * shards_per_worker
+shards and scored on a ProcessPoolExecutor. Each worker process opens its
+own Mongo client (db_factory, called once per process — pymongo clients do
+not survive a fork), reads its shard's tasks, progress and task_risk state
+with the same batched queries as the serial path
+(daily_jobs.read_and_score), and returns the results. The caller does the
+write-back once, over every shard.
+
+Workers run the 'compiled' inference engine, so a risk version published
+with an arrays artifact is memory-mapped: every worker maps the same pages
+from the OS page cache instead of unpickling its own forest. Versions
+without one (legacy pickles) are loaded per worker.
+
+Errors are isolated per project inside a shard (_score_portfolio falls
+back to one project at a time) and per shard across the pool: a shard that
+fails outright is logged and its projects are left unscored for the day,
+the other shards still written back.
+
+The pool uses the 'spawn' start method — the app process has the
+scheduler, model watcher and Mongo client threads running, which a fork
+would copy in an undefined state.
+"""
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+# Per-process state, set by _init_worker
+_worker = {}
+
+
+def mongo_database(uri):
+    """db_factory for production: a fresh client on the configured database."""
+    from pymongo import MongoClient
+    return MongoClient(uri).get_default_database()
+
+
+def make_shards(projects, n_shards):
+    """Deal projects round-robin into at most n_shards non-empty lists."""
+    n_shards = max(1, min(n_shards, len(projects)))
+    return [projects[i::n_shards] for i in range(n_shards)]
+
+
+def _init_worker(db_factory, models_dir=None):
+    from models.task_model import TaskModel
+    from models.progress_model import ProgressModel
+    from models.user_model import UserModel
+    from models.task_risk_model import TaskRiskModel
+    from ml.model_registry import registry
+    from ml.predict import set_inference_engine
+
+    if models_dir:
+        registry.models_dir    = models_dir
+        registry.manifest_path = f"{models_dir}/manifest.json"
+    set_inference_engine('compiled')
+
+    db = db_factory()
+    _worker['db']     = db
+    _worker['models'] = (TaskModel(db), ProgressModel(db), TaskRiskModel(db))
+    _worker['users']  = UserModel(db)
+
+
+def _score_shard(shard_no, projects):
+    """Read and score one shard in a worker; returns its results and timing."""
+    from scheduler.daily_jobs import read_and_score
+
+    t0 = time.perf_counter()
+    user_map = {str(u['_id']): u for u in _worker['users'].get_all()}
+    timings, failures = {'fetch': time.perf_counter() - t0}, []
+    tasks_by_project, seen_seqs, risk_results = read_and_score(
+        _worker['db'], projects, user_map, models=_worker['models'], timings=timings, failures=failures)
+    return {
+        'shard': shard_no,
+        'tasks_by_project': tasks_by_project,
+        'seen_seqs': seen_seqs,
+        'risk_results': risk_results,
+        'unscored': [str(p['_id']) for p in projects if str(p['_id']) not in risk_results],
+        'timings': timings,
+        'failures': failures,
+        'seconds': time.perf_counter() - t0,
+    }
+
+
+def score_sharded(projects, workers, db_factory, shards_per_worker=4, models_dir=None, stats=None,
+                  timings=None, failures=None):
+    """
+    Score projects across a pool of worker processes.
+
+    db_factory: picklable zero-argument callable returning a database
+                handle; called once in each worker.
+    stats:      optional dict filled with the run's timings.
+    timings / failures: optional run telemetry; per-stage seconds are summed
+                over shards, and every project of a failed shard is listed.
+
+    Returns (tasks_by_project, seen_seqs, risk_results) merged over every
+    shard that completed, like daily_jobs.read_and_score.
+    """
+    t0 = time.perf_counter()
+    shards = make_shards(projects, workers * shards_per_worker)
+
+    tasks_by_project, seen_seqs, risk_results = {}, {}, {}
+    shard_seconds, failed, unscored = 0.0, [], []
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(db_factory, models_dir)) as pool:
+        futures = {pool.submit(_score_shard, i, shard): i for i, shard in enumerate(shards)}
+        for future in as_completed(futures):
+            shard_no = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed.append(shard_no)
+                logger.error(f"[Scheduler] Shard {shard_no} ({len(shards[shard_no])} projects) failed: {e}")
+                if failures is not None:
+                    failures.extend({'project_id': str(p['_id']), 'stage': f'shard {shard_no}', 'error': str(e)}
+                                    for p in shards[shard_no])
+                continue
+            tasks_by_project.update(result['tasks_by_project'])
+            seen_seqs.update(result['seen_seqs'])
+            risk_results.update(result['risk_results'])
+            unscored.extend(result['unscored'])
+            shard_seconds += result['seconds']
+            if timings is not None:
+                for stage, seconds in result['timings'].items():
+                    timings[stage] = timings.get(stage, 0.0) + seconds
+            if failures is not None:
+                failures.extend(result['failures'])
+
+    wall = time.perf_counter() - t0
+    logger.info(
+        f"[Scheduler] Scored {len(risk_results)}/{len(projects)} projects in {len(shards)} shards "
+        f"on {workers} workers: {wall:.1f}s wall, {shard_seconds:.1f}s in shards "
+        f"({shard_seconds / wall if wall else 0:.1f}x parallel)"
+        + (f", {len(failed)} shards failed" if failed else "")
+        + (f", {len(unscored)} projects skipped" if unscored else "")
+    )
+    if stats is not None:
+        stats.update({'wall_seconds': wall, 'shard_seconds': shard_seconds, 'shards': len(shards),
+                      'failed_shards': sorted(failed), 'unscored': unscored})
+    return tasks_by_project, seen_seqs, risk_results
@@ -7,6 +7,8 @@ Usage:
 """
 
 import os
+import sys
+import signal
 from waitress import serve
 from app import create_app
 
@@ -17,6 +19,8 @@ PORT   = int(os.getenv('PORT', 5000))
 THREADS = int(os.getenv('THREADS', 4))
 
 if __name__ == '__main__':
+    # Exit normally on SIGTERM so atexit hooks (e.g. draining the anomaly queue) run
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
     print(f"🚀  Production server starting on http://{HOST}:{PORT}")
     print(f"    Threads : {THREADS}")
     print(f"    Press Ctrl+C to stop.\n")